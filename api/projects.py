@@ -1,8 +1,9 @@
 # api/projects.py
 
+import base64
 import json
 import logging
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from sqlalchemy.exc import IntegrityError
 from utils.app_globals import (import_queue, screening_queue, atn_scoring_queue, extraction_queue, analysis_queue,
     synthesis_queue, discussion_draft_queue, extension_queue
@@ -11,7 +12,14 @@ from utils.extensions import db  # ✅ AJOUT
 from datetime import datetime
 from utils.app_globals import import_queue
 from utils.extensions import db
-from utils.models import Project, Grid, Extraction, AnalysisProfile, RiskOfBias, Analysis, SearchResult, ChatMessage
+from utils.models import Project, Grid, Extraction, AnalysisProfile, RiskOfBias, Analysis, SearchResult, ChatMessage, SEARCH_RESULT_SORT_KEYS
+from utils.cache import get_search_results_count
+from utils.progress import get_progress, start_progress_run, with_live_progress
+from utils.notifications import read_notifications, NOTIFICATION_READ_LIMIT
+from utils.project_stats import get_project_stats, refresh_project_stats, EXTRACTIONS
+from utils.extraction_stream import extractions_stream_response, EXTRACTION_STREAM_FIELDS
+from utils.ai_processors import AIResponseError, stream_ollama_api
+from utils.extensions import limiter
 
 from utils.file_handlers import save_file_to_project_dir
 from backend.tasks_v4_complete import (
@@ -25,6 +33,7 @@ from backend.tasks_v4_complete import (
     run_atn_score_task,
     run_knowledge_graph_task,
     run_prisma_flow_task,
+    run_deduplication_task,
     import_from_zotero_file_task,
     import_pdfs_from_zotero_task,
     run_atn_specialized_extraction_task,
@@ -35,12 +44,16 @@ from backend.tasks_v4_complete import (
     run_descriptive_stats_task,
     run_atn_stakeholder_analysis_task,
     run_extension_task,
+    export_thesis_task,
+    thesis_export_path,
+    prepare_chat_prompt,
+    save_chat_exchange,
+    CHAT_LLM_MODEL,
 )
-from utils.helpers import format_bibliography
 from utils.decorators import require_api_key
 
 from werkzeug.utils import secure_filename
-from sqlalchemy import select
+from sqlalchemy import select, func, tuple_
 
 projects_bp = Blueprint('projects_bp', __name__)
 from sqlalchemy import text
@@ -70,7 +83,7 @@ def handle_projects():
     else: # GET
         stmt = select(Project).order_by(Project.created_at.desc())
         projects = db.session.execute(stmt).scalars().all()
-        return jsonify([p.to_dict() for p in projects]), 200
+        return jsonify([with_live_progress(p.to_dict()) for p in projects]), 200
 
 @projects_bp.route('/projects/<project_id>', methods=['GET', 'DELETE'])
 def handle_project(project_id):
@@ -79,12 +92,44 @@ def handle_project(project_id):
         return jsonify({"error": "Projet non trouvé"}), 404
     
     if request.method == 'GET':
-        return jsonify(project.to_dict()), 200
+        return jsonify(with_live_progress(project.to_dict())), 200
     elif request.method == 'DELETE':
         db.session.delete(project)
         db.session.commit()
         return '', 204
 
+@projects_bp.route('/projects/<project_id>/progress', methods=['GET'])
+def get_project_progress(project_id):
+    """Progression du run courant, servie depuis Redis sans lire la ligne projects."""
+    progress = get_progress(project_id)
+    if progress is None:
+        return jsonify({"project_id": project_id, "progress": None}), 200
+    progress.pop("unflushed_processed")
+    progress.pop("unflushed_processing_time")
+    return jsonify({"project_id": project_id, "progress": progress}), 200
+
+@projects_bp.route('/projects/<project_id>/notifications', methods=['GET'])
+def get_project_notifications(project_id):
+    """
+    Notifications du projet manquées depuis `after` (event_id de la dernière reçue), lues dans
+    son journal Redis : un client qui se reconnecte rattrape son retard sans recharger ses listes.
+    Si `truncated` est vrai, l'historique ne remonte plus jusque-là et l'état doit être rechargé.
+    """
+    try:
+        limit = int(request.args.get('limit', NOTIFICATION_READ_LIMIT))
+        result = read_notifications(project_id, after=request.args.get('after') or None, limit=limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"project_id": project_id, **result}), 200
+
+@projects_bp.route('/projects/<project_id>/stats', methods=['GET'])
+def get_project_stats_endpoint(project_id):
+    """Statistiques agrégées du projet (sources, décisions, scores, PDF, temps), lues dans project_stats."""
+    stats = get_project_stats(project_id)
+    if stats is None:
+        return jsonify({"error": "Projet non trouvé"}), 404
+    return jsonify(stats), 200
+
 @projects_bp.route('/projects/<project_id>/add-manual-articles', methods=['POST'])
 def add_manual_articles_endpoint(project_id):
     from utils.app_globals import import_queue
@@ -100,42 +145,91 @@ def add_manual_articles_endpoint(project_id):
         return jsonify({"task_id": task.id}), 202
     return jsonify({"error": "No items provided"}), 400
 
+SEARCH_RESULTS_MAX_PER_PAGE = 200
+
+
+def _encode_cursor(sort_value, row_id: str) -> str:
+    """Curseur opaque (base64 url-safe) contenant la dernière clé de tri et l'id de la page."""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    return base64.urlsafe_b64encode(json.dumps([sort_value, row_id]).encode()).decode()
+
+
+def _decode_cursor(cursor: str, sort_by: str):
+    sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    if sort_by == 'created_at' and sort_value is not None:
+        sort_value = datetime.fromisoformat(sort_value)
+    return sort_value, row_id
+
+
 @projects_bp.route('/projects/<project_id>/search-results', methods=['GET'])
 def get_project_search_results(project_id):
-    """Retourne les résultats de recherche paginés pour un projet."""
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
+    """
+    Retourne les résultats de recherche paginés pour un projet.
+
+    Mode curseur (keyset) : `?cursor=` pour la première page, puis la valeur de `next_cursor`.
+    Mode page (OFFSET) : `?page=N`, conservé pour compatibilité. Le tri est limité aux clés indexées.
+    """
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), SEARCH_RESULTS_MAX_PER_PAGE)
     sort_by = request.args.get('sort_by', 'created_at')
     sort_order = request.args.get('sort_order', 'desc')
+    if sort_by not in SEARCH_RESULT_SORT_KEYS:
+        return jsonify({"error": f"Tri non supporté: {sort_by}", "allowed_sort_by": sorted(SEARCH_RESULT_SORT_KEYS)}), 400
+
+    sort_key = SEARCH_RESULT_SORT_KEYS[sort_by]
+    descending = sort_order != 'asc'
+    stmt = select(SearchResult, sort_key.label('sort_value')).where(SearchResult.project_id == project_id)
+    if descending:
+        stmt = stmt.order_by(sort_key.desc(), SearchResult.id.desc())
+    else:
+        stmt = stmt.order_by(sort_key.asc(), SearchResult.id.asc())
+
+    cursor = request.args.get('cursor')
+    page = None
+    if cursor is not None:
+        if cursor:
+            try:
+                sort_value, row_id = _decode_cursor(cursor, sort_by)
+            except (ValueError, TypeError):
+                return jsonify({"error": "Curseur invalide"}), 400
+            position = tuple_(sort_key, SearchResult.id)
+            stmt = stmt.where(position < tuple_(sort_value, row_id) if descending else position > tuple_(sort_value, row_id))
+    else:
+        page = max(request.args.get('page', 1, type=int), 1)
+        stmt = stmt.offset((page - 1) * per_page)
 
-    stmt = select(SearchResult).filter_by(project_id=project_id)
-    if hasattr(SearchResult, sort_by):
-        order_column = getattr(SearchResult, sort_by)
-        if sort_order == 'asc':
-            stmt = stmt.order_by(order_column.asc())
-        else:
-            stmt = stmt.order_by(order_column.desc())
-
-    total_stmt = select(db.func.count()).select_from(stmt.subquery())
-    total = db.session.execute(total_stmt).scalar_one()
-    offset = (page - 1) * per_page
-    paginated_stmt = stmt.offset(offset).limit(per_page)
-    items = db.session.execute(paginated_stmt).scalars().all()
-    total_pages = (total + per_page - 1) // per_page if per_page > 0 else 0
+    # Une ligne de plus que demandé : indique s'il existe une page suivante sans COUNT
+    rows = db.session.execute(stmt.limit(per_page + 1)).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    next_cursor = _encode_cursor(rows[-1].sort_value, rows[-1].SearchResult.id) if has_more else None
 
-    return jsonify({
-        'results': [item.to_dict() for item in items],
+    total = get_search_results_count(project_id, lambda: db.session.execute(
+        select(func.count()).select_from(SearchResult).where(SearchResult.project_id == project_id)
+    ).scalar_one())
+
+    response = {
+        'results': [row.SearchResult.to_dict() for row in rows],
         'total': total,
-        'page': page,
         'per_page': per_page,
-        'total_pages': total_pages,
-    })
+        'next_cursor': next_cursor,
+    }
+    if page is not None:
+        response['page'] = page
+        response['total_pages'] = (total + per_page - 1) // per_page
+    return jsonify(response)
 
 @projects_bp.route('/projects/<project_id>/extractions', methods=['GET'])
 def get_project_extractions(project_id):
-    """Retourne toutes les extractions pour un projet."""
-    extractions = db.session.scalars(select(Extraction).filter_by(project_id=project_id)).all()
-    return jsonify([e.to_dict() for e in extractions]), 200
+    """
+    Retourne les extractions d'un projet, diffusées depuis un curseur côté serveur.
+    Paramètres : fields (projection, ex. 'pmid,title,data.Type_IA'), min_score, category ;
+    format=ndjson (ou Accept: application/x-ndjson) pour un objet par ligne.
+    """
+    try:
+        return extractions_stream_response(project_id, request)
+    except ValueError as e:
+        return jsonify({"error": str(e), "allowed_fields": sorted(EXTRACTION_STREAM_FIELDS)}), 400
 
 @projects_bp.route('/projects/<project_id>/analyses', methods=['GET'])
 def get_project_analyses(project_id):
@@ -229,13 +323,16 @@ def set_extraction_decision(project_id, extraction_id):
     if not extraction:
         return jsonify({"error": "Extraction non trouvée"}), 404
 
-    validations = json.loads(extraction.validations) if extraction.validations else {}
+    # Nouveau dictionnaire : la réaffectation est détectée par l'ORM (JSONB non mutable)
+    validations = dict(extraction.validations or {})
     validations[evaluator] = decision
 
-    extraction.validations = json.dumps(validations)
+    extraction.validations = validations
     
     if len(validations) == 1:
         extraction.user_validation_status = decision
+        db.session.flush()
+        refresh_project_stats(extraction.project_id, [EXTRACTIONS])
 
     db.session.commit()
     return jsonify(extraction.to_dict()), 200
@@ -266,9 +363,9 @@ def import_validations(project_id):
 
             extraction = db.session.scalar(select(Extraction).filter_by(project_id=project_id, pmid=article_id))
             if extraction:
-                validations = json.loads(extraction.validations) if extraction.validations else {}
+                validations = dict(extraction.validations or {})
                 validations['evaluator2'] = decision
-                extraction.validations = json.dumps(validations)
+                extraction.validations = validations
                 count += 1
         
         db.session.commit()
@@ -291,6 +388,61 @@ def chat_with_project(project_id):
     job = import_queue.enqueue(answer_chat_question_task, project_id=project_id, question=question, job_timeout=900)
     return jsonify({"message": "Question soumise", "job_id": job.id}), 202
 
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@projects_bp.route('/projects/<project_id>/chat/stream', methods=['POST'])
+@limiter.limit("20 per minute")
+def chat_with_project_stream(project_id):
+    """
+    Chat sans file d'attente : la recherche des passages se fait dans le processus web et les
+    jetons d'Ollama sont relayés en Server-Sent Events (événements token, error, done).
+    La réponse complète est enregistrée dans chat_messages à la fin du flux.
+    Le flux occupe la connexion pendant toute la génération : la route suppose un worker gunicorn
+    gevent (backend/config/gunicorn.conf.py) ; un worker sync serait tué par l'arbitre après --timeout.
+    """
+    data = request.get_json(silent=True) or {}
+    question = (data.get('question') or '').strip()
+    if not question:
+        return jsonify({"error": "Question is required"}), 400
+    if not db.session.get(Project, project_id):
+        return jsonify({"error": "Projet non trouvé"}), 404
+
+    def generate():
+        parts = []
+        saved = False
+        try:
+            prompt, answer, pending = prepare_chat_prompt(project_id, question)
+            if prompt is None:
+                # Repli ou réponse du cache sémantique : envoyée d'un bloc
+                yield _sse_event('token', {'token': answer})
+            else:
+                try:
+                    for token in stream_ollama_api(prompt, CHAT_LLM_MODEL):
+                        parts.append(token)
+                        yield _sse_event('token', {'token': token})
+                    answer = "".join(parts).strip()
+                    if pending is not None and answer:
+                        pending.fill(answer)
+                except AIResponseError as e:
+                    logger.error(f"Chat en streaming interrompu pour le projet {project_id}: {e}")
+                    answer = "".join(parts).strip() or "Erreur lors de la génération de la réponse."
+                    yield _sse_event('error', {'error': str(e)})
+            save_chat_exchange(project_id, question, answer)
+            db.session.commit()
+            saved = True
+            yield _sse_event('done', {'answer': answer})
+        finally:
+            # Client déconnecté en cours de génération : la réponse partielle est conservée
+            if not saved and parts:
+                save_chat_exchange(project_id, question, "".join(parts).strip())
+                db.session.commit()
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @projects_bp.route('/projects/<project_id>/run', methods=['POST'])
 def run_pipeline(project_id):
     data = request.get_json()
@@ -308,6 +460,7 @@ def run_pipeline(project_id):
     if not profile:
         return jsonify({"error": "Profil d'analyse non trouvé"}), 404
 
+    run_id = start_progress_run(project_id, len(article_ids))
     task_ids = []
     for article_id in article_ids:
         job = screening_queue.enqueue(
@@ -317,6 +470,7 @@ def run_pipeline(project_id):
             profile=profile.to_dict(),
             analysis_mode=analysis_mode,
             custom_grid_id=custom_grid_id,
+            run_id=run_id,
             job_timeout=1800
         )
         task_ids.append(job.id)
@@ -334,6 +488,7 @@ def run_analysis(project_id):
         "discussion": (run_discussion_generation_task, discussion_draft_queue, 1800),
         "knowledge_graph": (run_knowledge_graph_task, analysis_queue, 1800),
         "prisma_flow": (run_prisma_flow_task, analysis_queue, 1800),
+        "deduplication": (run_deduplication_task, analysis_queue, 1800),
         "meta_analysis": (run_meta_analysis_task, analysis_queue, 1800),
         "descriptive_stats": (run_descriptive_stats_task, analysis_queue, 1800),
         "atn_scores": (run_atn_score_task, analysis_queue, 1800),
@@ -543,55 +698,31 @@ def handle_prisma_checklist(project_id):
         db.session.commit()
         return jsonify({"message": "Checklist PRISMA sauvegardée"}), 200
 
-@projects_bp.route('/projects/<project_id>/export/thesis', methods=['GET'])
+@projects_bp.route('/projects/<project_id>/export/thesis', methods=['GET', 'POST'])
 def export_thesis(project_id):
-    """Export de thèse."""
-    import pandas as pd
-    import zipfile
-    import io
-    from sqlalchemy import text
-    import logging
-
-    from utils.extensions import db
-    from datetime import datetime
-    from flask import send_file
-    
-    try:
-        search_results = db.session.scalars(select(SearchResult).filter_by(project_id=project_id)).all()
-        
-
-        included_article_ids = db.session.scalars(select(Extraction.pmid).filter_by(project_id=project_id, user_validation_status='include')).all()
+    """
+    Export de thèse (archive ZIP générée par une tâche de fond).
 
-        if included_article_ids:
-            articles_to_export = [r.to_dict() for r in search_results if r.article_id in included_article_ids]
-        else:
-            articles_to_export = [r.to_dict() for r in search_results]
+    POST : lance la génération et renvoie le job à suivre. GET : sert la dernière archive générée
+    depuis le disque (Last-Modified indique sa date), ou 404 s'il n'y en a pas ; il ne lance rien.
+    """
+    from flask import send_file
 
-        if not articles_to_export:
-            return jsonify({"error": "Aucun article inclus à exporter"}), 404
+    if not db.session.get(Project, project_id):
+        return jsonify({"error": "Projet non trouvé"}), 404
 
-        df = pd.DataFrame(articles_to_export)
-        excel_buffer = io.BytesIO()
-        df.to_excel(excel_buffer, index=False, sheet_name='Articles Inclus')
-        excel_buffer.seek(0)
+    archive_path = thesis_export_path(project_id)
+    if request.method == 'GET':
+        if not archive_path.exists():
+            return jsonify({"error": "Aucun export de thèse généré : lancez-le par POST"}), 404
+        return send_file(archive_path, as_attachment=True, download_name=archive_path.name, mimetype='application/zip')
 
-        bibliography_text = format_bibliography(articles_to_export)   
-        
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
-            zf.writestr('export_articles.xlsx', excel_buffer.read())
-            zf.writestr('bibliographie.txt', "\n".join(bibliography_text).encode('utf-8'))            
-        zip_buffer.seek(0)
-        
-        return send_file(
-            zip_buffer,
-            as_attachment=True,
-            download_name=f'export_these_{project_id}.zip',
-            mimetype='application/zip'
-        )
-    except Exception as e:
-        logger.error(f"Erreur lors de l'export de la thèse: {e}")
-        return jsonify({"error": "Erreur lors de la génération de l'export"}), 500
+    job = import_queue.enqueue(export_thesis_task, project_id=project_id, job_timeout='30m')
+    return jsonify({
+        "message": "Génération de l'export de thèse lancée",
+        "job_id": job.id,
+        "download_url": f"/api/projects/{project_id}/export/thesis",
+    }), 202
 
 @projects_bp.route('/projects/<project_id>/upload-pdfs-bulk', methods=['POST'])
 def upload_pdfs_bulk(project_id):
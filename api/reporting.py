@@ -10,8 +10,10 @@ from utils.app_globals import import_queue
 from backend.tasks_v4_complete import (
     generate_bibliography_task,
     generate_summary_table_task,
-    export_excel_report_task
+    export_excel_report_task,
+    export_parquet_snapshot_task
 )
+from utils.exporters import EXPORT_FORMATS, PARQUET_AVAILABLE
 
 
 reporting_bp = Blueprint('reporting_bp', __name__)
@@ -47,13 +49,33 @@ def generate_summary_table(project_id):
 @reporting_bp.route('/projects/<project_id>/excel-export', methods=['POST'])
 def export_summary_table_excel(project_id):
     """
-    Exporte le tableau de synthèse du projet spécifié au format Excel.
-    Peut enfiler une tâche de fond si l'export est complexe.
+    Exporte les données du projet spécifié au format Excel (par défaut), CSV (archive ZIP) ou Parquet.
+    L'export est écrit en streaming par une tâche de fond.
     """
     project = db.session.query(Project).filter_by(id=project_id).first()
     if not project:
         return jsonify({"error": "Projet non trouvé"}), 404
 
-    # Enfiler une tâche de fond pour l'export Excel
-    job = import_queue.enqueue(export_excel_report_task, project_id=project_id, job_timeout='10m')
-    return jsonify({"message": "Export Excel lancé", "job_id": job.id}), 202
+    export_format = (request.get_json(silent=True) or {}).get('format') or request.args.get('format', 'xlsx')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"error": f"Format non supporté: {export_format}", "allowed_formats": list(EXPORT_FORMATS)}), 400
+
+    # Enfiler une tâche de fond pour l'export
+    job = import_queue.enqueue(export_excel_report_task, project_id=project_id, export_format=export_format, job_timeout='30m')
+    return jsonify({"message": f"Export {export_format} lancé", "job_id": job.id}), 202
+
+
+@reporting_bp.route('/projects/<project_id>/export/parquet', methods=['POST'])
+def export_parquet_snapshot(project_id):
+    """
+    Lance l'écriture d'un instantané Parquet typé du projet (résultats, extractions, risque de biais,
+    journal de traitement), destiné aux analyses hors ligne (pandas, DuckDB, R arrow).
+    """
+    project = db.session.query(Project).filter_by(id=project_id).first()
+    if not project:
+        return jsonify({"error": "Projet non trouvé"}), 404
+    if not PARQUET_AVAILABLE:
+        return jsonify({"error": "Export Parquet indisponible (pyarrow non installé)"}), 501
+
+    job = import_queue.enqueue(export_parquet_snapshot_task, project_id=project_id, job_timeout='30m')
+    return jsonify({"message": "Instantané Parquet lancé", "job_id": job.id}), 202
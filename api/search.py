@@ -9,6 +9,7 @@ from utils.extensions import db
 from flask import Blueprint, jsonify, request
 from utils.app_globals import import_queue 
 from backend.tasks_v4_complete import multi_database_search_task
+from utils.project_stats import get_project_stats
 
 logger = logging.getLogger(__name__)
 search_bp = Blueprint('search_api', __name__)
@@ -70,15 +71,12 @@ def get_project_search_stats(project_id):
     except ValueError:
         return jsonify({'error': 'ID de projet invalide'}), 400
 
-    stats = db.session.execute(text("""
-        SELECT database_source, COUNT(*) as count
-        FROM search_results WHERE project_id = :pid
-        GROUP BY database_source
-    """), {"pid": project_id}).mappings().all()
-    
-    total = sum(r['count'] for r in stats)
-    
+    stats = get_project_stats(project_id)
+    if stats is None:
+        return jsonify({'error': 'Projet non trouvé'}), 404
+
     return jsonify({
-        "total_results": total,
-        "results_by_database": {r["database_source"]: r["count"] for r in stats}
+        "total_results": stats["total_results"],
+        "unique_results": stats["unique_results"],
+        "results_by_database": stats["results_by_source"]
     })
\ No newline at end of file
@@ -69,6 +69,11 @@ class Settings(BaseSettings):
     REQUEST_TIMEOUT: int = 900
     HTTP_MAX_RETRIES: int = 3
 
+    # --- Téléchargement des PDFs ---
+    PDF_MAX_SIZE_MB: int = 100
+    PDF_DOWNLOAD_CHUNK_SIZE: int = 64 * 1024
+    PDF_RESUME_MIN_SIZE_MB: int = 5
+
     # --- Paramètres de recherche ---
     # ✅ AJOUT: Paramètres pour la pagination PubMed
     MAX_PUBMED_RESULTS: int = 1000
@@ -76,7 +81,40 @@ class Settings(BaseSettings):
 
     # --- Paramètres de la base de données ---
     DB_SCHEMA: str = "analylit_schema"
+    # Taille des lots envoyés par COPY lors des imports en masse
+    BULK_LOAD_BATCH_SIZE: int = 5000
+    # Intervalle (s) entre deux reports des compteurs de progression Redis vers projects
+    PROGRESS_FLUSH_INTERVAL: int = 5
     
+    # --- Notifications ---
+    # Fenêtre de fusion (s) par type de notification de progression ; les autres types partent immédiatement
+    NOTIFICATION_RATE_LIMITS: Dict[str, float] = {
+        'article_processed': 0.5, 'task_progress': 0.5, 'import_progress': 0.5, 'search_progress': 0.5,
+    }
+    # Longueur (approximative, MAXLEN ~) du journal des notifications de chaque projet
+    NOTIFICATION_STREAM_MAXLEN: int = 1000
+
+    # --- RAG (indexation des PDFs et chat) ---
+    RAG_EMBEDDING_MODEL: str = 'sentence-transformers/all-MiniLM-L6-v2'
+    # Taille des segments en tokens du modèle d'embedding (256 - [CLS]/[SEP] pour MiniLM)
+    RAG_CHUNK_TOKENS: int = 254
+    RAG_MIN_CHUNK_TOKENS: int = 32
+    RAG_EMBED_BATCH: int = 32
+    # Segments encodés puis insérés par lot, et processus d'extraction des PDFs
+    RAG_INDEX_BATCH: int = 256
+    RAG_EXTRACT_WORKERS: int = 2
+    # Chat : candidats par recherche (vectorielle et BM25), passages retenus après fusion RRF
+    RAG_CANDIDATES: int = 20
+    RAG_TOP_K: int = 3
+    RAG_RRF_K: int = 60
+    # Cache sémantique des réponses : similarité cosinus minimale entre questions, entrées par projet
+    CHAT_ANSWER_CACHE_ENABLED: bool = True
+    CHAT_ANSWER_CACHE_THRESHOLD: float = 0.95
+    CHAT_ANSWER_CACHE_MAX_ENTRIES: int = 500
+    # Cache des embeddings partagé entre projets (défaut : PROJECTS_DIR/.cache/embeddings.sqlite3)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_PATH: Optional[Path] = None
+
     # --- Configuration des Modèles IA ---
     # Chargé depuis profiles.json via la fonction `load_default_models`
     DEFAULT_MODELS: Dict[str, Any] = load_default_models()
@@ -19,7 +19,7 @@ if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
 # --- IMPORT DES DÉPENDANCES EXTERNES ---
-from flask import Flask, jsonify, send_from_directory
+from flask import Flask, jsonify, request, send_from_directory
 from flask_cors import CORS
 from flask_socketio import SocketIO
 
@@ -89,6 +89,9 @@ def create_app(config_override=None):
         from api.settings import settings_bp
         from api.stakeholders import stakeholders_bp
         from api.tasks import tasks_bp
+        from utils.extraction_stream import (
+            extractions_stream_response, DEFAULT_EXTRACTION_FIELDS, EXTRACTION_STREAM_FIELDS
+        )
         
         # Enregistrement
         app.register_blueprint(admin_bp, url_prefix='/api')
@@ -167,24 +170,13 @@ def create_app(config_override=None):
 
     @app.route('/api/projects/<project_id>/extractions', methods=['GET'])
     def get_project_extractions(project_id):
-        """Retourne les extractions d'un projet avec l'abstract de l'article associé."""
+        """Retourne les extractions d'un projet avec l'abstract de l'article associé (diffusées en flux)."""
         try:
-            results = db.session.query(
-                Extraction, 
-                SearchResult.abstract, 
-                SearchResult.title
-            ).outerjoin(
-                SearchResult, 
-                (Extraction.pmid == SearchResult.article_id) & (Extraction.project_id == SearchResult.project_id)
-            ).filter(Extraction.project_id == project_id).all()
-
-            combined_results = []
-            for extraction, abstract, title in results:
-                extraction_dict = extraction.to_dict()
-                extraction_dict['abstract'] = abstract or "Abstract non disponible."
-                extraction_dict['title'] = title or extraction.title
-                combined_results.append(extraction_dict)
-            return jsonify(combined_results)
+            return extractions_stream_response(
+                project_id, request, default_fields=DEFAULT_EXTRACTION_FIELDS + ('abstract',), title_from_results=True
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e), "allowed_fields": sorted(EXTRACTION_STREAM_FIELDS)}), 400
         except Exception as e:
             logger.error(f"Error fetching extractions for project {project_id}: {e}", exc_info=True)
             return jsonify({"error": "Failed to fetch extractions"}), 500
@@ -13,11 +13,13 @@ import math
 import logging
 import random
 import re
+import shutil
 import traceback
+import zipfile
 from datetime import datetime
 from functools import wraps
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from rq.decorators import job
 from utils.app_globals import PROJECTS_DIR
 import numpy as np
@@ -42,7 +44,7 @@ from utils.app_globals import import_queue, screening_queue, extraction_queue, a
 # --- IMPORTS DES MODULES LOCAUX DE L'APPLICATION ---
 # Modèles de base de données
 from utils.models import (
-    Project, SearchResult, Extraction, Grid, ChatMessage, AnalysisProfile, RiskOfBias, SCHEMA
+    Project, SearchResult, Extraction, Grid, ChatMessage, AnalysisProfile, RiskOfBias, ProjectStats, SCHEMA
 )
 # Moteur de scoring
 from backend.atn_scoring_engine_v21 import ATNScoringEngineV22
@@ -50,11 +52,29 @@ from backend.atn_scoring_engine_v21 import ATNScoringEngineV22
 from utils.zotero_parser import parse_zotero_rdf
 from utils.fetchers import db_manager, fetch_unpaywall_pdf_url, fetch_article_details
 from utils.ai_processors import call_ollama_api
-from utils.file_handlers import sanitize_filename, extract_text_from_pdf
+from utils.file_handlers import sanitize_filename, extract_text_from_pdf, extract_pages_from_pdf
 from utils.analysis import generate_discussion_draft
-from utils.notifications import send_project_notification
-from utils.helpers import http_get_with_retries
-from utils.importers import ZoteroAbstractExtractor, process_zotero_item_list
+from utils.notifications import send_project_notification, flush_pending_notifications
+from utils.downloads import download_pdf
+from utils.deduplication import find_duplicates
+from utils.bulk_loader import bulk_upsert
+from utils.cache import invalidate_search_results_count
+from utils.progress import record_article_processed, start_progress_run
+from utils.project_stats import refresh_project_stats, SEARCH_RESULTS, EXTRACTIONS, PDFS
+from utils.exporters import (
+    open_export_writer, export_project_report, stream_rows, extracted_data_fields, flatten_extraction,
+    ExcelStreamWriter, CsvZipStreamWriter, SEARCH_RESULT_COLUMNS, EXTRACTION_COLUMNS, export_project_snapshot,
+)
+from utils.helpers import format_bibliography
+from utils.vector_store import get_project_collection, project_store_writer
+from utils.embedding_cache import encode_texts
+from utils.hybrid_search import get_lexical_index, hybrid_retrieve
+from utils.answer_cache import PendingAnswer, lookup_answer
+from utils.rag_index import (
+    indexed_files, plan_incremental_index, iter_extracted_files, iter_chunk_batches,
+    EMBED_BATCH, INDEX_BATCH, EXTRACT_WORKERS, config as rag_config
+)
+from utils.importers import ZoteroAbstractExtractor, process_zotero_item_list, ZOTERO_IMPORT_BATCH_SIZE
 # Templates de prompts
 from utils.prompt_templates import (
     get_screening_prompt_template,
@@ -68,6 +88,19 @@ from utils.prompt_templates import (
 # Le logger est déjà configuré par la factory de l'application, on le récupère simplement.
 logger = logging.getLogger(__name__)
 
+# Modèle d'embedding du RAG, chargé à la première utilisation (pas à l'import par l'API)
+embedding_model = None
+
+
+def _get_embedding_model():
+    global embedding_model
+    if embedding_model is None:
+        try:
+            embedding_model = SentenceTransformer(rag_config.RAG_EMBEDDING_MODEL)
+        except Exception as e:
+            logger.warning(f"⚠️ Modèle d'embedding {rag_config.RAG_EMBEDDING_MODEL} non chargé: {e}")
+    return embedding_model
+
 try:
     from backend.atn_scoring_engine_v21 import ATNScoringEngineV22
     ATN_SCORING_AVAILABLE = True
@@ -101,6 +134,9 @@ def with_db_session(func):
                 logger.error(f"Erreur dans la tâche {func.__name__}: {e}", exc_info=True)
                 db.session.rollback()
                 raise  # Propage l'erreur pour que RQ marque la tâche comme échouée
+            finally:
+                # La progression retenue part avant que le work-horse ne s'arrête
+                flush_pending_notifications()
     return wrapper
 
 # ================================================================ 
@@ -160,14 +196,51 @@ def log_processing_status(project_id: str, article_id: str, status: str, details
     })
 
 
-def increment_processed_count(project_id: str):
-    """Incrémente processed_count du projet."""
-    db.session.execute(text("UPDATE projects SET processed_count = processed_count + 1 WHERE id = :id"), {"id": project_id})
+def increment_processed_count(project_id: str, duration: float = None, error: bool = False, run_id: str = None):
+    """
+    Comptabilise un article traité (et sa durée) dans les compteurs Redis de son run
+    (`run_id` renvoyé par start_progress_run à la mise en file, sinon le run courant).
+    processed_count / total_processing_time sont reportés en base périodiquement (utils.progress),
+    et les statistiques de criblage de project_stats au même rythme, dans leur propre transaction.
+    À appeler une fois le travail de l'article commité : le dernier article d'un run n'est compté
+    qu'après ceux de tous les workers, le rafraîchissement final voit donc toutes les extractions.
+    """
+    if not record_article_processed(project_id, duration=duration, error=error, run_id=run_id):
+        return
+    try:
+        with db.engine.begin() as conn:
+            refresh_project_stats(project_id, [EXTRACTIONS], bind=conn)
+    except SQLAlchemyError as e:
+        # Recalculées au prochain report ; l'article lui-même est déjà enregistré
+        logger.warning(f"Rafraîchissement de project_stats échoué pour {project_id}: {e}")
 
 
-def update_project_timing(project_id: str, duration: float):
-    """Ajoute une durée au total_processing_time."""
-    session.execute(text("UPDATE projects SET total_processing_time = total_processing_time + :d WHERE id = :id"), {"d": float(duration), "id": project_id})
+def mark_duplicate_results(project_id: str) -> dict:
+    """
+    Détecte les doublons inter-sources du projet (DOI/PMID/arXiv normalisés, titres quasi
+    identiques) et renseigne search_results.duplicate_of. À appeler après chaque recherche
+    ou import, avant la mise en file du criblage.
+    """
+    rows = db.session.execute(text("""
+        SELECT sr.article_id, sr.title, sr.doi, sr.database_source,
+               LENGTH(COALESCE(sr.abstract, '')) AS abstract_length,
+               EXISTS (SELECT 1 FROM extractions e WHERE e.project_id = sr.project_id AND e.pmid = sr.article_id) AS screened
+        FROM search_results sr
+        WHERE sr.project_id = :pid
+    """), {"pid": project_id}).mappings().all()
+    duplicates = find_duplicates([dict(row) for row in rows])
+
+    db.session.execute(text("UPDATE search_results SET duplicate_of = NULL WHERE project_id = :pid AND duplicate_of IS NOT NULL"), {"pid": project_id})
+    if duplicates:
+        db.session.execute(
+            text("UPDATE search_results SET duplicate_of = :canonical WHERE project_id = :pid AND article_id = :aid"),
+            [{"pid": project_id, "aid": aid, "canonical": canonical} for aid, canonical in duplicates.items()]
+        )
+    refresh_project_stats(project_id, [SEARCH_RESULTS])
+    db.session.commit()
+    # Tous les chemins d'import passent par ici après avoir écrit dans search_results
+    invalidate_search_results_count(project_id)
+    return {"total": len(rows), "duplicates": len(duplicates), "unique": len(rows) - len(duplicates), "duplicate_ids": set(duplicates)}
 
 # ================================================================ 
 # === Tâches RQ (100% SQLAlchemy)
@@ -272,6 +345,7 @@ def multi_database_search_task(project_id: str, query: str, databases: list, max
 
     all_records_to_insert = []
     failed_databases = []
+    n_duplicates = 0
     for db_name in databases:
         current_query = None  # Initialiser à None
         results = []
@@ -342,12 +416,12 @@ def multi_database_search_task(project_id: str, query: str, databases: list, max
 
             for r in results:
                 all_records_to_insert.append({
-                    "id": str(uuid.uuid4()), "pid": project_id, "aid": r.get('id'),
+                    "id": str(uuid.uuid4()), "project_id": project_id, "article_id": r.get('id'),
                     "title": r.get('title', ''), "abstract": r.get('abstract', ''),
-                    "authors": r.get('authors', ''), "pub_date": r.get('publication_date', ''),
+                    "authors": r.get('authors', ''), "publication_date": r.get('publication_date', ''),
                     "journal": r.get('journal', ''), "doi": r.get('doi', ''),
-                    "url": r.get('url', ''), "src": r.get('database_source', 'unknown'),
-                    "ts": datetime.now().isoformat()
+                    "url": r.get('url', ''), "database_source": r.get('database_source', 'unknown'),
+                    "created_at": datetime.now()
                 })
             total_found += len(results)
             send_project_notification(project_id, 'search_progress', f'Recherche terminée dans {db_name}: {len(results)} résultats', {'database': db_name, 'count': len(results)})
@@ -358,16 +432,16 @@ def multi_database_search_task(project_id: str, query: str, databases: list, max
             failed_databases.append(db_name)
 
     if all_records_to_insert:
-        db.session.execute(text("""
-            INSERT INTO search_results (id, project_id, article_id, title, abstract, authors, publication_date, journal, doi, url, database_source, created_at)
-            VALUES (:id, :pid, :aid, :title, :abstract, :authors, :pub_date, :journal, :doi, :url, :src, :ts) 
-            ON CONFLICT (project_id, article_id) DO NOTHING
+        bulk_upsert(db.session, 'search_results', all_records_to_insert, conflict_columns=['project_id', 'article_id'])
+        db.session.commit() # Commit the transaction
 
-        """), all_records_to_insert)
-        session.commit() # Commit the transaction
+        # Les doublons inter-sources sont marqués avant toute mise en file du criblage
+        dedup = mark_duplicate_results(project_id)
+        n_duplicates = dedup['duplicates']
+        records_to_screen = [r for r in all_records_to_insert if r['article_id'] not in dedup['duplicate_ids']]
 
         # Enqueue screening tasks
-        logger.info(f"🚀 Enqueuing {len(all_records_to_insert)} screening tasks...")
+        logger.info(f"🚀 Enqueuing {len(records_to_screen)} screening tasks ({n_duplicates} doublons ignorés)...")
 
         # Récupérer le projet et le profil associé pour obtenir les modèles
         project = db.session.get(Project, project_id)
@@ -388,13 +462,15 @@ def multi_database_search_task(project_id: str, query: str, databases: list, max
 
         # Trim leading/trailing whitespace from profile_name
         profile_name = profile_name.strip()
-        for record in all_records_to_insert:
+        run_id = start_progress_run(project_id, len(records_to_screen))
+        for record in records_to_screen:
             analysis_queue.enqueue(
                 'backend.tasks_v4_complete.process_single_article_task',
                 project_id=project_id,
-                article_id=record['aid'],
+                article_id=record['article_id'],
                 profile=profile_dict,
                 analysis_mode='screening',
+                run_id=run_id,
                 job_timeout=600
             )
         logger.info("✅ Screening tasks enqueued.")
@@ -405,11 +481,13 @@ def multi_database_search_task(project_id: str, query: str, databases: list, max
     db.session.commit() # Commit the status update
     # Amélioration de la notification finale
     final_message = f'Recherche terminée: {total_found} articles trouvés.'
+    if n_duplicates:
+        final_message += f" {n_duplicates} doublons inter-sources écartés."
 
     if failed_databases:
         final_message += f" Échec pour: {', '.join(failed_databases)}."
 
-    send_project_notification(project_id, 'search_completed', final_message, {'total_results': total_found, 'databases': databases, 'failed': failed_databases})
+    send_project_notification(project_id, 'search_completed', final_message, {'total_results': total_found, 'duplicates': n_duplicates, 'databases': databases, 'failed': failed_databases})
     logger.info(f"âœ… Recherche multi-bases: total {total_found}")
 
 def calculate_atn_score_for_article(article_data: dict) -> dict:
@@ -500,7 +578,7 @@ def get_pdf_text(article_data, project_id):
     return None
 
 @job('analysis_queue', timeout='1h')
-def process_single_article_task(project_id, article, profile, analysis_mode, job_id=None):
+def process_single_article_task(project_id, article, profile, analysis_mode, job_id=None, run_id=None):
     # =========================================================================
     # BLINDAGE DÉFENSIF CONTRE LES TÂCHES CORROMPUES
     # =========================================================================
@@ -591,7 +669,8 @@ def process_single_article_task(project_id, article, profile, analysis_mode, job
         # Vérification contenu minimal
         if len(text_for_analysis.strip()) < 50:     
             log_processing_status(project_id, article_id, "écarté", "Contenu textuel insuffisant.")
-            increment_processed_count(session, project_id)
+            db.session.commit()
+            increment_processed_count(project_id, run_id=run_id)
             logger.warning(f"[process_single_article_task] Contenu insuffisant pour {article_id}")
             return {"status": "skipped", "reason": "insufficient_content"}
 
@@ -821,8 +900,8 @@ TEXTE DE L'ARTICLE:
         # ✅ FINALISATION ET NOTIFICATIONS
         # ======================================================================
         
-        increment_processed_count(session, project_id)
-        update_project_timing(project_id, time.time() - start_time)
+        db.session.commit()  # l'extraction est visible des autres workers avant d'être comptée
+        increment_processed_count(project_id, duration=time.time() - start_time, run_id=run_id)
 
         send_project_notification(
             project_id, 
@@ -837,9 +916,12 @@ TEXTE DE L'ARTICLE:
 
     except Exception as e:
         logger.exception(f"ERREUR CRITIQUE dans process_single_article_task pour {article_id}: {e}")
-        increment_processed_count(session, project_id)
+        increment_processed_count(project_id, duration=time.time() - start_time, error=True, run_id=run_id)
         log_processing_status(project_id, article_id, "erreur", f"Erreur fatale: {str(e)[:100]}")
         raise
+    finally:
+        # Tâche sans with_db_session : la progression retenue est publiée ici avant la fin du work-horse
+        flush_pending_notifications()
 
 def import_from_zotero_rdf_task(project_id, rdf_file_path, zotero_storage_path):
     """
@@ -859,38 +941,28 @@ def import_from_zotero_rdf_task(project_id, rdf_file_path, zotero_storage_path):
 
             logger.info(f"{len(articles)} articles parsés depuis le RDF.")
 
-            # Étape 2: Ajouter les articles à la base de données
-            new_articles_count = 0
-            for article_data in articles:
-                # ✅ CORRECTION SQLAlchemy 2.0 - SYNTAXE MODERNE
-                existing_article = db.session.scalar(
-                    select(SearchResult).where(
-                        SearchResult.project_id == project_id,
-                        SearchResult.article_id == article_data['pmid']  # ✅ article_id existe
-                    )
-                )
-
-                if not existing_article:
-                    # Mapping correct des champs article_data → SearchResult
-                    article_data_mapped = {
-                        'article_id': article_data.get('pmid', ''),          # ✅ pmid → article_id
-                        'title': article_data.get('title', ''),
-                        'abstract': article_data.get('abstract', ''), 
-                        'authors': article_data.get('authors', ''),
-                        'publication_date': str(article_data.get('year', '')),
-                        'journal': article_data.get('journal', ''),
-                        'doi': article_data.get('doi', ''),
-                        'url': article_data.get('url', ''),
-                        'database_source': article_data.get('database_source', 'zotero'),
-                        'query': article_data.get('query', 'ATN Import')
-                    }
-
-                    new_article = SearchResult(project_id=project_id, **article_data_mapped)
-                    db.session.add(new_article)
-                    new_articles_count += 1
+            # Étape 2: Ajouter les articles à la base de données (les articles existants sont ignorés)
+            records_to_insert = [{
+                'id': str(uuid.uuid4()),
+                'project_id': project_id,
+                'article_id': article_data.get('pmid', ''),          # ✅ pmid → article_id
+                'title': article_data.get('title', ''),
+                'abstract': article_data.get('abstract', ''),
+                'authors': article_data.get('authors', ''),
+                'publication_date': str(article_data.get('year', '')),
+                'journal': article_data.get('journal', ''),
+                'doi': article_data.get('doi', ''),
+                'url': article_data.get('url', ''),
+                'database_source': article_data.get('database_source', 'zotero'),
+                'query': article_data.get('query', 'ATN Import'),
+                'created_at': datetime.now()
+            } for article_data in articles]
+            new_articles_count = bulk_upsert(db.session, 'search_results', records_to_insert, conflict_columns=['project_id', 'article_id'])
 
             db.session.commit()
             logger.info(f"{new_articles_count} nouveaux articles ajoutés à la base de données.")
+            if new_articles_count:
+                mark_duplicate_results(project_id)
 
             return {"status": "success", "articles_added": new_articles_count}
 
@@ -994,19 +1066,30 @@ Titres:
         update_project_status(project_id, status='failed')
         send_project_notification(project_id, 'analysis_failed', 'La génération du graphe de connaissances a échoué.', {'analysis_type': 'knowledge_graph'})
 
+@with_db_session
+def run_deduplication_task(project_id: str):
+    """Relance la détection des doublons inter-sources sur tout le projet."""
+    stats = mark_duplicate_results(project_id)
+    stats.pop('duplicate_ids')
+    send_project_notification(project_id, 'analysis_completed', f"Déduplication terminée: {stats['duplicates']} doublons sur {stats['total']} articles.", {'analysis_type': 'deduplication', **stats})
+    return stats
+
 @with_db_session
 def run_prisma_flow_task(project_id: str):
     """Génère un diagramme PRISMA simplifié et stocke l'image sur disque."""
     update_project_status(session, project_id, status='generating_prisma')
     
-    total_found = session.execute(text("SELECT COUNT(*) FROM search_results WHERE project_id = :pid"), {"pid": project_id}).scalar_one()   
-    n_included = session.execute(text("SELECT COUNT(*) FROM extractions WHERE project_id = :pid"), {"pid": project_id}).scalar_one()   
+    # Une passe d'agrégation par table, conservée dans project_stats pour les tableaux de bord
+    refresh_project_stats(project_id, [SEARCH_RESULTS, EXTRACTIONS])
+    stats = db.session.get(ProjectStats, project_id)
+    db.session.refresh(stats)
+    total_found, n_after_duplicates, n_included = stats.total_results, stats.unique_results, stats.screened_count
     
     if total_found == 0:
         update_project_status(session, project_id, status='completed')
         return
     
-    n_after_duplicates, n_excluded_screening = total_found, total_found - n_included
+    n_excluded_screening = n_after_duplicates - n_included
         
     fig, ax = plt.subplots(figsize=(12, 16), dpi=300)
     plt.style.use('seaborn-v0_8-whitegrid')
@@ -1072,16 +1155,18 @@ def run_descriptive_stats_task(project_id: str):
     logger.info(f"ðŸ“Š Statistiques descriptives pour projet {project_id}")
     update_project_status(session, project_id, 'generating_analysis')
     
-    rows = session.execute(text("SELECT relevance_score FROM extractions WHERE project_id = :pid AND relevance_score IS NOT NULL"), {"pid": project_id}).mappings().all()
-    if not rows:
+    refresh_project_stats(project_id, [EXTRACTIONS])
+    stats = db.session.get(ProjectStats, project_id)
+    db.session.refresh(stats)
+    if not stats.score_count:
         update_project_status(session, project_id, status='failed')
         return
     
-    scores = [r['relevance_score'] for r in rows]
+    scores = stats.to_dict()['scores']
     stats_result = {
-        'total_extractions': len(scores), 'mean_score': float(np.mean(scores)),
-        'median_score': float(np.median(scores)), 'std_dev': float(np.std(scores)),
-        'min_score': float(np.min(scores)), 'max_score': float(np.max(scores))
+        'total_extractions': scores['count'], 'mean_score': float(scores['mean']),
+        'median_score': float(scores['median']), 'std_dev': float(scores['std_dev']),
+        'min_score': float(scores['min']), 'max_score': float(scores['max'])
     }
     
     update_project_status(project_id, status='completed', analysis_result=stats_result)
@@ -1092,23 +1177,50 @@ def run_descriptive_stats_task(project_id: str):
 # === CHAT RAG
 # ================================================================ 
 
-@with_db_session
-def answer_chat_question_task(project_id: str, question: str):
-    """Répond à une question via RAG sur les PDFs indexés."""
-    logger.info(f"ðŸ’¬ Question chat pour projet {project_id}")
-    
-    if embedding_model is None:
-        response = "Modèle d'embedding non disponible"
-    else:
-        try:
-            client = chromadb.Client()
-            collection = client.get_collection(name=f"project_{project_id}")
-            query_embedding = embedding_model.encode([question]).tolist()
-            results = collection.query(query_embeddings=query_embedding, n_results=3)
-            
-            if results['documents'] and results['documents'][0]:
-                context = "\n---\n".join(results['documents'][0])
-                prompt = f"""En te basant sur ces extraits de documents, réponds à la question:
+CHAT_LLM_MODEL = "llama3.1:8b"
+
+
+def _format_rag_passage(document: str, metadata: Optional[dict]) -> str:
+    """Passage de contexte précédé de sa source (fichier, section, pages) pour permettre les citations."""
+    metadata = metadata or {}
+    if not metadata.get('filename'):
+        return document
+    pages = metadata.get('page_start')
+    if pages and metadata.get('page_end') and metadata['page_end'] != pages:
+        pages = f"{pages}-{metadata['page_end']}"
+    source = ", ".join(part for part in (metadata['filename'], metadata.get('section'), f"p. {pages}" if pages else None) if part)
+    return f"[{source}]\n{document}"
+
+
+def prepare_chat_prompt(project_id: str, question: str) -> Tuple[Optional[str], Optional[str], Optional[PendingAnswer]]:
+    """
+    Recherche des passages (hybride BM25 + vecteurs) et construction du prompt du chat.
+    Retourne (prompt, None, emplacement du cache de réponses à remplir), ou (None, réponse, None)
+    pour une réponse sans appel au LLM : question quasi identique déjà traitée depuis la
+    dernière indexation, ou repli si aucun passage n'est exploitable.
+    """
+    model = _get_embedding_model()
+    if model is None:
+        return None, "Modèle d'embedding non disponible", None
+    pending = None
+    try:
+        collection = get_project_collection(project_id)
+        documents, metadatas = [], []
+        if collection is not None:
+            # Embedding de la question mis en cache : une question reposée n'est pas réencodée
+            query_embedding = encode_texts(model, [question], rag_config.RAG_EMBEDDING_MODEL).tolist()
+            cached_answer, pending = lookup_answer(project_id, question, query_embedding[0])
+            if cached_answer is not None:
+                return None, cached_answer, None
+            documents, metadatas = hybrid_retrieve(collection, get_lexical_index(project_id), question, query_embedding)
+    except Exception as e:
+        logger.error(f"Erreur de recherche RAG pour le projet {project_id}: {e}", exc_info=True)
+        return None, "Erreur lors de la recherche dans la base de connaissances.", None
+
+    if not documents:
+        return None, "Aucun document indexé trouvé pour répondre à cette question.", None
+    context = "\n---\n".join(_format_rag_passage(d, m) for d, m in zip(documents, metadatas))
+    prompt = f"""En te basant sur ces extraits de documents, réponds à la question:
 
 Question: {question}
 
@@ -1116,13 +1228,30 @@ Contexte:
 {context}
 
 Réponds de façon concise et précise."""
-                response = call_ollama_api(prompt, "llama3.1:8b")
-            else:
-                response = "Aucun document indexé trouvé pour répondre à cette question."
+    return prompt, None, pending
+
+
+def save_chat_exchange(project_id: str, question: str, response: str):
+    """Enregistre la question et la réponse dans chat_messages (le commit reste à l'appelant)."""
+    db.session.execute(text("INSERT INTO chat_messages (id, project_id, role, content, timestamp) VALUES (:id1, :pid, 'user', :q, :ts1), (:id2, :pid, 'assistant', :a, :ts2)"), {"id1": str(uuid.uuid4()), "pid": project_id, "q": question, "ts1": datetime.now().isoformat(), "id2": str(uuid.uuid4()), "a": response, "ts2": datetime.now().isoformat()})
+
+
+@with_db_session
+def answer_chat_question_task(project_id: str, question: str):
+    """Répond à une question via RAG sur les PDFs indexés."""
+    logger.info(f"ðŸ’¬ Question chat pour projet {project_id}")
+    
+    prompt, response, pending = prepare_chat_prompt(project_id, question)
+    if prompt is not None:
+        try:
+            response = call_ollama_api(prompt, CHAT_LLM_MODEL)
+            # Une réponse vide n'est pas mise en cache : elle serait resservie aux questions voisines
+            if pending is not None and response and response.strip():
+                pending.fill(response)
         except Exception:
             response = "Erreur lors de la recherche dans la base de connaissances."
     
-    db.session.execute(text("INSERT INTO chat_messages (id, project_id, role, content, timestamp) VALUES (:id1, :pid, 'user', :q, :ts1), (:id2, :pid, 'assistant', :a, :ts2)"), {"id1": str(uuid.uuid4()), "pid": project_id, "q": question, "ts1": datetime.now().isoformat(), "id2": str(uuid.uuid4()), "a": response, "ts2": datetime.now().isoformat()})
+    save_chat_exchange(project_id, question, response)
     return response
 
 # ================================================================ 
@@ -1130,39 +1259,57 @@ Réponds de façon concise et précise."""
 # ================================================================ 
 
 @with_db_session
-def import_from_zotero_file_task(project_id: str, json_file_path: str):  
-    """Importe les articles depuis un fichier JSON Zotero en utilisant le parseur robuste."""
+def import_from_zotero_file_task(project_id: str, json_file_path: str, batch_size: int = ZOTERO_IMPORT_BATCH_SIZE):  
+    """
+    Importe les articles depuis un fichier JSON Zotero en streaming.
+    Les items sont lus, dédupliqués et insérés par lots de taille fixe : la mémoire
+    reste stable même pour des bibliothèques de groupe de plusieurs dizaines de milliers d'items.
+    """
     logger.info(f"ðŸ“š Import Zotero depuis {json_file_path} pour projet {project_id}")
     extractor = ZoteroAbstractExtractor(json_file_path)
-    records = extractor.process()
-    
-    if not records:
+    count_stmt = text("SELECT COUNT(*) FROM search_results WHERE project_id = :pid")
+    count_before = db.session.execute(count_stmt, {"pid": project_id}).scalar_one()
+
+    processed = 0
+    for batch_number, records in enumerate(extractor.iter_record_batches(batch_size), start=1):
+        records_to_insert = []
+        for record in records:
+            if record.get('article_id'):
+                records_to_insert.append({
+                    "id": str(uuid.uuid4()), "project_id": project_id, "article_id": record['article_id'],
+                    "title": record.get('title', 'Sans titre'), "abstract": record.get('abstract', ''),
+                    "authors": record.get('authors', ''), "publication_date": record.get('publication_date', ''),
+                    "journal": record.get('journal', ''), "doi": record.get('doi', ''),
+                    "url": record.get('url', ''), "database_source": record.get('database_source', 'zotero'),
+                    "created_at": datetime.now()
+                })
+
+        if records_to_insert:
+            bulk_upsert(db.session, 'search_results', records_to_insert, conflict_columns=['project_id', 'article_id'])
+            # Commit par lot : un échec tardif ne fait pas perdre les lots déjà importés
+            db.session.commit()
+
+        processed += len(records)
+        send_project_notification(
+            project_id, 'import_progress',
+            f'Import Zotero: {processed} références traitées...',
+            {'processed': processed, 'read': extractor.stats['total'], 'batch': batch_number}
+        )
+
+    if processed == 0:
         send_project_notification(project_id, 'import_failed', 'Aucun article valide trouvé dans le fichier Zotero.')
         return
 
-    records_to_insert = []
-    for record in records:
-        if record.get('article_id'):
-            records_to_insert.append({
-                "id": str(uuid.uuid4()), "pid": project_id, "aid": record['article_id'],
-                "title": record.get('title', 'Sans titre'), "abstract": record.get('abstract', ''),
-                "authors": record.get('authors', ''), "pub_date": record.get('publication_date', ''),
-                "journal": record.get('journal', ''), "doi": record.get('doi', ''),
-                "url": record.get('url', ''), "src": record.get('database_source', 'zotero'),
-                "ts": datetime.now().isoformat()
-            })
-    
-    if records_to_insert:
-        db.session.execute(text("""
-            INSERT INTO search_results (id, project_id, article_id, title, abstract, authors, publication_date, journal, doi, url, database_source, created_at)
-            VALUES (:id, :pid, :aid, :title, :abstract, :authors, :pub_date, :journal, :doi, :url, :src, :ts)
-            ON CONFLICT (project_id, article_id) DO NOTHING
-        """), records_to_insert)
+    total_articles = db.session.execute(count_stmt, {"pid": project_id}).scalar_one()
+    db.session.execute(text("UPDATE projects SET pmids_count = :count WHERE id = :pid"), {"count": total_articles, "pid": project_id})
+    dedup = mark_duplicate_results(project_id)
 
-    total_articles = db.session.execute(text("SELECT COUNT(*) FROM search_results WHERE project_id = :pid"), {"pid": project_id}).scalar_one()
-    session.execute(text("UPDATE projects SET pmids_count = :count WHERE id = :pid"), {"count": total_articles, "pid": project_id})
-
-    send_project_notification(project_id, 'import_completed', f'Import Zotero terminé: {len(records_to_insert)} nouveaux articles ajoutés.')
+    added = total_articles - count_before
+    send_project_notification(
+        project_id, 'import_completed',
+        f'Import Zotero terminé: {added} nouveaux articles ajoutés.',
+        {'added': added, 'duplicates': extractor.stats['duplicates'], 'cross_source_duplicates': dedup['duplicates'], 'errors': extractor.stats['errors']}
+    )
     
     try:
         os.remove(json_file_path)
@@ -1202,6 +1349,9 @@ def import_pdfs_from_zotero_task(project_id: str, pmids: list, zotero_user_id: s
                 logger.warning(f"Erreur récupération PDF pour {pmid} via Zotero: {e}")
                 continue
 
+        if success_count:
+            refresh_project_stats(project_id, [PDFS])
+            db.session.commit()
         send_project_notification(project_id, 'import_completed', f'{success_count} PDF(s) importé(s) depuis Zotero.')
 
     except Exception as e:
@@ -1209,81 +1359,73 @@ def import_pdfs_from_zotero_task(project_id: str, pmids: list, zotero_user_id: s
         send_project_notification(project_id, 'import_failed', f'Erreur Zotero: {e}')
 
 @with_db_session
-def index_project_pdfs_task(project_id: str): # Ajout de 'session'
-    """Indexe les PDFs d'un projet pour le RAG."""
+def index_project_pdfs_task(project_id: str):
+    """
+    Indexe les PDFs d'un projet pour le RAG, de manière incrémentale : seuls les PDFs
+    nouveaux ou modifiés (empreinte du contenu) sont extraits et encodés, les segments
+    des PDFs modifiés ou supprimés sont retirés de la collection, puis les nouveaux
+    segments sont insérés par upsert.
+    Le traitement est en flux : la mémoire est bornée par la fenêtre d'extraction et la
+    taille d'un lot, pas par la taille du corpus.
+    """
     logger.info(f"ðŸ”  Indexation des PDFs pour projet {project_id}")
     try:
-        project_dir = PROJECTS_DIR / project_id
+        project_dir = Path(PROJECTS_DIR) / project_id
         if not project_dir.exists():
             send_project_notification(project_id, 'indexing_failed', 'Dossier projet introuvable.', {'task_name': 'indexation'})
             return
-        
-        pdf_files = list(project_dir.glob("*.pdf"))
-        if not pdf_files:
-            send_project_notification(project_id, 'indexing_completed', 'Aucun PDF à indexer.', {'task_name': 'indexation'})
-            return
-        
-        if embedding_model is None:
-            # CORRECTION: Mettre à jour le statut du projet en cas d'échec précoce
-            try:
-                session.execute(text("UPDATE projects SET status = 'failed' WHERE id = :pid"), {"pid": project_id})
-                session.commit()
-            except Exception as db_err:
-                logger.error(f"Impossible de mettre à jour le statut du projet {project_id} en 'failed': {db_err}")
-                session.rollback()
-            # FIN CORRECTION
+
+        pdf_files = sorted(project_dir.glob("*.pdf"))
+        model = _get_embedding_model()
+        if model is None:
+            db.session.execute(text("UPDATE projects SET status = 'failed' WHERE id = :pid"), {"pid": project_id})
             logger.warning("Modèle d'embedding non disponible")
             send_project_notification(project_id, 'indexing_failed', 'Modèle embedding non chargé.', {'task_name': 'indexation'})
             return
-        
-        client = chromadb.Client()
-        collection = client.get_or_create_collection(name=f"project_{project_id}")
-        
-        all_chunks = []
-        all_metadatas = []
-        all_ids = []
-        
-        total_pdfs = len(pdf_files)
-        for i, pdf_path in enumerate(pdf_files):
-            progress_message = f"Indexation PDF {i + 1} sur {total_pdfs}..."
-            send_project_notification(
-                project_id,
-                'task_progress',
-                progress_message,
-                {'current': i, 'total': total_pdfs, 'task_name': 'indexation'} # Progression de 0 à N-1
-            )
 
-            extracted_content = extract_text_from_pdf(str(pdf_path))
-            if extracted_content and len(extracted_content) > 100:
-                chunks = [extracted_content[i:i+CHUNK_SIZE] for i in range(0, len(extracted_content), CHUNK_SIZE-CHUNK_OVERLAP)]
-                for chunk_index, chunk in enumerate(chunks):
-                    if len(chunk) > MIN_CHUNK_LEN:
-                        all_chunks.append(chunk)
-                        all_ids.append(f"{sanitize_filename(pdf_path.stem)}_{chunk_index}")
-                        all_metadatas.append({"source_id": pdf_path.stem, "filename": pdf_path.name, "chunk": chunk_index})
-
-        if not all_chunks:
-            send_project_notification(project_id, 'indexing_completed', 'Aucun contenu textuel trouvé dans les PDFs.', {'task_name': 'indexation'})
-            return
+        indexed_chunks = 0
+        with project_store_writer(project_id) as collection:
+            lexical = get_lexical_index(project_id, create=True)
+            lexical.sync_from(collection)
+            plan = plan_incremental_index(pdf_files, indexed_files(collection))
+            if plan.obsolete_ids:
+                collection.delete(ids=plan.obsolete_ids)
+                lexical.delete(plan.obsolete_ids)
+            if plan.is_empty:
+                send_project_notification(project_id, 'indexing_completed', f'Index à jour ({plan.unchanged} PDF(s) inchangé(s)).', {'task_name': 'indexation'})
+                return
+
+            # Extraction (pool de processus) -> lots de INDEX_BATCH segments -> encodage -> upsert
+            total_pdfs = len(plan.to_index)
+            extracted = iter_extracted_files(plan.to_index, extract_pages_from_pdf, workers=EXTRACT_WORKERS)
+            for batch, files_done in iter_chunk_batches(extracted, INDEX_BATCH):
+                documents = [record.document for record in batch]
+                # Seuls les segments absents du cache partagé sont encodés
+                embeddings = encode_texts(model, documents, rag_config.RAG_EMBEDDING_MODEL, batch_size=EMBED_BATCH).tolist()
+                collection.upsert(
+                    documents=documents,
+                    embeddings=embeddings,
+                    ids=[record.id for record in batch],
+                    metadatas=[record.metadata for record in batch]
+                )
+                lexical.upsert([record.id for record in batch], documents)
+                indexed_chunks += sum(1 for document in documents if document)  # hors marqueurs de PDF vides
+                send_project_notification(
+                    project_id,
+                    'task_progress',
+                    f"Indexation : {files_done} PDF(s) sur {total_pdfs}, {indexed_chunks} segments...",
+                    {'current': files_done, 'total': total_pdfs, 'chunks': indexed_chunks, 'task_name': 'indexation'}
+                )
+
+        db.session.execute(text("UPDATE projects SET indexed_at = :ts WHERE id = :pid"), {"ts": datetime.now(), "pid": project_id})
 
-        # Étape d'encodage par lots (beaucoup plus rapide)
-        send_project_notification(project_id, 'task_progress', f'Encodage de {len(all_chunks)} segments de texte...', {'current': total_pdfs, 'total': total_pdfs + 1})
-        embeddings = embedding_model.encode(all_chunks, batch_size=EMBED_BATCH, show_progress_bar=False).tolist()
-
-        # Étape d'ajout à ChromaDB
-        send_project_notification(project_id, 'task_progress', 'Sauvegarde dans la base de connaissances...', {'current': total_pdfs + 1, 'total': total_pdfs + 1})
-        collection.add(
-            documents=all_chunks,
-            embeddings=embeddings,
-            ids=all_ids,
-            metadatas=all_metadatas
+        send_project_notification(
+            project_id, 'indexing_completed',
+            f'{total_pdfs} PDF(s) ont été traités et indexés ({plan.unchanged} inchangé(s), {plan.removed} retiré(s)).',
+            {'task_name': 'indexation', 'indexed': total_pdfs, 'unchanged': plan.unchanged,
+             'removed': plan.removed, 'chunks': indexed_chunks}
         )
-        
-        # Mettre à jour le projet (cette ligne peut maintenant appeler la fonction 'text' importée)
-        session.execute(text("UPDATE projects SET indexed_at = :ts WHERE id = :pid"), {"ts": datetime.now().isoformat(), "pid": project_id})
-        
-        send_project_notification(project_id, 'indexing_completed', f'{total_pdfs} PDF(s) ont été traités et indexés.', {'task_name': 'indexation'})
-    
+
     except Exception as e:
         logger.error(f"Erreur index_project_pdfs_task: {e}", exc_info=True)
         send_project_notification(project_id, 'indexing_failed', f'Erreur lors de l\'indexation: {e}', {'task_name': 'indexation'})
@@ -1315,15 +1457,11 @@ def fetch_online_pdf_task(project_id: str, article_id: str):
             pdf_url = fetch_unpaywall_pdf_url(article["doi"])
         
         if pdf_url:
-            response = http_get_with_retries(pdf_url, timeout=60)
-            if response and response.headers.get('content-type', '').startswith('application/pdf'):
-                project_dir = PROJECTS_DIR / project_id
-                project_dir.mkdir(exist_ok=True)
-                
-                pdf_path = project_dir / f"{sanitize_filename(article_id)}.pdf"
-                pdf_path.write_bytes(response.content)
-                
-                send_project_notification(project_id, 'pdf_upload_completed', f'PDF récupéré pour {article_id}')
+            pdf_path = Path(PROJECTS_DIR) / project_id / f"{sanitize_filename(article_id)}.pdf"
+            download = download_pdf(pdf_url, pdf_path, timeout=60)
+            if download:
+                refresh_project_stats(project_id, [PDFS])
+                send_project_notification(project_id, 'pdf_upload_completed', f'PDF récupéré pour {article_id}', {'size': download['size'], 'sha256': download['sha256']})
                 return
         
         send_project_notification(project_id, 'pdf_fetch_failed', f'PDF non trouvé pour {article_id}')
@@ -1368,7 +1506,7 @@ def calculate_kappa_task(project_id: str):
     eval1_decisions, eval2_decisions = [], []
     for r in rows:
         try:
-            v = json.loads(r["validations"])
+            v = r["validations"]
             if "evaluator1" in v and "evaluator2" in v:
                 eval1 = 1 if v["evaluator1"].lower() == "include" else 0
                 eval2 = 1 if v["evaluator2"].lower() == "include" else 0
@@ -1405,11 +1543,29 @@ def calculate_kappa_task(project_id: str):
 # === SCORES ATN
 # ================================================================ 
 
+# Champs de la grille ATN lus par l'analyse multipartie prenante
+ATN_STAKEHOLDER_FIELDS = (
+    "Score_empathie_IA", "Score_empathie_humain", "WAI-SR_modifié", "Taux_adhésion", "Confiance_algorithmique",
+    "Acceptabilité_patients", "Type_IA", "Plateforme", "Considération_éthique", "RGPD_conformité", "AI_Act_risque",
+)
+
+
+def jsonb_numeric_sql(column: str, key: str) -> str:
+    """
+    Expression SQL renvoyant la valeur numérique d'un champ JSONB ('75%' -> 75, '7,5' -> 7.5),
+    ou NULL si le champ est absent ou non numérique.
+    """
+    cleaned = f"replace(regexp_replace({column}->>'{key}', '[% ]', '', 'g'), ',', '.')"
+    return f"CASE WHEN {cleaned} ~ '^-?[0-9]+([.][0-9]+)?$' THEN ({cleaned})::float END"
+
+
 @with_db_session
 def run_atn_stakeholder_analysis_task(project_id: str):
     """Analyse multipartie prenante spécialisée pour l'ATN."""
     update_project_status(session, project_id, 'analyzing')
-    rows = session.execute(text("SELECT extracted_data, stakeholder_perspective, ai_type, platform_used FROM extractions WHERE project_id = :pid AND extracted_data IS NOT NULL"), {"pid": project_id}).mappings().all()
+    # Seuls les champs utiles sont extraits du JSONB, côté base
+    field_columns = ", ".join(f"extracted_data->'{field}' AS \"{field}\"" for field in ATN_STAKEHOLDER_FIELDS)
+    rows = session.execute(text(f"SELECT {field_columns} FROM extractions WHERE project_id = :pid AND extracted_data IS NOT NULL"), {"pid": project_id}).mappings().all()
     if not rows:
         update_project_status(session, project_id, 'failed')
         send_project_notification(project_id, 'analysis_failed', 'Aucune extraction disponible.')
@@ -1419,7 +1575,7 @@ def run_atn_stakeholder_analysis_task(project_id: str):
     
     for row in rows:
         try:
-            data = json.loads(row['extracted_data'])
+            data = dict(row)
             if data.get("Score_empathie_IA"): atn_metrics["empathy_scores_ai"].append(float(data["Score_empathie_IA"]))
             if data.get("Score_empathie_humain"): atn_metrics["empathy_scores_human"].append(float(data["Score_empathie_humain"]))
             if data.get("WAI-SR_modifié"): atn_metrics["wai_sr_scores"].append(float(data["WAI-SR_modifié"]))
@@ -1491,71 +1647,52 @@ def run_atn_score_task(project_id: str):
                 'Aucun article extrait pour calculer les scores ATN', {})
             return {"status": "skipped", "reason": "no_extractions"}
         
-        # Récupérer toutes les extractions avec données
-        rows = session.execute(text("""
-            SELECT pmid, title, extracted_data, relevance_score
-            FROM extractions 
-            WHERE project_id = :pid AND extracted_data IS NOT NULL
-        """), {"pid": project_id}).mappings().fetchall()
-        
-        if not rows:
+        # Agrégats calculés en base : les scores sont lus directement dans le JSONB
+        empathy_sql = jsonb_numeric_sql('extracted_data', 'Score_empathie_IA')
+        trust_sql = jsonb_numeric_sql('extracted_data', 'Confiance_algorithmique')
+        stats = session.execute(text(f"""
+            WITH scores AS (
+                SELECT relevance_score, {empathy_sql} AS empathy, {trust_sql} AS trust
+                FROM extractions
+                WHERE project_id = :pid AND extracted_data IS NOT NULL
+            ), bounded AS (
+                SELECT relevance_score,
+                       CASE WHEN empathy BETWEEN 0 AND 100 THEN empathy END AS empathy,
+                       CASE WHEN trust BETWEEN 0 AND 100 THEN trust END AS trust
+                FROM scores
+            )
+            SELECT COUNT(*) AS total, AVG(relevance_score) AS atn_mean, STDDEV_POP(relevance_score) AS atn_std,
+                   COUNT(empathy) AS empathy_count, AVG(empathy) AS empathy_mean, STDDEV_POP(empathy) AS empathy_std,
+                   MIN(empathy) AS empathy_min, MAX(empathy) AS empathy_max,
+                   COUNT(trust) AS trust_count, AVG(trust) AS trust_mean, STDDEV_POP(trust) AS trust_std,
+                   MIN(trust) AS trust_min, MAX(trust) AS trust_max
+            FROM bounded
+        """), {"pid": project_id}).mappings().fetchone()
+
+        total_articles = stats['total']
+        if not total_articles:
             logger.warning(f"Aucune donnée extraite trouvée pour le projet {project_id}")
             send_project_notification(project_id, 'analysis_failed',
                 'Aucune donnée extraite disponible pour l\'analyse ATN', {})
             return {"status": "skipped", "reason": "no_extracted_data"}
-        
-        # Calculer les statistiques ATN
-        total_articles = len(rows)
-        atn_scores = []
-        empathy_scores = []
-        trust_scores = []
-        
-        for row in rows:
-            try:
-                data = json.loads(row['extracted_data']) if isinstance(row['extracted_data'], str) else row['extracted_data']
-                
-                # Extraction des scores numériques
-                if 'Score_empathie_IA' in data:
-                    try:
-                        score = float(str(data['Score_empathie_IA']).replace('%', '').replace(',', '.'))
-                        if 0 <= score <= 100:
-                            empathy_scores.append(score)
-                    except (ValueError, TypeError):
-                        pass
-                
-                if 'Confiance_algorithmique' in data:
-                    try:
-                        score = float(str(data['Confiance_algorithmique']).replace('%', '').replace(',', '.'))
-                        if 0 <= score <= 100:
-                            trust_scores.append(score)
-                    except (ValueError, TypeError):
-                        pass
-                
-                # Score composite basé sur la pertinence
-                atn_scores.append(row.get('relevance_score', 0))
-                
-            except Exception as e:
-                logger.warning(f"Erreur traitement extraction {row['pmid']}: {e}")
-        
+
+        def _score_stats(prefix):
+            count = stats[f'{prefix}_count']
+            return {
+                'count': count,
+                'mean': stats[f'{prefix}_mean'],
+                'std': stats[f'{prefix}_std'] if count > 1 else None,
+                'min': stats[f'{prefix}_min'],
+                'max': stats[f'{prefix}_max']
+            }
+
         # Calculs statistiques
         results = {
             'total_articles_analyzed': total_articles,
-            'atn_mean_score': np.mean([score for score in atn_scores if score is not None]) if atn_scores and any(score is not None for score in atn_scores) else 0,
-            'atn_std_score': np.std(atn_scores) if len(atn_scores) > 1 else 0,
-            'empathy_scores': {
-                'count': len(empathy_scores),
-                'mean': np.mean(empathy_scores) if empathy_scores else None,
-                'std': np.std(empathy_scores) if len(empathy_scores) > 1 else None,
-                'min': np.min(empathy_scores) if empathy_scores else None,
-                'max': np.max(empathy_scores) if empathy_scores else None
-            },
-            'trust_scores': {
-                'count': len(trust_scores), 
-                'mean': np.mean(trust_scores) if trust_scores else None,
-                'std': np.std(trust_scores) if len(trust_scores) > 1 else None,
-                'min': np.min(trust_scores) if trust_scores else None,
-                'max': np.max(trust_scores) if trust_scores else None
-            },
+            'atn_mean_score': stats['atn_mean'] or 0,
+            'atn_std_score': (stats['atn_std'] or 0) if total_articles > 1 else 0,
+            'empathy_scores': _score_stats('empathy'),
+            'trust_scores': _score_stats('trust'),
             'analysis_date': datetime.now().isoformat()
         }
         
@@ -1658,115 +1795,77 @@ def run_risk_of_bias_task(project_id: str, article_id: str):
 def add_manual_articles_task(project_id: str, items: list, use_full_data: bool = False):
     """
     Tâche d'arrière-plan pour ajouter des articles.
-    VERSION VICTORY: Gère les données complètes (depuis le workflow) ou les simples identifiants.
+    Gère les données complètes (depuis le workflow) ou les simples identifiants.
+    L'existence est vérifiée par l'insertion elle-même (ON CONFLICT DO NOTHING RETURNING) :
+    quelques requêtes et un seul commit quel que soit le nombre d'items, et seuls les
+    articles réellement insérés reçoivent une tâche d'analyse.
     """
-    logger.info(f"🧬 Ajout manuel VICTORY pour projet {project_id}. Utilisation données complètes: {use_full_data}")
+    logger.info(f"🧬 Ajout manuel pour projet {project_id}. Utilisation données complètes: {use_full_data}")
     if not items:
         logger.warning(f"Aucun item fourni pour le projet {project_id}.")
         return
 
-    records_to_insert = []
-    
-    # BOUCLE PRINCIPALE CORRIGÉE POUR LA VICTOIRE
+    # Un enregistrement par article_id (le premier l'emporte en cas de doublon dans le lot)
+    records_by_id = {}
+    items_by_id = {}
     for item_data in items:
-        try:
-            # ÉTAPE 1: Isoler l'ID de manière fiable
-            # On s'assure que item_data est bien un dictionnaire
-            if not isinstance(item_data, dict):
-                logger.warning(f"Item n'est pas un dictionnaire, ignoré: {str(item_data)[:100]}")
-                continue
+        if not isinstance(item_data, dict):
+            logger.warning(f"Item n'est pas un dictionnaire, ignoré: {str(item_data)[:100]}")
+            continue
 
-            # On extrait l'ID simple. C'est notre clé unique.
-            article_id_simple = item_data.get('article_id') or item_data.get('pmid')
+        article_id = item_data.get('article_id') or item_data.get('pmid')
+        if not article_id:
+            logger.warning(f"Item sans ID valide ignoré: {str(item_data)[:100]}")
+            continue
+        if article_id in records_by_id:
+            continue
 
-            if not article_id_simple:
-                logger.warning(f"Item sans ID valide ignoré: {str(item_data)[:100]}")
-                continue
-            
-            # Le reste des données
-            details = item_data
-
-            # ÉTAPE 2: Vérification de l'existence AVEC L'ID SIMPLE
-            exists = session.execute(text("SELECT 1 FROM search_results WHERE project_id = :pid AND article_id = :aid"), 
-                                     {"pid": project_id, "aid": article_id_simple}).fetchone()
-            if exists:
-                logger.debug(f"Article {article_id_simple} déjà existant, ignoré.")
-                continue
-            
-            # ÉTAPE 3: Insertion en base de données AVEC L'ID SIMPLE
-            records_to_insert.append({
-                "id": str(uuid.uuid4()), 
-                "pid": project_id, 
-                "aid": article_id_simple, # ✅ LA CORRECTION CRUCIALE EST ICI
-                "title": details.get('title', f"Article {article_id_simple}"),
-                "abstract": details.get('abstract', 'Résumé non disponible.'),
-                "authors": str(details.get('authors', 'Auteurs non spécifiés')), # Assurer que c'est une chaîne
-                "pub_date": str(details.get('publication_date', '')) or str(details.get('year', '')),
-                "journal": details.get('journal', 'Journal non spécifié'),
-                "doi": details.get('doi', ''),
-                "url": details.get('url', ''),
-                "src": details.get('database_source', 'zotero_glory'),
-                "ts": datetime.now().isoformat()
-            })
+        items_by_id[article_id] = item_data
+        records_by_id[article_id] = {
+            "id": str(uuid.uuid4()),
+            "project_id": project_id,
+            "article_id": article_id,
+            "title": item_data.get('title', f"Article {article_id}"),
+            "abstract": item_data.get('abstract', 'Résumé non disponible.'),
+            "authors": str(item_data.get('authors', 'Auteurs non spécifiés')),
+            "publication_date": str(item_data.get('publication_date', '')) or str(item_data.get('year', '')),
+            "journal": item_data.get('journal', 'Journal non spécifié'),
+            "doi": item_data.get('doi', ''),
+            "url": item_data.get('url', ''),
+            "database_source": item_data.get('database_source', 'zotero_glory'),
+            "created_at": datetime.now(),
+        }
 
-        except Exception as e:
-            logger.error(f"Erreur lors du traitement de l'item {str(item_data)[:100]}: {e}", exc_info=True)
-            continue
-        
-        try:
-            session.commit()
-            logger.info(f"✅ COMMIT SUCCESS: {len(records_to_insert)} articles successfully saved to database for project {project_id}.")
-        except Exception as e:
-            logger.error(f"❌ CRITICAL COMMIT FAILED for project {project_id}: {e}")
-            session.rollback()
-            raise  
-    
-    if not records_to_insert:
-        logger.info(f"Aucun nouvel article à ajouter pour {project_id}.")
-        send_project_notification(project_id, 'import_completed', f'Import terminé: Aucun nouvel article ajouté.')
-        return
+    records = list(records_by_id.values())
+    inserted_ids = bulk_upsert(db.session, 'search_results', records, conflict_columns=['project_id', 'article_id'], returning='article_id')
 
-    # Insertion en base de données
-    session.execute(text("""
-        INSERT INTO search_results (id, project_id, article_id, title, abstract, authors, publication_date, journal, doi, url, database_source, created_at)
-        VALUES (:id, :pid, :aid, :title, :abstract, :authors, :pub_date, :journal, :doi, :url, :src, :ts)
-    """), records_to_insert)
+    if not inserted_ids:
+        db.session.commit()
+        logger.info(f"Aucun nouvel article à ajouter pour {project_id}.")
+        send_project_notification(project_id, 'import_completed', 'Import terminé: Aucun nouvel article ajouté.')
+        return {"inserted": [], "skipped": len(records)}
 
-    # Mise à jour du projet et notification
-    session.execute(text("UPDATE projects SET pmids_count = (SELECT COUNT(*) FROM search_results WHERE project_id = :pid), updated_at = :ts WHERE id = :pid"), {"pid": project_id, "ts": datetime.now().isoformat()})
-    send_project_notification(project_id, 'import_completed', f'Ajout manuel terminé: {len(records_to_insert)} article(s) ajouté(s).')
-    logger.info(f"✅ Ajout manuel VICTORY terminé pour {project_id}. {len(records_to_insert)} articles ajoutés.")
+    db.session.execute(text("UPDATE projects SET pmids_count = (SELECT COUNT(*) FROM search_results WHERE project_id = :pid), updated_at = :ts WHERE id = :pid"), {"pid": project_id, "ts": datetime.now().isoformat()})
+    # mark_duplicate_results effectue l'unique commit de la tâche
+    dedup = mark_duplicate_results(project_id)
+    skipped = len(records) - len(inserted_ids)
+    send_project_notification(project_id, 'import_completed', f'Ajout manuel terminé: {len(inserted_ids)} article(s) ajouté(s).', {'added': len(inserted_ids), 'skipped': skipped})
+    logger.info(f"✅ Ajout manuel terminé pour {project_id}: {len(inserted_ids)} ajoutés, {skipped} déjà présents.")
 
-    # Lancement de l'extraction automatique pour les nouveaux articles
-    project = session.query(Project).filter_by(id=project_id).first()
-    profile_used = project.profile_used if project else 'standard'
     # Utilisation d'un profil par défaut simple, car c'est un import de masse
     default_profile = { 'preprocess': 'phi3:mini', 'extract': 'phi3:mini', 'synthesis': 'llama3:8b' }
-
-    if not items:
-        logger.info("Aucun article original fourni pour l'analyse, fin de la tâche.")
-        return
-
-    logger.info(f"Préparation de l'analyse pour les {len(items)} articles soumis...")
-
-    # On itère sur la liste originale `items` qui contient TOUTES les données
-    for article_data_item in items:
-        article_id = article_data_item.get('article_id') or article_data_item.get('pmid')
-        
-        if not article_id:
-            logger.warning("Item sans ID ignoré lors de la mise en file d'attente de l'analyse.")
-            continue
-
-        logger.info(f"Mise en file d'attente de l'analyse pour l'article {article_id}...")
-        
-        # ✅ VICTOIRE : On passe l'objet article complet (le dictionnaire) à la tâche.
+    to_analyze = [aid for aid in inserted_ids if aid not in dedup['duplicate_ids']]
+    run_id = start_progress_run(project_id, len(to_analyze))
+    for article_id in to_analyze:
         analysis_queue.enqueue(
             'backend.tasks_v4_complete.process_single_article_task',
-            args=(project_id, article_data_item, default_profile, "full_extraction"),
+            args=(project_id, items_by_id[article_id], default_profile, "full_extraction"),
+            kwargs={'run_id': run_id},
             job_timeout=3600  # Timeout étendu pour l'analyse complète
         )
 
-    logger.info(f"✅ Toutes les tâches d'analyse pour les {len(items)} articles ont été mises en file d'attente.")
+    logger.info(f"✅ {len(to_analyze)} tâches d'analyse mises en file d'attente.")
+    return {"inserted": inserted_ids, "skipped": skipped}
 
 @with_db_session
 def import_from_zotero_json_task(project_id: str, items_list: list):
@@ -1785,27 +1884,18 @@ def import_from_zotero_json_task(project_id: str, items_list: list):
         logger.info(msg)
         return
 
-    # 2. Insérer les enregistrements uniques dans la base de données
+    # 2. Insérer les enregistrements uniques dans la base de données (les articles existants sont ignorés)
     records_to_insert = []
-    new_articles = []
     for record in processed_records:
-        article_id = record.get('article_id')
-        if not article_id:
+        if not record.get('article_id'):
             continue
-        
-        existing = session.query(SearchResult).filter_by(project_id=project_id, article_id=article_id).first()
-        if not existing:
-            record.pop('zotero_key', None)
-            record.pop('__hash', None)
-            record['project_id'] = project_id
-            new_articles.append(SearchResult(**record))
-        else:
-            # If article already exists, skip it for deduplication test
-            logger.debug(f"Article existant ignoré (déduplication) : {article_id}")
-            continue # Skip to the next record
+        record.pop('zotero_key', None)
+        record.pop('__hash', None)
+        records_to_insert.append({"id": str(uuid.uuid4()), "project_id": project_id, "created_at": datetime.now(), **record})
 
+    new_articles = bulk_upsert(db.session, 'search_results', records_to_insert, conflict_columns=['project_id', 'article_id'], returning='article_id')
     if new_articles:
-        session.add_all(new_articles)
+        mark_duplicate_results(project_id)
 
     # Le commit est déjà géré par le décorateur @with_db_session
     # session.commit() # Assurez-vous que ceci est hors de la boucle for
@@ -1903,7 +1993,7 @@ def generate_summary_table_task(project_id: str):
 
         summary_data = []
         for article, extraction in results:
-            extracted_data = json.loads(extraction.extracted_data) if extraction.extracted_data else {}
+            extracted_data = extraction.extracted_data or {}
             summary_data.append({
                 "PMID": article.article_id,
                 "Titre": article.title,
@@ -1932,66 +2022,153 @@ def generate_summary_table_task(project_id: str):
 
 
 @with_db_session
-def export_excel_report_task(project_id: str):
+def export_excel_report_task(project_id: str, export_format: str = 'xlsx'):
     """
-    Exporte toutes les données pertinentes du projet vers un fichier Excel.
+    Exporte les données du projet (résultats, extractions aplaties, risque de biais, vue combinée).
+    Les lignes sont streamées depuis des curseurs serveur vers xlsxwriter en mode constant_memory
+    (ou vers une archive de CSV / des fichiers Parquet) : la mémoire du worker reste bornée.
     """
-    logger.info(f"ðŸ“š Export Excel pour le projet {project_id}")
+    logger.info(f"ðŸ“š Export {export_format} pour le projet {project_id}")
+    writer = None
     try:
-        project = session.query(Project).filter_by(id=project_id).first()
+        project = db.session.get(Project, project_id)
         if not project:
             send_project_notification(project_id, 'report_failed', 'Projet non trouvé.')
             return
 
-        # Fetch all search results
-        search_results = session.query(SearchResult).filter_by(project_id=project_id).all()
-        search_data = [{c.name: getattr(sr, c.name) for c in sr.__table__.columns} for sr in search_results]
-        df_search = pd.DataFrame(search_data)
-
-        # Fetch all extractions
-        extractions = session.query(Extraction).filter_by(project_id=project_id).all()
-        extraction_data = []
-        for ext in extractions:
-            row = {c.name: getattr(ext, c.name) for c in ext.__table__.columns}
-            if ext.extracted_data:
-                try:
-                    # Flatten extracted_data JSON into top-level columns
-                    flattened_data = json.loads(ext.extracted_data)
-                    row.update(flattened_data)
-                except json.JSONDecodeError:
-                    logger.warning(f"Could not decode extracted_data for extraction ID {ext.id}")
-            extraction_data.append(row)
-        df_extractions = pd.DataFrame(extraction_data)
-
-        # Fetch all risk of bias assessments
-        rob_assessments = session.query(RiskOfBias).filter_by(project_id=project_id).all()
-        rob_data = [{c.name: getattr(rob, c.name) for c in rob.__table__.columns} for rob in rob_assessments]
-        df_rob = pd.DataFrame(rob_data)
-
-        project_dir = PROJECTS_DIR / project_id
-        project_dir.mkdir(exist_ok=True)
-        file_path = project_dir / f"report_{project_id}.xlsx"
-
-        with pd.ExcelWriter(file_path, engine='xlsxwriter') as writer:
-            if not df_search.empty:
-                df_search.to_excel(writer, sheet_name='Search Results', index=False)
-            if not df_extractions.empty:
-                df_extractions.to_excel(writer, sheet_name='Extractions', index=False)
-            if not df_rob.empty:
-                df_rob.to_excel(writer, sheet_name='Risk of Bias', index=False)
-            
-            # Optionally, merge dataframes for a combined view
-            if not df_search.empty and not df_extractions.empty:
-                df_combined = pd.merge(df_search, df_extractions, left_on=['project_id', 'article_id'], right_on=['project_id', 'pmid'], how='left', suffixes=('_search', '_extraction'))
-                df_combined.to_excel(writer, sheet_name='Combined Data', index=False)
-
+        project_dir = Path(PROJECTS_DIR) / project_id
+        project_dir.mkdir(parents=True, exist_ok=True)
+        writer = open_export_writer(export_format, project_dir / f"report_{project_id}")
+        counts = export_project_report(db.session, project_id, writer)
+        writer.close()
+        file_path, writer = str(writer.path), None
 
-        send_project_notification(project_id, 'report_completed', 'Export Excel généré avec succès.', {'report_path': str(file_path)})
-        logger.info(f"âœ… Export Excel généré pour le projet {project_id} à {file_path}")
+        send_project_notification(project_id, 'report_completed', f'Export {export_format} généré avec succès.', {'report_path': file_path, 'format': export_format, 'rows': counts})
+        logger.info(f"âœ… Export {export_format} généré pour le projet {project_id} à {file_path}")
+        return {"report_path": file_path, "rows": counts}
 
     except Exception as e:
         logger.error(f"Erreur lors de l'export Excel pour le projet {project_id}: {e}", exc_info=True)
         send_project_notification(project_id, 'report_failed', f'Erreur lors de l\'export Excel: {e}')
+    finally:
+        if writer is not None:
+            writer.close()
+
+def thesis_export_path(project_id: str) -> Path:
+    """Emplacement de l'archive d'export de thèse d'un projet (servie telle quelle par l'API)."""
+    return Path(PROJECTS_DIR) / project_id / f"export_these_{project_id}.zip"
+
+
+@with_db_session
+def export_thesis_task(project_id: str):
+    """
+    Génère l'archive d'export de thèse sur disque, en streaming : articles inclus (Excel),
+    bibliographie, extractions aplaties (CSV) et figures PRISMA. L'archive est écrite dans un
+    fichier temporaire puis renommée, de sorte que l'API ne sert jamais une archive partielle.
+    """
+    logger.info(f"ðŸ“¦ Export de thèse pour le projet {project_id}")
+    project = db.session.get(Project, project_id)
+    if not project:
+        send_project_notification(project_id, 'export_failed', 'Projet non trouvé.')
+        return {"status": "failed", "reason": "project_not_found"}
+
+    params = {"pid": project_id}
+    has_included = db.session.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM extractions WHERE project_id = :pid AND user_validation_status = 'include')"
+    ), params).scalar()
+    # Filtre ensembliste (semi-jointure) au lieu d'un test d'appartenance à une liste par article
+    included_filter = """
+        AND EXISTS (SELECT 1 FROM extractions e WHERE e.project_id = s.project_id AND e.pmid = s.article_id
+                    AND e.user_validation_status = 'include')
+    """ if has_included else ""
+    articles_sql = f"""
+        SELECT {', '.join('s.' + col for col in SEARCH_RESULT_COLUMNS)} FROM search_results s
+        WHERE s.project_id = :pid {included_filter}
+    """
+
+    archive_path = thesis_export_path(project_id)
+    archive_path.parent.mkdir(parents=True, exist_ok=True)
+    # Nom propre au job : deux exports simultanés du projet n'écrivent ni ne suppriment le même fichier
+    partial_path = archive_path.with_name(f".{archive_path.name}.{uuid.uuid4().hex}.part")
+    xlsx_path = archive_path.with_name(f".export_articles_{uuid.uuid4().hex}.xlsx")
+    try:
+        excel = ExcelStreamWriter(xlsx_path)
+        n_articles = excel.write_sheet('Articles Inclus', SEARCH_RESULT_COLUMNS,
+                                       stream_rows(db.session, articles_sql + " ORDER BY s.created_at, s.id", params))
+        excel.close()
+        if not n_articles:
+            send_project_notification(project_id, 'export_failed', 'Aucun article inclus à exporter.')
+            return {"status": "empty", "articles": 0}
+
+        with zipfile.ZipFile(partial_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.write(xlsx_path, 'export_articles.xlsx')
+
+            # Bibliographie triée par premier auteur côté base, écrite entrée par entrée
+            bibliography_sql = articles_sql + " ORDER BY split_part(COALESCE(s.authors, 'N.A.'), ';', 1), s.publication_date, s.title"
+            with archive.open('bibliographie.txt', 'w') as raw:
+                for row in stream_rows(db.session, bibliography_sql, params):
+                    raw.write((format_bibliography([dict(row)]) + "\n").encode('utf-8'))
+
+            fields = extracted_data_fields(db.session, project_id)
+            extraction_filter = "AND user_validation_status = 'include'" if has_included else ""
+            CsvZipStreamWriter(archive=archive).write_sheet(
+                'extractions', EXTRACTION_COLUMNS + [f"data.{field}" for field in fields],
+                (flatten_extraction(row, fields) for row in stream_rows(db.session, f"""
+                    SELECT {', '.join(EXTRACTION_COLUMNS)}, extracted_data FROM extractions
+                    WHERE project_id = :pid {extraction_filter} ORDER BY pmid
+                """, params))
+            )
+
+            if project.prisma_flow_path:
+                for figure in (Path(project.prisma_flow_path), Path(project.prisma_flow_path).with_suffix('.pdf')):
+                    if figure.exists():
+                        archive.write(figure, f"figures/{figure.name}")
+        partial_path.replace(archive_path)
+    finally:
+        xlsx_path.unlink(missing_ok=True)
+        partial_path.unlink(missing_ok=True)
+
+    download_url = f"/api/projects/{project_id}/export/thesis"
+    send_project_notification(project_id, 'export_completed', f'Export de thèse prêt ({n_articles} articles).',
+                              {'download_url': download_url, 'articles': n_articles})
+    logger.info(f"âœ… Export de thèse écrit dans {archive_path}")
+    return {"status": "completed", "articles": n_articles, "path": str(archive_path), "download_url": download_url}
+
+
+def parquet_snapshot_path(project_id: str) -> Path:
+    """Répertoire de l'instantané Parquet d'un projet (un fichier .parquet par table + manifest.json)."""
+    return Path(PROJECTS_DIR) / project_id / "snapshot_parquet"
+
+
+@with_db_session
+def export_parquet_snapshot_task(project_id: str):
+    """
+    Écrit un instantané Parquet typé du projet (résultats, extractions aplaties avec score et
+    catégorie ATN, risque de biais, journal de traitement) pour les analyses hors ligne.
+    L'instantané est construit dans un répertoire temporaire puis substitué au précédent.
+    """
+    logger.info(f"ðŸ§Š Instantané Parquet pour le projet {project_id}")
+    if not db.session.get(Project, project_id):
+        send_project_notification(project_id, 'export_failed', 'Projet non trouvé.')
+        return {"status": "failed", "reason": "project_not_found"}
+
+    snapshot_dir = parquet_snapshot_path(project_id)
+    partial_dir = snapshot_dir.with_name(snapshot_dir.name + '.part')
+    shutil.rmtree(partial_dir, ignore_errors=True)
+    try:
+        counts = export_project_snapshot(db.session, project_id, partial_dir)
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+        partial_dir.replace(snapshot_dir)
+    except Exception as e:
+        shutil.rmtree(partial_dir, ignore_errors=True)
+        logger.error(f"Erreur lors de l'instantané Parquet du projet {project_id}: {e}", exc_info=True)
+        send_project_notification(project_id, 'export_failed', f"Erreur lors de l'instantané Parquet: {e}")
+        return {"status": "failed", "reason": str(e)}
+
+    send_project_notification(project_id, 'export_completed', 'Instantané Parquet prêt.',
+                              {'snapshot_path': str(snapshot_dir), 'rows': counts, 'format': 'parquet'})
+    logger.info(f"âœ… Instantané Parquet écrit dans {snapshot_dir}")
+    return {"status": "completed", "path": str(snapshot_dir), "rows": counts}
 
 print(f"DEBUG: tasks_v4_complete.py loaded. run_extension_task is defined: {'run_extension_task' in globals()}")   
 
@@ -2022,7 +2199,7 @@ def run_batch_screening_task(project_id: str, profile: Dict):
         SELECT sr.article_id, sr.title, sr.abstract, sr.authors
         FROM search_results sr 
         LEFT JOIN extractions e ON sr.project_id = e.project_id AND sr.article_id = e.pmid
-        WHERE sr.project_id = :pid AND e.id IS NULL
+        WHERE sr.project_id = :pid AND e.id IS NULL AND sr.duplicate_of IS NULL
         ORDER BY sr.created_at
     """), {"pid": project_id}).mappings().fetchall()
     
@@ -2071,14 +2248,14 @@ Réponds UNIQUEMENT en JSON avec :
             
             screening_results.append({
                 "id": str(uuid.uuid4()),
-                "pid": project_id,
+                "project_id": project_id,
                 "pmid": article['article_id'],
                 "title": article['title'],
-                "score": score,
-                "just": result.get('justification', ''),
-                "src": 'abstract',
-                "ts": datetime.now().isoformat(),
-                "category": result.get('atn_category', 'Non classé')
+                "relevance_score": score,
+                "relevance_justification": result.get('justification', ''),
+                "analysis_source": 'abstract',
+                "created_at": datetime.now(),
+                "atn_category": result.get('atn_category', 'Non classé')
             })
             
         except Exception as e:
@@ -2087,14 +2264,9 @@ Réponds UNIQUEMENT en JSON avec :
     
     # Sauvegarde en lot
     if screening_results:
-        session.execute(text("""
-            INSERT INTO extractions (id, project_id, pmid, title, relevance_score, relevance_justification, analysis_source, created_at, atn_category)
-            VALUES (:id, :pid, :pmid, :title, :score, :just, :src, :ts, :category)
-            ON CONFLICT (project_id, pmid) DO UPDATE SET
-                relevance_score = EXCLUDED.relevance_score,
-                relevance_justification = EXCLUDED.relevance_justification,
-                atn_category = EXCLUDED.atn_category
-        """), screening_results)
+        bulk_upsert(db.session, 'extractions', screening_results, conflict_columns=['project_id', 'pmid'],
+                    update_columns=['relevance_score', 'relevance_justification', 'atn_category'])
+        refresh_project_stats(project_id, [EXTRACTIONS])
     
     # Notification avec métriques
     send_project_notification(
@@ -2204,14 +2376,14 @@ RÉPONSE ATTENDUE : Objet JSON avec les 30 champs ATN comme clés.
             
             extraction_results.append({
                 "id": str(uuid.uuid4()),
-                "pid": project_id,
+                "project_id": project_id,
                 "pmid": article['article_id'],
                 "title": article['title'],
-                "data": json.dumps(extracted),
-                "score": 10,  # Score élevé pour extraction complète
-                "just": "Extraction ATN standardisée complète",
-                "src": "pdf" if pdf_path.exists() else "abstract",
-                "ts": datetime.now().isoformat()
+                "extracted_data": json.dumps(extracted),
+                "relevance_score": 10,  # Score élevé pour extraction complète
+                "relevance_justification": "Extraction ATN standardisée complète",
+                "analysis_source": "pdf" if pdf_path.exists() else "abstract",
+                "created_at": datetime.now()
             })
             
         except Exception as e:
@@ -2220,14 +2392,8 @@ RÉPONSE ATTENDUE : Objet JSON avec les 30 champs ATN comme clés.
     
     # Sauvegarde en lot des extractions
     if extraction_results:
-        session.execute(text("""
-            INSERT INTO extractions (id, project_id, pmid, title, extracted_data, relevance_score, relevance_justification, analysis_source, created_at)
-            VALUES (:id, :pid, :pmid, :title, :data, :score, :just, :src, :ts)
-            ON CONFLICT (project_id, pmid) DO UPDATE SET
-                extracted_data = EXCLUDED.extracted_data,
-                relevance_score = EXCLUDED.relevance_score,
-                updated_at = EXCLUDED.created_at
-        """), extraction_results)
+        bulk_upsert(db.session, 'extractions', extraction_results, conflict_columns=['project_id', 'pmid'],
+                    update_columns=['extracted_data', 'relevance_score'])
     
     send_project_notification(
         project_id,
@@ -2261,21 +2427,19 @@ def run_parallel_pdf_fetch_task(project_id: str, article_ids: List[str]):
             if article and article.get('doi'):
                 pdf_url = fetch_unpaywall_pdf_url(article['doi'])
                 if pdf_url:
-                    response = http_get_with_retries(pdf_url, timeout=30)
-                    if response and response.headers.get('content-type', '').startswith('application/pdf'):
-                        
-                        project_dir = PROJECTS_DIR / project_id
-                        project_dir.mkdir(exist_ok=True)
-                        pdf_path = project_dir / f"{sanitize_filename(article_id)}.pdf"
-                        pdf_path.write_bytes(response.content)
-                        
+                    pdf_path = Path(PROJECTS_DIR) / project_id / f"{sanitize_filename(article_id)}.pdf"
+                    # Streaming vers le disque : le PDF n'est jamais chargé entier en mémoire
+                    download = download_pdf(pdf_url, pdf_path, timeout=30)
+                    if download:
                         success_count += 1
-                        logger.info(f"✅ PDF récupéré: {article_id}")
+                        logger.info(f"✅ PDF récupéré: {article_id} ({download['size']} octets)")
                         
         except Exception as e:
             logger.warning(f"Échec PDF {article_id}: {e}")
             continue
     
+    if success_count:
+        refresh_project_stats(project_id, [PDFS])
     send_project_notification(
         project_id,
         'pdf_batch_completed', 
@@ -0,0 +1,24 @@
+"""Add duplicate_of to search_results for cross-source deduplication
+
+Revision ID: 3f1a9c2d7b84
+Revises: e32879f134ec
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1a9c2d7b84'
+down_revision = 'e32879f134ec'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('search_results', sa.Column('duplicate_of', sa.String(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('search_results', 'duplicate_of')
@@ -0,0 +1,33 @@
+"""Add composite and partial indexes for hot query paths
+
+Revision ID: 8b2e4f6a1c37
+Revises: 3f1a9c2d7b84
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4f6a1c37'
+down_revision = '3f1a9c2d7b84'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Filtres "extractions WHERE project_id = :pid AND relevance_score >= N" (synthèse, discussion, criblage)
+    op.create_index('ix_extractions_project_relevance', 'extractions', ['project_id', 'relevance_score'])
+    # File de criblage : articles non doublons, triés par date d'ajout
+    op.create_index(
+        'ix_search_results_project_created_unique', 'search_results', ['project_id', 'created_at'],
+        postgresql_where=sa.text('duplicate_of IS NULL')
+    )
+    op.create_index('ix_processing_log_project_timestamp', 'processing_log', ['project_id', 'timestamp'])
+
+
+def downgrade():
+    op.drop_index('ix_processing_log_project_timestamp', table_name='processing_log')
+    op.drop_index('ix_search_results_project_created_unique', table_name='search_results')
+    op.drop_index('ix_extractions_project_relevance', table_name='extractions')
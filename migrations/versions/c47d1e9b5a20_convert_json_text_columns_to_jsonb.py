@@ -0,0 +1,53 @@
+"""Convert JSON-in-Text columns to JSONB
+
+Revision ID: c47d1e9b5a20
+Revises: 8b2e4f6a1c37
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47d1e9b5a20'
+down_revision = '8b2e4f6a1c37'
+branch_labels = None
+depends_on = None
+
+JSON_COLUMNS = [
+    ('extractions', 'extracted_data'),
+    ('extractions', 'validations'),
+    ('analyses', 'results'),
+    ('projects', 'synthesis_result'),
+    ('projects', 'knowledge_graph'),
+    ('projects', 'analysis_result'),
+    ('projects', 'inter_rater_reliability'),
+]
+
+
+def upgrade():
+    # Conversion tolérante : un texte qui n'est pas du JSON valide est conservé comme chaîne JSON
+    # plutôt que de faire échouer la migration ; les chaînes vides deviennent NULL.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION analylit_text_to_jsonb(value text) RETURNS jsonb AS $$
+        BEGIN
+            IF value IS NULL OR btrim(value) = '' THEN
+                RETURN NULL;
+            END IF;
+            RETURN value::jsonb;
+        EXCEPTION WHEN others THEN
+            RETURN to_jsonb(value);
+        END;
+        $$ LANGUAGE plpgsql IMMUTABLE
+    """)
+    for table, column in JSON_COLUMNS:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE JSONB USING analylit_text_to_jsonb({column})")
+    op.execute("DROP FUNCTION analylit_text_to_jsonb(text)")
+
+
+def downgrade():
+    for table, column in JSON_COLUMNS:
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {column} TYPE TEXT "
+            f"USING CASE WHEN jsonb_typeof({column}) = 'string' THEN {column} #>> '{{}}' ELSE {column}::text END"
+        )
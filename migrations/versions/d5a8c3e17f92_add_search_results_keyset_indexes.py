@@ -0,0 +1,50 @@
+"""Add keyset pagination indexes on search_results, make created_at NOT NULL
+
+Revision ID: d5a8c3e17f92
+Revises: c47d1e9b5a20
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a8c3e17f92'
+down_revision = 'c47d1e9b5a20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (created_at, id) > (:c, :i) est NULL pour un created_at NULL : ces lignes sortiraient de toutes
+    # les pages. Les lignes héritées prennent la date la plus ancienne de leur projet.
+    op.execute("""
+        UPDATE search_results s
+        SET created_at = COALESCE(
+            (SELECT min(o.created_at) FROM search_results o WHERE o.project_id = s.project_id),
+            now()
+        )
+        WHERE s.created_at IS NULL
+    """)
+    op.alter_column('search_results', 'created_at', existing_type=sa.DateTime(),
+                    nullable=False, server_default=sa.text('now()'))
+
+    # Doit rester aligné sur utils.models.SEARCH_RESULT_SORT_KEYS
+    op.create_index('ix_search_results_keyset_created_at', 'search_results', ['project_id', 'created_at', 'id'])
+    op.create_index(
+        'ix_search_results_keyset_publication_date', 'search_results',
+        ['project_id', sa.text("coalesce(publication_date, '')"), 'id']
+    )
+    op.create_index(
+        'ix_search_results_keyset_title', 'search_results',
+        ['project_id', sa.text("left(coalesce(title, ''), 200)"), 'id']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_search_results_keyset_title', table_name='search_results')
+    op.drop_index('ix_search_results_keyset_publication_date', table_name='search_results')
+    op.drop_index('ix_search_results_keyset_created_at', table_name='search_results')
+    op.alter_column('search_results', 'created_at', existing_type=sa.DateTime(),
+                    nullable=True, server_default=None)
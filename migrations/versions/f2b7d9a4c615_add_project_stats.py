@@ -0,0 +1,44 @@
+"""Add project_stats table (per-project aggregated statistics)
+
+Revision ID: f2b7d9a4c615
+Revises: d5a8c3e17f92
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b7d9a4c615'
+down_revision = 'd5a8c3e17f92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    empty_object = sa.text("'{}'::jsonb")
+    op.create_table(
+        'project_stats',
+        sa.Column('project_id', sa.String(), sa.ForeignKey('projects.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('total_results', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('unique_results', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('duplicate_results', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('results_by_source', postgresql.JSONB(), nullable=False, server_default=empty_object),
+        sa.Column('screened_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('decisions', postgresql.JSONB(), nullable=False, server_default=empty_object),
+        sa.Column('score_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('score_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('score_sq_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('score_min', sa.Float(), nullable=True),
+        sa.Column('score_max', sa.Float(), nullable=True),
+        sa.Column('score_median', sa.Float(), nullable=True),
+        sa.Column('score_histogram', postgresql.JSONB(), nullable=False, server_default=empty_object),
+        sa.Column('pdf_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table('project_stats')
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark du chargement en masse de search_results : executemany vs COPY (utils.bulk_loader).
+Usage : DATABASE_URL=postgresql://... python scripts/benchmark_bulk_loader.py [nombre_de_lignes]
+"""
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+sys.path.append('.')
+from utils.bulk_loader import bulk_upsert
+
+
+def make_rows(project_id, n):
+    return [{
+        "id": str(uuid.uuid4()), "project_id": project_id, "article_id": f"bench_{i}",
+        "title": f"Benchmark article {i}", "abstract": "Résumé " * 40, "authors": "Doe J; Smith A",
+        "publication_date": "2024", "journal": "Journal of Benchmarks", "doi": f"10.1000/bench.{i}",
+        "url": "", "database_source": "benchmark", "created_at": datetime.now(),
+    } for i in range(n)]
+
+
+def run(label, session, project_id, load):
+    session.execute(text("INSERT INTO projects (id, name) VALUES (:id, :name)"), {"id": project_id, "name": f"benchmark {label}"})
+    start = time.perf_counter()
+    load()
+    session.flush()
+    duration = time.perf_counter() - start
+    count = session.execute(text("SELECT COUNT(*) FROM search_results WHERE project_id = :pid"), {"pid": project_id}).scalar_one()
+    print(f"{label:<12} {count:>7} lignes en {duration:6.2f}s ({count / duration:,.0f} lignes/s)")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    engine = create_engine(os.getenv('DATABASE_URL', 'postgresql://analylit_user:strong_password@db:5432/analylit_db'))
+    columns = list(make_rows("x", 1)[0].keys())
+    insert_sql = text(
+        f"INSERT INTO search_results ({', '.join(columns)}) VALUES ({', '.join(':' + c for c in columns)}) "
+        "ON CONFLICT (project_id, article_id) DO NOTHING"
+    )
+
+    # Tout est annulé en fin de benchmark : la base n'est pas modifiée.
+    with Session(engine) as session:
+        pid = str(uuid.uuid4())
+        rows = make_rows(pid, n)
+        run("executemany", session, pid, lambda: session.execute(insert_sql, rows))
+
+        pid = str(uuid.uuid4())
+        rows = make_rows(pid, n)
+        run("COPY", session, pid, lambda: bulk_upsert(session, 'search_results', rows, conflict_columns=['project_id', 'article_id']))
+        session.rollback()
+
+
+if __name__ == "__main__":
+    main()
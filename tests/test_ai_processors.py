@@ -2,7 +2,7 @@ import pytest
 from unittest.mock import MagicMock, patch, call
 import requests
 import json
-from utils.ai_processors import call_ollama_api, AIResponseError
+from utils.ai_processors import call_ollama_api, stream_ollama_api, AIResponseError
 
 # Mock the config_v4 module and its attributes
 @pytest.fixture(autouse=True)
@@ -205,3 +205,30 @@ def test_call_ollama_api_empty_response(mock_requests_session):
 
     assert result == ""
     mock_requests_session.post.assert_called_once()
+
+def test_stream_ollama_api_yields_fragments(mock_requests_session):
+    """Test streaming call: fragments are yielded as Ollama emits its JSON lines."""
+    mock_response = MagicMock()
+    mock_response.iter_lines.return_value = [
+        json.dumps({"response": "Bon", "done": False}).encode(),
+        b"",
+        json.dumps({"response": "jour", "done": False}).encode(),
+        json.dumps({"response": "", "done": True}).encode(),
+        json.dumps({"response": "ignoré", "done": False}).encode(),
+    ]
+    mock_requests_session.post.return_value.__enter__.return_value = mock_response
+
+    assert list(stream_ollama_api("Salut", model="test-model")) == ["Bon", "jour"]
+    assert mock_requests_session.post.call_args.kwargs["json"]["stream"] is True
+    assert mock_requests_session.post.call_args.kwargs["stream"] is True
+
+def test_stream_ollama_api_error_line(mock_requests_session):
+    """Test streaming call: an error reported mid-stream raises AIResponseError."""
+    mock_response = MagicMock()
+    mock_response.iter_lines.return_value = [json.dumps({"response": "Bon"}).encode(), json.dumps({"error": "model not found"}).encode()]
+    mock_requests_session.post.return_value.__enter__.return_value = mock_response
+
+    stream = stream_ollama_api("Salut")
+    assert next(stream) == "Bon"
+    with pytest.raises(AIResponseError, match="model not found"):
+        next(stream)
@@ -0,0 +1,24 @@
+# tests/test_answer_cache.py
+# Cache sémantique des réponses du chat : seuil de similarité, invalidation par version de l'index.
+from utils.answer_cache import AnswerCache
+
+
+def test_similar_question_hits_until_index_changes(tmp_path):
+    cache = AnswerCache(tmp_path / "answer_cache.sqlite3", threshold=0.95)
+    cache.store(3, "Quels instruments mesurent l'empathie ?", [1.0, 0.0, 0.1], "Le JSPE.")
+
+    question, answer, similarity = cache.lookup(3, [0.98, 0.01, 0.1])
+    assert (question, answer) == ("Quels instruments mesurent l'empathie ?", "Le JSPE.")
+    assert similarity > 0.95
+    assert cache.lookup(3, [0.2, 1.0, 0.0]) is None  # autre question
+    assert cache.lookup(4, [1.0, 0.0, 0.1]) is None  # index réindexé
+    assert cache.lookup(3, [1.0, 0.0, 0.1]) is None  # entrées de l'ancienne génération purgées
+
+
+def test_cache_keeps_most_recent_entries(tmp_path):
+    cache = AnswerCache(tmp_path / "answer_cache.sqlite3", max_entries=2)
+    for i, vector in enumerate(([1.0, 0.0], [0.0, 1.0], [-1.0, 0.0])):
+        cache.store(1, f"q{i}", vector, f"r{i}")
+
+    assert cache.lookup(1, [1.0, 0.0]) is None
+    assert cache.lookup(1, [-1.0, 0.0])[1] == "r2"
@@ -99,7 +99,7 @@ def test_api_full_validation_workflow(client: FlaskClient, db_session: Session,
     # 3. Assert 1
     db_session.refresh(extraction)
     assert extraction.user_validation_status == "include"
-    assert json.loads(extraction.validations) == {"evaluator1": "include"}
+    assert extraction.validations == {"evaluator1": "include"}
 
     # 4. Étape 2: Eval 2 importe son CSV
     mock_csv_content = f"articleId,decision\n{article_id},exclude\n"
@@ -115,7 +115,7 @@ def test_api_full_validation_workflow(client: FlaskClient, db_session: Session,
 
     # 5. Assert 2
     db_session.refresh(extraction)
-    assert json.loads(extraction.validations) == {"evaluator1": "include", "evaluator2": "exclude"}
+    assert extraction.validations == {"evaluator1": "include", "evaluator2": "exclude"}
 
 # ================================================================
 # CATEGORIE 3: RAPPORTS & EXPORTS
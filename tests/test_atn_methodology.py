@@ -93,7 +93,7 @@ def test_atn_scoring_algorithms_validation(db_session, setup_atn_project, mocker
 
     # Récupérer les résultats
     project = db_session.get(Project, project_id)
-    results = json.loads(project.analysis_result)
+    results = project.analysis_result
 
     # Valider les calculs
     assert results['total_studies'] == 3
@@ -42,7 +42,7 @@ def test_run_atn_score_task_scoring_logic(db_session):
 
     # Check the results stored in the project
     project = db_session.execute(text("SELECT analysis_result FROM projects WHERE id = :id"), {'id': project_id}).mappings().fetchone()
-    analysis_result = json.loads(project['analysis_result'])
+    analysis_result = project['analysis_result']
     
     assert analysis_result['total_articles_scored'] == 4
     scores = {s['pmid']: s['atn_score'] for s in analysis_result['atn_scores']}
@@ -0,0 +1,117 @@
+# tests/test_bulk_loader.py
+import os
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from utils.bulk_loader import bulk_upsert, format_copy_rows
+from utils.models import Project, SearchResult
+
+
+def test_format_copy_rows_quotes_text_and_keeps_nulls():
+    rows = [{"a": 'dit "bonjour", puis\nsort', "b": None, "c": 3, "d": {"k": [1]}, "e": datetime(2024, 1, 2, 3, 4, 5), "f": ""}]
+
+    buffer = format_copy_rows(rows, ["a", "b", "c", "d", "e", "f"])
+
+    assert buffer.read() == '"dit ""bonjour"", puis\nsort",,3,"{""k"": [1]}","2024-01-02T03:04:05",""\n'
+
+
+@pytest.fixture
+def sqlite_session():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (project_id TEXT, article_id TEXT, title TEXT, PRIMARY KEY (project_id, article_id))"))
+    with Session(engine) as session:
+        yield session
+
+
+def test_bulk_upsert_fallback_do_nothing_returns_inserted(sqlite_session):
+    sqlite_session.execute(text("INSERT INTO items VALUES ('p', 'a1', 'Existant')"))
+    rows = [{"project_id": "p", "article_id": aid, "title": f"Titre {aid}"} for aid in ("a1", "a2", "a3")]
+
+    inserted = bulk_upsert(sqlite_session, 'items', rows, conflict_columns=['project_id', 'article_id'], returning='article_id')
+
+    assert inserted == ["a2", "a3"]
+    assert sqlite_session.execute(text("SELECT title FROM items WHERE article_id = 'a1'")).scalar_one() == "Existant"
+
+
+def test_bulk_upsert_fallback_update(sqlite_session):
+    sqlite_session.execute(text("INSERT INTO items VALUES ('p', 'a1', 'Ancien')"))
+
+    written = bulk_upsert(sqlite_session, 'items', [{"project_id": "p", "article_id": "a1", "title": "Nouveau"}],
+                          conflict_columns=['project_id', 'article_id'], update_columns=['title'])
+
+    assert written == 1
+    assert sqlite_session.execute(text("SELECT title FROM items")).scalar_one() == "Nouveau"
+
+
+def test_bulk_upsert_fallback_last_duplicate_wins(sqlite_session):
+    rows = [{"project_id": "p", "article_id": "a1", "title": t} for t in ("Premier", "Second")]
+
+    bulk_upsert(sqlite_session, 'items', rows, conflict_columns=['project_id', 'article_id'], update_columns=['title'])
+
+    assert sqlite_session.execute(text("SELECT title FROM items")).scalar_one() == "Second"
+
+
+@pytest.fixture
+def pg_session():
+    """Session sur le PostgreSQL de test (DATABASE_URL), sans l'application : rien n'est commité."""
+    url = os.getenv('DATABASE_URL')
+    if not url or not url.startswith('postgresql'):
+        pytest.skip("DATABASE_URL PostgreSQL requis pour le chemin COPY")
+    engine = create_engine(url)
+    try:
+        connection = engine.connect()
+    except OperationalError as e:
+        pytest.skip(f"PostgreSQL injoignable: {e}")
+    transaction = connection.begin()
+    connection.execute(text("CREATE TEMP TABLE items (project_id TEXT, article_id TEXT, title TEXT, PRIMARY KEY (project_id, article_id))"))
+    with Session(bind=connection) as session:
+        yield session
+    transaction.rollback()
+    connection.close()
+    engine.dispose()
+
+
+def test_bulk_upsert_copy_path_dedupes_batch_last_wins(pg_session):
+    """COPY dans la table temporaire puis fusion : dans chaque lot, le dernier doublon l'emporte."""
+    pg_session.execute(text("INSERT INTO items VALUES ('p', '0', 'Existant')"))
+    rows = [{"project_id": "p", "article_id": str(i), "title": f'Titre "{i}", avec virgule\net retour'} for i in range(150)]
+    rows += [{"project_id": "p", "article_id": str(i), "title": f"Doublon {i}"} for i in range(140, 150)]
+
+    inserted = bulk_upsert(pg_session, 'items', rows, conflict_columns=['project_id', 'article_id'],
+                           returning='article_id', batch_size=200)
+
+    assert sorted(inserted, key=int) == [str(i) for i in range(1, 150)]
+    titles = dict(pg_session.execute(text("SELECT article_id, title FROM items")).all())
+    assert titles["0"] == "Existant"
+    assert titles["7"] == 'Titre "7", avec virgule\net retour'
+    assert all(titles[str(i)] == f"Doublon {i}" for i in range(140, 150))
+
+    updated = bulk_upsert(pg_session, 'items', rows[:120] + rows[150:], conflict_columns=['project_id', 'article_id'],
+                          update_columns=['title'], batch_size=50)
+
+    assert updated == 130
+    assert pg_session.execute(text("SELECT title FROM items WHERE article_id = '145'")).scalar_one() == "Doublon 145"
+
+
+def test_bulk_upsert_copy_path_on_postgres(db_session):
+    """Chemin COPY + INSERT ... SELECT ON CONFLICT, en plusieurs lots."""
+    project = Project(id=str(uuid.uuid4()), name="Bulk COPY")
+    db_session.add(project)
+    db_session.flush()
+    db_session.add(SearchResult(id=str(uuid.uuid4()), project_id=project.id, article_id="0", title="Existant"))
+    db_session.flush()
+
+    rows = [{"id": str(uuid.uuid4()), "project_id": project.id, "article_id": str(i), "title": f'Titre "{i}", avec virgule',
+             "abstract": None, "created_at": datetime.now()} for i in range(250)]
+    inserted = bulk_upsert(db_session, 'search_results', rows, conflict_columns=['project_id', 'article_id'],
+                           returning='article_id', batch_size=100)
+
+    assert len(inserted) == 249 and "0" not in inserted
+    assert db_session.query(SearchResult).filter_by(project_id=project.id).count() == 250
+    assert db_session.query(SearchResult).filter_by(project_id=project.id, article_id="7").one().title == 'Titre "7", avec virgule'
@@ -0,0 +1,41 @@
+# tests/test_chunker.py
+# Découpage RAG : phrases entières, sections, pages, et gabarit de mise en page écarté.
+from utils.chunker import approx_token_count, chunk_pages, split_sentences
+
+
+def _article(n_pages=5):
+    pages = []
+    for number in range(1, n_pages + 1):
+        page = "Journal of Digital Health 2024\nSmith et al.\n"
+        if number == 1:
+            page += "Abstract\nThis study examines the therapeutic alliance in digital\ninterventions.\n1. Introduction\n"
+        page += "Digital tools are increasingly used in mental health care. Smith et al. reported a moderate effect. " * 6 + "\n"
+        if number == 3:
+            page += "2. Methods\nWe searched PubMed and Scopus in 2023.\n"
+        if number == n_pages:
+            page += "References\n1. Doe J. Unrelated reference. 2020.\n"
+        page += f"Page {number} of {n_pages}\n"
+        pages.append(page)
+    return pages
+
+
+def test_chunks_follow_sentences_sections_and_token_budget():
+    chunks = chunk_pages(_article(), max_tokens=120, min_tokens=32, count_tokens=approx_token_count)
+
+    assert all(approx_token_count(c.text) <= 120 for c in chunks)
+    assert all(c.text.endswith(".") for c in chunks)
+    assert [c.section for c in chunks][:2] == ["Abstract", "Introduction"]
+    assert chunks[1].page_start == 1
+    assert any(c.section == "Methods" and c.page_start == 3 for c in chunks)
+    assert chunks[-1].page_end == 5
+
+    text = " ".join(c.text for c in chunks)
+    assert "Journal of Digital Health" not in text
+    assert "Page 3 of 5" not in text
+    assert "Unrelated reference" not in text
+
+
+def test_split_sentences_keeps_abbreviations():
+    assert split_sentences("Smith et al. found X. Fig. 2 shows Y. See e.g. Table 1.") == [
+        "Smith et al. found X.", "Fig. 2 shows Y.", "See e.g. Table 1."
+    ]
@@ -1,8 +1,13 @@
 # tests/test_database.py
 
+import json
 import uuid
+
+from sqlalchemy import text
+
 from utils.helpers import seed_default_data
-from utils.models import AnalysisProfile, Project
+from utils.models import AnalysisProfile, Project, Extraction, JSONDocument, SearchResult, ProjectStats
+from utils.project_stats import refresh_project_stats, SEARCH_RESULTS, EXTRACTIONS
 
 # La fixture `session` est automatiquement injectée par conftest.py
 
@@ -38,3 +43,76 @@ def test_seed_default_data_when_exists(db_session):
     # Assert: vérifier que le nombre d'entrées n'a pas changé
     assert db_session.query(AnalysisProfile).count() == count_profiles_before
     assert db_session.query(Project).count() == count_projects_before
+
+
+def test_json_document_accepts_legacy_json_strings():
+    """Les chaînes json.dumps() héritées sont décodées avant d'être stockées en JSONB."""
+    column_type = JSONDocument()
+
+    assert column_type.process_bind_param('{"a": 1}', None) == {"a": 1}
+    assert column_type.process_bind_param({"a": 1}, None) == {"a": 1}
+    assert column_type.process_bind_param("texte libre", None) == "texte libre"
+
+
+def test_json_document_decodes_legacy_strings_on_assignment():
+    """Affectée sur un modèle, une chaîne json.dumps() se relit immédiatement comme l'objet décodé."""
+    project = Project(name="JSON", analysis_result=json.dumps({"n_articles": 10}))
+    project.synthesis_result = json.dumps(["a", "b"])
+    project.knowledge_graph = "texte libre"
+
+    assert project.analysis_result == {"n_articles": 10}
+    assert project.synthesis_result == ["a", "b"]
+    assert project.knowledge_graph == "texte libre"
+    project.name = '{"pas": "json"}'
+    assert project.name == '{"pas": "json"}'
+
+
+def test_extracted_data_jsonb_filters_in_sql(db_session):
+    """extracted_data est filtrable côté base (containment JSONB)."""
+    project = Project(id=str(uuid.uuid4()), name="JSONB")
+    db_session.add(project)
+    db_session.flush()
+    db_session.add_all([
+        Extraction(project_id=project.id, pmid="1", extracted_data=json.dumps({"Type_IA": "Chatbot", "Score_empathie_IA": "75%"})),
+        Extraction(project_id=project.id, pmid="2", extracted_data={"Type_IA": "Avatar"}),
+    ])
+    db_session.flush()
+
+    pmids = db_session.execute(
+        text("SELECT pmid FROM extractions WHERE project_id = :pid AND extracted_data @> CAST(:filter AS jsonb)"),
+        {"pid": project.id, "filter": json.dumps({"Type_IA": "Chatbot"})}
+    ).scalars().all()
+
+    assert pmids == ["1"]
+    assert db_session.query(Extraction).filter_by(pmid="1", project_id=project.id).one().extracted_data["Score_empathie_IA"] == "75%"
+
+
+def test_project_stats_sections_are_refreshed_independently(db_session):
+    """project_stats agrège search_results et extractions ; chaque section ne touche que ses colonnes."""
+    project = Project(id=str(uuid.uuid4()), name="Stats")
+    db_session.add(project)
+    db_session.flush()
+    db_session.add_all([
+        SearchResult(project_id=project.id, article_id="1", database_source="pubmed"),
+        SearchResult(project_id=project.id, article_id="2", database_source="pubmed", duplicate_of="3"),
+        SearchResult(project_id=project.id, article_id="3", database_source="crossref"),
+        Extraction(project_id=project.id, pmid="1", relevance_score=10.0, user_validation_status="include"),
+        Extraction(project_id=project.id, pmid="3", relevance_score=5.0),
+        Extraction(project_id=project.id, pmid="4", relevance_score=0.0),
+    ])
+    db_session.flush()
+
+    refresh_project_stats(project.id, [SEARCH_RESULTS], bind=db_session)
+    stats = db_session.get(ProjectStats, project.id)
+    assert (stats.total_results, stats.unique_results, stats.duplicate_results) == (3, 2, 1)
+    assert stats.results_by_source == {"pubmed": 2, "crossref": 1}
+    assert stats.screened_count == 0
+
+    refresh_project_stats(project.id, [EXTRACTIONS], bind=db_session)
+    db_session.refresh(stats)
+    data = stats.to_dict()
+    assert stats.total_results == 3
+    assert data["decisions"] == {"include": 1, "pending": 2}
+    assert data["scores"]["mean"] == 5.0
+    assert data["scores"]["median"] == 5.0
+    assert data["scores"]["histogram"] == {"0": 1, "5": 1, "10": 1}
@@ -0,0 +1,86 @@
+# tests/test_deduplication.py
+import random
+import time
+
+from utils.deduplication import (
+    normalize_doi, normalize_pmid, normalize_arxiv_id, normalize_title, find_duplicates
+)
+
+TITLE = "Digital therapeutic alliance with conversational agents: a systematic review"
+
+
+def test_normalize_identifiers():
+    assert normalize_doi("https://doi.org/10.1000/ABC.123.") == "10.1000/abc.123"
+    assert normalize_doi("doi:10.1000/abc.123") == "10.1000/abc.123"
+    assert normalize_doi("not a doi") is None
+    assert normalize_pmid("PMID: 0012345") == "12345"
+    assert normalize_pmid("10.1000/abc") is None
+    assert normalize_arxiv_id("arXiv:2101.00001v3") == "2101.00001"
+    assert normalize_title("  Éthique &  <i>IA</i>: revue. ") == "ethique ia revue"
+
+
+def test_same_paper_from_three_sources_keeps_pubmed_record():
+    records = [
+        {"article_id": "10.1000/dta.2024", "title": TITLE, "doi": "10.1000/dta.2024", "database_source": "crossref"},
+        {"article_id": "38000001", "title": TITLE + ".", "doi": "https://doi.org/10.1000/DTA.2024", "database_source": "pubmed"},
+        {"article_id": "2401.01234v2", "title": TITLE.upper(), "doi": "", "database_source": "arxiv"},
+    ]
+
+    duplicates = find_duplicates(records)
+
+    assert duplicates == {"10.1000/dta.2024": "38000001", "2401.01234v2": "38000001"}
+
+
+def test_conflicting_dois_are_not_merged_on_title():
+    records = [
+        {"article_id": "a", "title": TITLE, "doi": "10.1000/one"},
+        {"article_id": "b", "title": TITLE, "doi": "10.1000/two"},
+        {"article_id": "c", "title": "Completely unrelated paper about cardiology outcomes", "doi": ""},
+    ]
+
+    assert find_duplicates(records) == {}
+
+
+def test_conflicting_dois_are_not_merged_through_a_record_without_doi():
+    records = [
+        {"article_id": "a", "title": TITLE, "doi": "10.1234/aaa"},
+        {"article_id": "b", "title": TITLE, "doi": ""},
+        {"article_id": "c", "title": TITLE, "doi": "10.1234/ccc"},
+    ]
+
+    duplicates = find_duplicates(records)
+
+    # b rejoint l'un des deux groupes, mais a et c restent deux publications distinctes
+    assert set(duplicates) == {"b"}
+    assert duplicates["b"] in {"a", "c"}
+
+
+def test_conflicting_dois_are_not_merged_on_shared_pmid():
+    records = [
+        {"article_id": "a", "title": TITLE, "doi": "10.1234/aaa", "pmid": "38000001"},
+        {"article_id": "b", "title": "Another title entirely", "doi": "10.1234/bbb", "pmid": "38000001"},
+    ]
+
+    assert find_duplicates(records) == {}
+
+
+def test_already_screened_record_stays_canonical():
+    records = [
+        {"article_id": "zotero_1", "title": TITLE, "screened": True},
+        {"article_id": "38000001", "title": TITLE, "database_source": "pubmed"},
+    ]
+
+    assert find_duplicates(records) == {"38000001": "zotero_1"}
+
+
+def test_lsh_scales_to_large_projects():
+    rng = random.Random(0)
+    vocabulary = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(3, 10))) for _ in range(3000)]
+    records = [{"article_id": str(i), "title": " ".join(rng.choice(vocabulary) for _ in range(10))} for i in range(5000)]
+    records.append({"article_id": "dup", "title": records[1234]["title"] + "."})
+
+    start = time.perf_counter()
+    duplicates = find_duplicates(records)
+
+    assert duplicates == {"dup": "1234"}
+    assert time.perf_counter() - start < 10
@@ -0,0 +1,159 @@
+# tests/test_downloads.py
+import hashlib
+import pytest
+from unittest.mock import MagicMock
+
+import utils.downloads
+from utils.downloads import download_to_file, download_pdf, get_http_session, DownloadTooLargeError
+
+PDF_BYTES = b'%PDF-1.4 ' + b'x' * 5000
+
+
+def _mock_response(body: bytes, status_code=200, content_type='application/pdf', content_length=True, headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = {'content-type': content_type, **(headers or {})}
+    if content_length:
+        response.headers['content-length'] = str(len(body))
+    response.iter_content.side_effect = lambda chunk_size: (body[i:i + chunk_size] for i in range(0, len(body), chunk_size))
+    response.__enter__.return_value = response
+    return response
+
+
+@pytest.fixture
+def mock_session(mocker):
+    session = MagicMock()
+    mocker.patch('utils.downloads.get_http_session', return_value=session)
+    return session
+
+
+def test_get_http_session_is_shared():
+    utils.downloads._sessions.clear()
+    assert get_http_session() is get_http_session()
+    assert get_http_session(max_retries=1) is not get_http_session()
+
+
+def test_download_streams_to_disk_with_checksum(mock_session, tmp_path):
+    mock_session.get.return_value = _mock_response(PDF_BYTES)
+    dest = tmp_path / "article.pdf"
+
+    result = download_to_file("http://example.com/a.pdf", dest, chunk_size=1024)
+
+    assert dest.read_bytes() == PDF_BYTES
+    assert not (tmp_path / "article.pdf.part").exists()
+    expected_sha = hashlib.sha256(PDF_BYTES).hexdigest()
+    assert result == {"path": str(dest), "size": len(PDF_BYTES), "sha256": expected_sha, "resumed": False}
+    assert (tmp_path / "article.pdf.sha256").read_text().startswith(expected_sha)
+    assert mock_session.get.call_args.kwargs['stream'] is True
+
+
+def test_download_rejects_announced_oversize(mock_session, tmp_path):
+    mock_session.get.return_value = _mock_response(PDF_BYTES)
+
+    with pytest.raises(DownloadTooLargeError):
+        download_to_file("http://example.com/a.pdf", tmp_path / "big.pdf", max_bytes=100)
+    assert not (tmp_path / "big.pdf").exists()
+
+
+def test_download_aborts_oversize_stream_without_content_length(mock_session, tmp_path):
+    mock_session.get.return_value = _mock_response(PDF_BYTES, content_length=False)
+
+    with pytest.raises(DownloadTooLargeError):
+        download_to_file("http://example.com/a.pdf", tmp_path / "big.pdf", max_bytes=2048, chunk_size=1024)
+    assert not (tmp_path / "big.pdf").exists()
+    assert not (tmp_path / "big.pdf.part").exists()
+
+
+def test_download_records_validator_for_resume(mock_session, tmp_path):
+    mock_session.get.return_value = _mock_response(b'x' * 10, headers={'etag': '"v1"'})
+    response = mock_session.get.return_value
+    response.iter_content.side_effect = lambda chunk_size: iter([PDF_BYTES[:1000], ConnectionError("coupure")])
+
+    assert download_to_file("http://example.com/a.pdf", tmp_path / "big.pdf") is None
+    assert (tmp_path / "big.pdf.part").read_bytes() == PDF_BYTES[:1000]
+    assert (tmp_path / "big.pdf.part.validator").read_text() == '"v1"'
+
+
+def test_download_resumes_partial_file(mock_session, tmp_path, mocker):
+    mocker.patch.object(utils.downloads.config, 'PDF_RESUME_MIN_SIZE_MB', 0)
+    (tmp_path / "big.pdf.part").write_bytes(PDF_BYTES[:1000])
+    (tmp_path / "big.pdf.part.validator").write_text('"v1"')
+    mock_session.get.return_value = _mock_response(PDF_BYTES[1000:], status_code=206)
+
+    result = download_to_file("http://example.com/a.pdf", tmp_path / "big.pdf")
+
+    assert mock_session.get.call_args.kwargs['headers'] == {'Range': 'bytes=1000-', 'If-Range': '"v1"'}
+    assert (tmp_path / "big.pdf").read_bytes() == PDF_BYTES
+    assert not (tmp_path / "big.pdf.part.validator").exists()
+    assert result["resumed"] is True
+    assert result["sha256"] == hashlib.sha256(PDF_BYTES).hexdigest()
+
+
+def test_download_restarts_when_range_ignored(mock_session, tmp_path, mocker):
+    mocker.patch.object(utils.downloads.config, 'PDF_RESUME_MIN_SIZE_MB', 0)
+    (tmp_path / "big.pdf.part").write_bytes(b'garbage')
+    (tmp_path / "big.pdf.part.validator").write_text('"v1"')
+    # If-Range non satisfait (fichier modifié en amont) : le serveur renvoie le fichier entier
+    mock_session.get.return_value = _mock_response(PDF_BYTES, status_code=200)
+
+    result = download_to_file("http://example.com/a.pdf", tmp_path / "big.pdf")
+
+    assert (tmp_path / "big.pdf").read_bytes() == PDF_BYTES
+    assert result["resumed"] is False
+
+
+def test_download_does_not_resume_without_validator(mock_session, tmp_path, mocker):
+    mocker.patch.object(utils.downloads.config, 'PDF_RESUME_MIN_SIZE_MB', 0)
+    (tmp_path / "big.pdf.part").write_bytes(b'garbage')
+    mock_session.get.return_value = _mock_response(PDF_BYTES)
+
+    download_to_file("http://example.com/a.pdf", tmp_path / "big.pdf")
+
+    assert mock_session.get.call_args.kwargs['headers'] == {}
+    assert (tmp_path / "big.pdf").read_bytes() == PDF_BYTES
+
+
+def test_download_finalizes_complete_partial_on_416(mock_session, tmp_path, mocker):
+    mocker.patch.object(utils.downloads.config, 'PDF_RESUME_MIN_SIZE_MB', 0)
+    (tmp_path / "big.pdf.part").write_bytes(PDF_BYTES)
+    (tmp_path / "big.pdf.part.validator").write_text('"v1"')
+    mock_session.get.return_value = _mock_response(b'', status_code=416,
+                                                   headers={'content-range': f'bytes */{len(PDF_BYTES)}'})
+
+    result = download_to_file("http://example.com/a.pdf", tmp_path / "big.pdf")
+
+    assert mock_session.get.call_count == 1
+    assert (tmp_path / "big.pdf").read_bytes() == PDF_BYTES
+    assert result["sha256"] == hashlib.sha256(PDF_BYTES).hexdigest()
+    assert not (tmp_path / "big.pdf.part").exists()
+
+
+def test_download_restarts_without_range_on_416(mock_session, tmp_path, mocker):
+    mocker.patch.object(utils.downloads.config, 'PDF_RESUME_MIN_SIZE_MB', 0)
+    (tmp_path / "big.pdf.part").write_bytes(b'x' * 9000)
+    (tmp_path / "big.pdf.part.validator").write_text('"v1"')
+    # Fichier distant raccourci : le partiel dépasse la nouvelle taille
+    mock_session.get.side_effect = [
+        _mock_response(b'', status_code=416, headers={'content-range': f'bytes */{len(PDF_BYTES)}'}),
+        _mock_response(PDF_BYTES),
+    ]
+
+    result = download_to_file("http://example.com/a.pdf", tmp_path / "big.pdf")
+
+    assert mock_session.get.call_args_list[1].kwargs['headers'] == {}
+    assert (tmp_path / "big.pdf").read_bytes() == PDF_BYTES
+    assert result["resumed"] is False
+
+
+def test_download_pdf_rejects_wrong_content_type(mock_session, tmp_path):
+    mock_session.get.return_value = _mock_response(b'<html></html>', content_type='text/html')
+
+    assert download_pdf("http://example.com/a.pdf", tmp_path / "a.pdf") is None
+    assert not (tmp_path / "a.pdf").exists()
+
+
+def test_download_pdf_swallows_oversize(mock_session, tmp_path, mocker):
+    mocker.patch.object(utils.downloads.config, 'PDF_MAX_SIZE_MB', 0)
+    mock_session.get.return_value = _mock_response(PDF_BYTES)
+
+    assert download_pdf("http://example.com/a.pdf", tmp_path / "a.pdf") is None
@@ -5,6 +5,7 @@ import time
 import uuid # Added import
 from unittest.mock import patch, MagicMock
 from utils.models import Project, SearchResult, Extraction, AnalysisProfile
+from backend.tasks_v4_complete import export_thesis_task
 
 # Ce test simule le workflow complet d'un utilisateur.
 # C'est la preuve la plus forte que votre application fonctionne comme un tout cohérent.
@@ -78,6 +79,13 @@ def test_full_end_to_end_workflow(client, db_session, setup_project):
         
     # === ÉTAPE 5: Export des résultats pour la thèse ===
     # L'export ne devrait contenir que l'article "inclus"
+    # La génération est une tâche de fond : on l'exécute ici de façon synchrone
+    with patch('api.projects.import_queue.enqueue', return_value=MagicMock(id="thesis-job")):
+        response = client.post(f'/api/projects/{project_id}/export/thesis')
+    assert response.status_code == 202
+    with patch('backend.tasks_v4_complete.send_project_notification'):
+        export_thesis_task.__wrapped__(project_id)
+
     response = client.get(f'/api/projects/{project_id}/export/thesis')
     assert response.status_code == 200
     assert response.mimetype == 'application/zip'
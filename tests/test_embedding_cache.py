@@ -0,0 +1,38 @@
+# tests/test_embedding_cache.py
+# Cache partagé des embeddings : réutilisation entre appels, doublons, isolation par modèle.
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from utils.embedding_cache import EmbeddingCache, encode_texts, text_key
+
+
+def fake_model():
+    model = MagicMock()
+    model.encode.side_effect = lambda texts, **kw: np.array([[len(t), 0.1, -2.0] for t in texts], dtype=np.float32)
+    return model
+
+
+def test_only_missing_texts_are_encoded(tmp_path):
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite3")
+    model = fake_model()
+
+    first = encode_texts(model, ["alpha", "beta", "alpha"], "model-a", cache=cache)
+    second = encode_texts(model, ["beta  ", "gamma", "alpha"], "model-a", cache=cache)
+
+    assert [c.args[0] for c in model.encode.call_args_list] == [["alpha", "beta"], ["gamma"]]
+    assert first.shape == (3, 3) and first.dtype == np.float32
+    np.testing.assert_array_equal(first[0], first[2])
+    np.testing.assert_array_equal(second[0], first[1])  # espaces normalisés : même clé
+    np.testing.assert_allclose(first[0], [5, 0.1, -2.0], rtol=1e-3)
+
+
+def test_cache_is_isolated_per_model(tmp_path):
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite3")
+    model = fake_model()
+
+    encode_texts(model, ["alpha"], "model-a", cache=cache)
+    encode_texts(model, ["alpha"], "model-b", cache=cache)
+
+    assert model.encode.call_count == 2
+    assert list(cache.get_many("model-b", [text_key("alpha")])) == [text_key("alpha")]
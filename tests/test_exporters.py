@@ -0,0 +1,112 @@
+# tests/test_exporters.py
+# Exports en streaming : mémoire bornée quel que soit le nombre de lignes.
+import csv
+import io
+import json
+import tracemalloc
+import uuid
+import zipfile
+
+import pytest
+
+from utils.exporters import (
+    CsvZipStreamWriter, ExcelStreamWriter, export_project_report, export_project_snapshot, flatten_extraction,
+    open_export_writer
+)
+from utils.models import Project, SearchResult, Extraction, ProcessingLog
+
+N_ROWS = 30000
+MEMORY_CEILING = 8 * 1024 * 1024  # les lignes générées pèsent ~60 Mo au total
+COLUMNS = ['article_id', 'title', 'abstract', 'relevance_score']
+
+
+def _rows(n=N_ROWS):
+    for i in range(n):
+        yield {"article_id": f"pmid_{i}", "title": f"Titre {i}", "abstract": f"Résumé {i} " + "x" * 2000,
+               "relevance_score": i % 10}
+
+
+@pytest.mark.parametrize("writer_cls", [ExcelStreamWriter, CsvZipStreamWriter])
+def test_stream_writer_memory_ceiling(tmp_path, writer_cls):
+    writer = writer_cls(tmp_path / f"report{writer_cls.suffix}")
+
+    tracemalloc.start()
+    count = writer.write_sheet('Search Results', COLUMNS, _rows())
+    writer.close()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert count == N_ROWS
+    assert peak < MEMORY_CEILING, f"Pic mémoire {peak / 1e6:.1f} Mo"
+
+
+def test_csv_export_round_trip(tmp_path):
+    writer = open_export_writer('csv', tmp_path / "report")
+    writer.write_sheet('Search Results', COLUMNS, _rows(3))
+    writer.close()
+
+    with zipfile.ZipFile(tmp_path / "report.zip") as archive:
+        content = archive.read('search_results.csv').decode('utf-8-sig')
+    rows = list(csv.DictReader(io.StringIO(content)))
+    assert [r['article_id'] for r in rows] == ['pmid_0', 'pmid_1', 'pmid_2']
+
+
+def test_flatten_extraction_accepts_legacy_strings():
+    flat = flatten_extraction({"pmid": "1", "extracted_data": '{"Type_IA": "Chatbot"}'}, ["Type_IA", "Population"])
+
+    assert flat["data.Type_IA"] == "Chatbot"
+    assert flat["data.Population"] is None
+
+
+def test_export_project_report_streams_from_database(db_session, tmp_path):
+    project = Project(id=str(uuid.uuid4()), name="Export")
+    db_session.add(project)
+    db_session.flush()
+    db_session.add_all([
+        SearchResult(project_id=project.id, article_id="1", title="A"),
+        SearchResult(project_id=project.id, article_id="2", title="B"),
+        Extraction(project_id=project.id, pmid="1", extracted_data={"Type_IA": "Chatbot"},
+                   validations={"evaluator1": "include"}, user_notes="À relire"),
+    ])
+    db_session.flush()
+
+    writer = open_export_writer('csv', tmp_path / "report")
+    counts = export_project_report(db_session, project.id, writer, batch_size=1)
+    writer.close()
+
+    assert counts == {'Search Results': 2, 'Extractions': 1, 'Risk of Bias': 0, 'Combined Data': 2}
+    with zipfile.ZipFile(tmp_path / "report.zip") as archive:
+        combined = list(csv.DictReader(io.StringIO(archive.read('combined_data.csv').decode('utf-8-sig'))))
+        extractions = list(csv.DictReader(io.StringIO(archive.read('extractions.csv').decode('utf-8-sig'))))
+    assert {r['article_id']: r['extraction.data.Type_IA'] for r in combined} == {"1": "Chatbot", "2": ""}
+    # Toutes les colonnes de la table sont exportées, y compris les décisions inter-évaluateurs
+    assert 'extracted_data' not in extractions[0]
+    assert json.loads(extractions[0]['validations']) == {"evaluator1": "include"}
+    assert extractions[0]['user_notes'] == "À relire"
+    assert 'query' in combined[0] and 'extraction.validations' in combined[0]
+
+
+def test_parquet_snapshot_is_typed_and_dictionary_encoded(db_session, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    project = Project(id=str(uuid.uuid4()), name="Snapshot")
+    db_session.add(project)
+    db_session.flush()
+    db_session.add_all([
+        SearchResult(project_id=project.id, article_id="1", title="A", database_source="pubmed"),
+        SearchResult(project_id=project.id, article_id="2", title="B", database_source="pubmed"),
+        Extraction(project_id=project.id, pmid="1", extracted_data={"Type_IA": "Chatbot"},
+                   atn_score=7.5, atn_category="ELEVE", atn_justifications=["alliance"]),
+        ProcessingLog(project_id=project.id, pmid="1", task_name="screening", status="ok"),
+    ])
+    db_session.flush()
+
+    counts = export_project_snapshot(db_session, project.id, tmp_path / "snapshot", batch_size=1)
+
+    assert counts == {'search_results': 2, 'extractions': 1, 'risk_of_bias': 0, 'processing_log': 1}
+    results = pq.read_table(tmp_path / "snapshot" / "search_results.parquet")
+    assert str(results.schema.field('database_source').type).startswith('dictionary')
+    assert str(results.schema.field('created_at').type) == 'timestamp[us]'
+    extractions = pq.read_table(tmp_path / "snapshot" / "extractions.parquet").to_pylist()
+    assert extractions[0]['atn_score'] == 7.5
+    assert extractions[0]['data.Type_IA'] == "Chatbot"
+    assert (tmp_path / "snapshot" / "manifest.json").exists()
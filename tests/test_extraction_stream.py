@@ -0,0 +1,45 @@
+# tests/test_extraction_stream.py
+# Extractions diffusées en flux : projection, filtres et sérialisation incrémentale.
+import json
+import uuid
+from decimal import Decimal
+
+import pytest
+
+from utils.extraction_stream import iter_json, parse_extraction_stream_args
+from utils.models import Extraction
+
+
+def test_iter_json_serializes_rows_incrementally():
+    rows = [{"pmid": "1", "atn_score": Decimal("7.5"), "extracted_data": None}, {"pmid": "2"}]
+
+    chunks = list(iter_json(iter(rows)))
+    assert json.loads("".join(chunks)) == [{"pmid": "1", "atn_score": 7.5, "extracted_data": {}}, {"pmid": "2"}]
+    assert [json.loads(line) for line in iter_json(iter(rows), ndjson=True)][1] == {"pmid": "2"}
+
+    with pytest.raises(ValueError):
+        parse_extraction_stream_args({"fields": "pmid,password"})
+    with pytest.raises(ValueError):
+        parse_extraction_stream_args({"min_score": "haut"})
+
+
+@pytest.mark.usefixtures("mock_redis_and_rq")
+def test_api_stream_extractions_ndjson_with_projection_and_filters(client, db_session, setup_project):
+    project_id = setup_project.id
+    db_session.add_all([
+        Extraction(id=str(uuid.uuid4()), project_id=project_id, pmid="p1", relevance_score=8,
+                   atn_category="ELEVE", extracted_data={"Type_IA": "Chatbot"}),
+        Extraction(id=str(uuid.uuid4()), project_id=project_id, pmid="p2", relevance_score=3, atn_category="ELEVE"),
+        Extraction(id=str(uuid.uuid4()), project_id=project_id, pmid="p3", relevance_score=9, atn_category="FAIBLE"),
+    ])
+    db_session.flush()
+
+    response = client.get(f'/api/projects/{project_id}/extractions'
+                          '?format=ndjson&fields=pmid,data.Type_IA&min_score=5&category=ELEVE')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines == [{"pmid": "p1", "data.Type_IA": "Chatbot"}]
+
+    assert client.get(f'/api/projects/{project_id}/extractions?fields=secret').status_code == 400
@@ -0,0 +1,58 @@
+# tests/test_hybrid_search.py
+# Recherche hybride du chat : BM25 (FTS5), fusion RRF avec la recherche vectorielle.
+from utils.hybrid_search import LexicalIndex, fts_query, hybrid_retrieve, query_terms, reciprocal_rank_fusion
+
+
+class DenseCollection:
+    """Collection dont la recherche vectorielle renvoie un classement fixé."""
+
+    def __init__(self, documents, dense_ranking):
+        self.documents = documents
+        self.dense_ranking = dense_ranking
+
+    def query(self, query_embeddings, n_results, include):
+        ids = self.dense_ranking[:n_results]
+        return {"ids": [ids], "documents": [[self.documents[i] for i in ids]], "metadatas": [[{"id": i} for i in ids]]}
+
+    def get(self, ids=None, include=None):
+        ids = list(self.documents) if ids is None else ids
+        return {"ids": ids, "documents": [self.documents[i] for i in ids], "metadatas": [{"id": i} for i in ids]}
+
+
+def test_fts_query_keeps_acronyms_and_drops_stopwords():
+    terms = query_terms('Quel est le score "WAI-SR" des DiGA ?')
+    assert terms == ["score", "wai-sr", "diga"]
+    assert fts_query(terms) == '"score" OR "wai-sr" OR "diga"'
+    assert fts_query(query_terms("et de la")) is None
+
+
+def test_reciprocal_rank_fusion_favours_agreement():
+    assert reciprocal_rank_fusion([["a", "b", "c"], ["b"]]) == ["b", "a", "c"]
+
+
+def test_hybrid_retrieve_finds_acronym_missed_by_dense_search(tmp_path):
+    documents = {
+        "s1": "The therapeutic alliance was measured at baseline.",
+        "s2": "Patients used a digital health application for twelve weeks.",
+        "s3": "Alliance was assessed with the WAI-SR questionnaire (12 items).",
+    }
+    collection = DenseCollection(documents, ["s1", "s2"])  # s3 absent des candidats vectoriels
+    lexical = LexicalIndex(tmp_path / "lexical.sqlite3")
+    assert lexical.sync_from(collection) == 3
+
+    passages, metadatas = hybrid_retrieve(collection, lexical, "WAI-SR scores?", [[0.1]], top_k=2)
+
+    # s3, trouvé par BM25 seul, passe devant s2, second de la recherche vectorielle
+    assert [m["id"] for m in metadatas] == ["s1", "s3"]
+    assert passages[1] == documents["s3"]
+
+
+def test_hybrid_retrieve_ignores_empty_pdf_markers(tmp_path):
+    documents = {"vide": "", "s1": "Empathy scores of the chatbot were high."}
+    collection = DenseCollection(documents, ["vide", "s1"])
+    lexical = LexicalIndex(tmp_path / "lexical.sqlite3")
+    lexical.sync_from(collection)
+
+    passages, metadatas = hybrid_retrieve(collection, lexical, "empathy", [[0.1]], top_k=2)
+
+    assert passages == [documents["s1"]]
@@ -4,7 +4,7 @@ import json
 from pathlib import Path
 import hashlib
 
-from utils.importers import ZoteroAbstractExtractor
+from utils.importers import ZoteroAbstractExtractor, iter_zotero_json_items
 
 @pytest.fixture
 def mock_json_file(tmp_path):
@@ -217,3 +217,34 @@ def test_process_items_returning_none(mock_md5, mock_json_file, mocker):
     assert extractor.stats["total"] == 2
     assert extractor.stats["errors"] == 1 # One error from the simulated hashlib.md5 error
     assert extractor.stats["duplicates"] == 0
+
+def test_iter_zotero_json_items_streams_items_key(mock_json_file):
+    data = {"config": {"nested": ["]", "{"]}, "items": [{"key": "A", "title": "T1"}, {"key": "B", "title": "T2"}], "version": 2}
+    file_path = mock_json_file(data)
+    # Un petit bloc de lecture force les items à chevaucher plusieurs lectures
+    items = list(iter_zotero_json_items(file_path, chunk_size=5))
+    assert items == data["items"]
+
+def test_iter_zotero_json_items_root_list_and_missing_items(mock_json_file):
+    assert list(iter_zotero_json_items(mock_json_file([{"key": "A"}, 12, "x"]))) == [{"key": "A"}, 12, "x"]
+    assert list(iter_zotero_json_items(mock_json_file({"other": []}, "no_items.json"))) == []
+
+def test_iter_zotero_json_items_malformed(tmp_path):
+    file_path = tmp_path / "broken.json"
+    file_path.write_text('{"items": [{"key": "A"} {"key": "B"}]}')
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_zotero_json_items(file_path))
+
+def test_iter_record_batches_dedups_across_batches(mock_json_file):
+    data = {"items": [
+        {"key": "A", "title": "Title 1", "date": "2020"},
+        {"key": "B", "title": "Title 2", "date": "2021"},
+        {"key": "C", "title": "Title 3", "date": "2022"},
+        {"key": "D", "title": "Title 1", "date": "2020"},  # Doublon du premier lot
+    ]}
+    extractor = ZoteroAbstractExtractor(str(mock_json_file(data)))
+    batches = list(extractor.iter_record_batches(batch_size=2))
+    assert [len(b) for b in batches] == [2, 1]
+    assert all("__hash" not in rec for batch in batches for rec in batch)
+    assert extractor.stats["total"] == 4
+    assert extractor.stats["duplicates"] == 1
@@ -78,6 +78,35 @@ def test_api_get_search_results_pagination(client, db_session, setup_project):
     assert data_p4['page'] == 4
     assert len(data_p4['results']) == 0 # Page vide
 
+@pytest.mark.usefixtures("mock_redis_and_rq")
+def test_api_get_search_results_keyset_pagination(client, db_session, setup_project):
+    """Parcourt les résultats via next_cursor : aucune ligne manquante ni dupliquée."""
+    project_id = setup_project.id
+    base = datetime(2024, 1, 1)
+    db_session.add_all([
+        SearchResult(id=str(uuid.uuid4()), project_id=project_id, article_id=f"PMID{i}",
+                     title=f"Article Titre {i:02d}", created_at=base + timedelta(minutes=i % 5))  # dates ex aequo
+        for i in range(25)
+    ])
+    db_session.flush()
+
+    seen, cursor = [], ''
+    while cursor is not None:
+        response = client.get(f'/api/projects/{project_id}/search-results?per_page=10&sort_by=created_at&cursor={cursor}')
+        assert response.status_code == 200
+        data = response.json
+        assert data['total'] == 25
+        assert 'total_pages' not in data
+        seen.extend(r['article_id'] for r in data['results'])
+        cursor = data['next_cursor']
+
+    assert len(seen) == 25
+    assert set(seen) == {f"PMID{i}" for i in range(25)}
+
+    response = client.get(f'/api/projects/{project_id}/search-results?sort_by=abstract')
+    assert response.status_code == 400
+    assert 'created_at' in response.json['allowed_sort_by']
+
 # =================================================================
 # 3. Tests pour l'Historique du Chat
 # =================================================================
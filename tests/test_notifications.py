@@ -120,4 +120,96 @@ def test_get_redis_connection_ping_fails(mocker, caplog):
     assert "Ping failed" in caplog.text
     
     # Réinitialise pour le prochain test
-    utils.notifications._redis_conn = None
\ No newline at end of file
+    utils.notifications._redis_conn = None
+
+
+# Test 8: fusion des notifications de progression
+def test_progress_notifications_are_coalesced(mocker):
+    import fakeredis
+    mocker.patch('utils.notifications.get_redis_connection', return_value=fakeredis.FakeRedis())
+    mocker.patch.object(utils.notifications.config, 'NOTIFICATION_RATE_LIMITS', {'article_processed': 60})
+    mocker.patch('utils.notifications._schedule_trailing')
+    mock_publish = mocker.patch('utils.notifications._publish_notification')
+
+    for i in range(100):
+        utils.notifications.send_project_notification("proj123", "article_processed", f"Article {i}", {"article_id": i})
+    utils.notifications.send_project_notification("proj123", "analysis_completed", "Terminé")
+
+    # Première notification, dernière notification retenue (fusion des 98 autres), puis la finale
+    payloads = [c.args[0] for c in mock_publish.call_args_list]
+    assert [(p["type"], p.get("article_id"), p.get("coalesced")) for p in payloads] == [
+        ("article_processed", 0, None), ("article_processed", 99, 98), ("analysis_completed", None, None)
+    ]
+
+
+# Test 9: publication différée en fin de fenêtre
+def test_trailing_notification_is_published_after_window(mocker):
+    import fakeredis
+    fake_redis = fakeredis.FakeRedis()
+    mocker.patch('utils.notifications.get_redis_connection', return_value=fake_redis)
+    mocker.patch.object(utils.notifications.config, 'NOTIFICATION_RATE_LIMITS', {'task_progress': 60})
+    mocker.patch('utils.notifications._schedule_trailing')
+    mock_publish = mocker.patch('utils.notifications._publish_notification')
+
+    for i in range(3):
+        utils.notifications.send_project_notification("proj123", "task_progress", f"{i}/3", {"current": i})
+    utils.notifications._flush_trailing("proj123", "task_progress", 60)
+    utils.notifications._flush_trailing("proj123", "task_progress", 60)  # plus rien en attente
+
+    assert [(c.args[0]["current"], c.args[0].get("coalesced")) for c in mock_publish.call_args_list] == [(0, None), (2, 1)]
+
+
+# Test 10: journal des notifications et reprise après reconnexion
+def test_notifications_can_be_replayed_from_last_event_id(mocker):
+    import fakeredis
+    mocker.patch('utils.notifications.get_redis_connection', return_value=fakeredis.FakeRedis())
+
+    for i in range(5):
+        utils.notifications.send_project_notification("proj123", "analysis_completed", f"Analyse {i}", {"n": i})
+    utils.notifications.send_project_notification("autre", "analysis_completed", "Autre projet")
+
+    history = utils.notifications.read_notifications("proj123")
+    assert [n["n"] for n in history["notifications"]] == [0, 1, 2, 3, 4]
+    # Le client a reçu les deux premières en direct : il reprend après la seconde
+    missed = utils.notifications.read_notifications("proj123", after=history["notifications"][1]["event_id"], limit=2)
+    assert [n["n"] for n in missed["notifications"]] == [2, 3]
+    assert missed["has_more"] is True and missed["truncated"] is False
+    rest = utils.notifications.read_notifications("proj123", after=missed["last_id"])
+    assert [n["n"] for n in rest["notifications"]] == [4]
+    assert rest["last_id"] == history["last_id"]
+
+    with pytest.raises(ValueError):
+        utils.notifications.read_notifications("proj123", after="abc")
+
+
+# Test 11: historique purgé au-delà de la position du client
+def test_replay_reports_truncated_history(mocker):
+    import fakeredis
+    fake_redis = fakeredis.FakeRedis()
+    mocker.patch('utils.notifications.get_redis_connection', return_value=fake_redis)
+
+    for i in range(5):
+        utils.notifications.send_project_notification("proj123", "analysis_completed", f"Analyse {i}", {"n": i})
+    first_id = utils.notifications.read_notifications("proj123")["notifications"][0]["event_id"]
+    fake_redis.xtrim(utils.notifications.notification_stream_key("proj123"), maxlen=2, approximate=False)
+
+    result = utils.notifications.read_notifications("proj123", after=first_id)
+    assert result["truncated"] is True
+    assert [n["n"] for n in result["notifications"]] == [3, 4]
+
+
+# Test 12: fin de tâche RQ, la progression retenue est publiée sans attendre la fenêtre
+def test_pending_notification_is_flushed_when_the_task_ends(mocker):
+    import fakeredis
+    mocker.patch('utils.notifications.get_redis_connection', return_value=fakeredis.FakeRedis())
+    mocker.patch.object(utils.notifications.config, 'NOTIFICATION_RATE_LIMITS', {'task_progress': 60})
+    mock_publish = mocker.patch('utils.notifications._publish_notification')
+
+    for i in range(3):
+        utils.notifications.send_project_notification("proj123", "task_progress", f"{i}/3", {"current": i})
+    assert utils.notifications._trailing_timers
+
+    utils.notifications.flush_pending_notifications()
+
+    assert not utils.notifications._trailing_timers
+    assert [(c.args[0]["current"], c.args[0].get("coalesced")) for c in mock_publish.call_args_list] == [(0, None), (2, 1)]
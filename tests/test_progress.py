@@ -0,0 +1,96 @@
+# tests/test_progress.py
+# Compteurs de progression Redis : les workers n'écrivent plus la ligne projects à chaque article.
+import fakeredis
+import pytest
+
+import utils.progress as progress
+
+
+@pytest.fixture
+def fake_progress(mocker):
+    mocker.patch('utils.app_globals.redis_conn', fakeredis.FakeRedis())
+    applied = []
+    mocker.patch.object(progress, '_apply_to_project', side_effect=lambda pid, n, d: applied.append((pid, n, d)) or True)
+    return applied
+
+
+def test_counters_are_flushed_at_most_once_per_interval(fake_progress):
+    progress.start_progress_run("p1", total=10)
+
+    for _ in range(5):
+        progress.record_article_processed("p1", duration=2.0)
+    progress.record_article_processed("p1", duration=1.0, error=True)
+
+    # Le premier article déclenche un flush, les suivants tombent dans l'intervalle
+    assert fake_progress == [("p1", 1, 2.0)]
+    state = progress.get_progress("p1")
+    assert state["processed"] == 6
+    assert state["errors"] == 1
+    assert state["processing_time"] == 11.0
+    assert state["unflushed_processed"] == 5
+    assert state["progress_percentage"] == 60.0
+
+
+def test_run_end_forces_flush_and_live_view_adds_unflushed(fake_progress):
+    progress.start_progress_run("p1", total=3)
+    progress.record_article_processed("p1", duration=1.0)
+    progress.record_article_processed("p1", duration=1.0)
+
+    project = progress.with_live_progress({"id": "p1", "processed_count": 1, "total_processing_time": 1.0})
+    assert project["processed_count"] == 2
+    assert project["progress"]["processed"] == 2
+
+    progress.record_article_processed("p1", duration=1.0)  # dernier article du run
+    assert sum(n for _, n, _ in fake_progress) == 3
+    assert progress.get_progress("p1")["unflushed_processed"] == 0
+
+
+def test_forced_flush_blocked_by_lock_is_run_by_holder(fake_progress, mocker):
+    """Fin de run pendant le flush d'un autre worker : le détenteur du verrou reprend le delta."""
+    mocker.patch.object(progress, 'FLUSH_LOCK_WAIT', 0.05)
+    progress.start_progress_run("p1", total=2)
+    applied = fake_progress
+    concurrent = []
+
+    def apply_while_another_worker_finishes(pid, n, d):
+        applied.append((pid, n, d))
+        if not concurrent:
+            # Le dernier article est compté par un autre worker pendant ce flush ; son flush forcé échoue
+            concurrent.append(progress.record_article_processed("p1", duration=1.0))
+        return True
+
+    progress._apply_to_project.side_effect = apply_while_another_worker_finishes
+    progress.record_article_processed("p1", duration=1.0)
+
+    assert concurrent == [False]
+    assert sum(n for _, n, _ in applied) == 2
+    assert progress.get_progress("p1")["unflushed_processed"] == 0
+    assert not progress.app_globals.redis_conn.exists(progress._pending_flush_key("p1"))
+
+
+def test_flush_does_not_release_a_lock_it_no_longer_owns(fake_progress):
+    redis_conn = progress.app_globals.redis_conn
+    progress.start_progress_run("p1", total=5)
+
+    def lock_expires_and_is_taken(pid, n, d):
+        redis_conn.set(progress._flush_mutex_key(pid), b"autre-worker")
+        return True
+
+    progress._apply_to_project.side_effect = lock_expires_and_is_taken
+    progress.record_article_processed("p1", duration=1.0)
+
+    assert redis_conn.get(progress._flush_mutex_key("p1")) == b"autre-worker"
+
+
+def test_completions_of_previous_wave_stay_in_their_run(fake_progress):
+    """Une vague lancée pendant que la première est en file ne reçoit pas ses articles."""
+    first = progress.start_progress_run("p1", total=2)
+    progress.record_article_processed("p1", duration=1.0, run_id=first)
+    second = progress.start_progress_run("p1", total=2)
+
+    progress.record_article_processed("p1", duration=1.0, run_id=first)
+
+    state = progress.get_progress("p1")
+    assert state["run_id"] == second
+    assert state["processed"] == 0
+    assert sum(n for _, n, _ in fake_progress) == 2  # fin du premier run : flush forcé
@@ -0,0 +1,106 @@
+# tests/test_query_plans.py
+# Régression des plans d'exécution : les requêtes chaudes ne doivent pas retomber en Seq Scan.
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from utils.bulk_loader import bulk_upsert
+
+N_PROJECTS = 20
+ROWS_PER_PROJECT = 5000  # 100k lignes au total par table chaude
+N_ANALYSIS_PROJECTS = 1000
+ANALYSIS_TYPES = [f"type_{i}" for i in range(10)]
+HOT_TABLES = {"search_results", "extractions", "processing_log", "analyses"}
+
+HOT_QUERIES = {
+    "extractions_relevant": """
+        SELECT pmid, relevance_score FROM extractions
+        WHERE project_id = :pid AND relevance_score >= 7
+    """,
+    "extractions_join_search_results": """
+        SELECT s.title, s.abstract FROM extractions e
+        JOIN search_results s ON e.project_id = s.project_id AND e.pmid = s.article_id
+        WHERE e.project_id = :pid AND e.relevance_score >= 7
+        ORDER BY e.relevance_score DESC LIMIT 30
+    """,
+    "screening_queue": """
+        SELECT sr.article_id, sr.title FROM search_results sr
+        LEFT JOIN extractions e ON sr.project_id = e.project_id AND sr.article_id = e.pmid
+        WHERE sr.project_id = :pid AND e.id IS NULL AND sr.duplicate_of IS NULL
+        ORDER BY sr.created_at
+    """,
+    "processing_log_by_project": """
+        SELECT status, details FROM processing_log
+        WHERE project_id = :pid ORDER BY "timestamp" DESC LIMIT 50
+    """,
+    "analysis_by_type": """
+        SELECT results FROM analyses WHERE project_id = :pid AND analysis_type = 'type_3'
+    """,
+}
+
+
+def _seq_scans(plan: dict) -> list:
+    """Liste les tables chaudes parcourues séquentiellement dans un plan EXPLAIN (FORMAT JSON)."""
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in HOT_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(_seq_scans(child))
+    return found
+
+
+@pytest.fixture
+def seeded_project(db_session):
+    """Seed de 100k search_results / extractions / processing_log répartis sur 20 projets."""
+    now = datetime.now()
+    project_ids = [str(uuid.uuid4()) for _ in range(N_ANALYSIS_PROJECTS)]
+    bulk_upsert(db_session, 'projects', [{"id": pid, "name": f"Plan {i}"} for i, pid in enumerate(project_ids)],
+                conflict_columns=['id'])
+
+    search_results, extractions, logs = [], [], []
+    for pid in project_ids[:N_PROJECTS]:
+        for i in range(ROWS_PER_PROJECT):
+            aid = f"{i:06d}"
+            created = now - timedelta(seconds=i)
+            search_results.append({"id": str(uuid.uuid4()), "project_id": pid, "article_id": aid, "title": f"Article {i}",
+                                   "abstract": "Résumé", "created_at": created, "duplicate_of": aid if i % 10 == 0 and i else None})
+            if i % 2:
+                extractions.append({"id": str(uuid.uuid4()), "project_id": pid, "pmid": aid, "title": f"Article {i}",
+                                    "relevance_score": i % 11, "created_at": created})
+            logs.append({"id": str(uuid.uuid4()), "project_id": pid, "pmid": aid, "task_name": "process_article",
+                         "status": "completed", "details": "", "timestamp": created})
+    analyses = [{"id": str(uuid.uuid4()), "project_id": pid, "analysis_type": t, "results": "{}", "created_at": now}
+                for pid in project_ids for t in ANALYSIS_TYPES]
+
+    bulk_upsert(db_session, 'search_results', search_results, conflict_columns=['project_id', 'article_id'])
+    bulk_upsert(db_session, 'extractions', extractions, conflict_columns=['project_id', 'pmid'])
+    bulk_upsert(db_session, 'processing_log', logs, conflict_columns=['id'])
+    bulk_upsert(db_session, 'analyses', analyses, conflict_columns=['project_id', 'analysis_type'])
+    for table in HOT_TABLES:
+        db_session.execute(text(f"ANALYZE {table}"))
+    return project_ids[0]
+
+
+@pytest.mark.slow
+@pytest.mark.timeout(600)
+def test_hot_queries_use_indexes(db_session, seeded_project):
+    regressions = {}
+    for name, sql in HOT_QUERIES.items():
+        plan = db_session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), {"pid": seeded_project}).scalar_one()
+        scans = _seq_scans(plan[0]["Plan"])
+        if scans:
+            regressions[name] = scans
+
+    assert not regressions, f"Seq Scan sur des tables chaudes: {regressions}"
+
+
+def test_seq_scan_detection():
+    plan = {"Node Type": "Hash Join", "Plans": [
+        {"Node Type": "Seq Scan", "Relation Name": "extractions"},
+        {"Node Type": "Hash", "Plans": [{"Node Type": "Index Scan", "Relation Name": "search_results"}]},
+        {"Node Type": "Seq Scan", "Relation Name": "projects"},
+    ]}
+
+    assert _seq_scans(plan) == ["extractions"]
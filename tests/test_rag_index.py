@@ -0,0 +1,101 @@
+# tests/test_rag_index.py
+# Pipeline d'indexation RAG : lots bornés, extraction parallèle, reprise après interruption.
+from pathlib import Path
+
+from utils import rag_index
+from utils.chunker import Chunk
+from utils.rag_index import (
+    CHUNKER_VERSION, chunk_id, empty_file_id, file_content_hash, indexed_files, iter_chunk_batches, iter_extracted_files,
+    plan_incremental_index
+)
+
+
+def read_as_text(path: str) -> str:
+    """Extracteur de test (fonction de premier niveau, sérialisable vers le pool de processus)."""
+    return Path(path).read_text()
+
+
+class MetadataCollection:
+    def __init__(self, metadatas):
+        self.metadatas = metadatas
+
+    def get(self, include=None):
+        return {"ids": [f"id{i}" for i in range(len(self.metadatas))], "metadatas": self.metadatas}
+
+
+def test_chunk_batches_are_bounded_and_report_completed_files():
+    extracted = [(Path("a.pdf"), "h" * 64, [Chunk("a", 1, 1)] * 3), (Path("b.pdf"), "g" * 64, [Chunk("b", 2, 3)] * 4)]
+
+    batches = list(iter_chunk_batches(iter(extracted), batch_size=3))
+
+    assert [len(batch) for batch, _ in batches] == [3, 3, 1]
+    assert [files_done for _, files_done in batches] == [1, 1, 2]
+    assert batches[1][0][0].id == chunk_id("b.pdf", "g" * 64, 0)
+    assert batches[2][0][0].metadata["chunk_count"] == 4
+    assert batches[2][0][0].metadata["page_end"] == 3
+
+
+def test_extraction_pool_preserves_order(tmp_path):
+    items = []
+    for name in ("a", "b", "c", "d", "e"):
+        path = tmp_path / f"{name}.pdf"
+        path.write_text(f"{name} " * 300)
+        items.append((path, name))
+
+    results = list(iter_extracted_files(items, read_as_text, workers=2))
+
+    assert [path.name for path, _, _ in results] == ["a.pdf", "b.pdf", "c.pdf", "d.pdf", "e.pdf"]
+    assert all(chunks and chunks[0].text.startswith(h) for _, h, chunks in results)
+
+
+def test_extraction_runs_serially_when_gevent_patched_threading(tmp_path, monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("ProcessPoolExecutor ne doit pas être créé sous gevent")
+
+    monkeypatch.setattr(rag_index, "_threads_patched_by_gevent", lambda: True)
+    monkeypatch.setattr(rag_index, "ProcessPoolExecutor", no_pool)
+    items = []
+    for name in ("a", "b", "c"):
+        path = tmp_path / f"{name}.pdf"
+        path.write_text(f"{name} " * 300)
+        items.append((path, name))
+
+    results = list(iter_extracted_files(items, read_as_text, workers=2))
+
+    assert [path.name for path, _, _ in results] == ["a.pdf", "b.pdf", "c.pdf"]
+
+
+def test_interrupted_file_is_reindexed(tmp_path):
+    pdf = tmp_path / "a.pdf"
+    pdf.write_bytes(b"contenu")
+    content_hash = file_content_hash(pdf)
+    # Seuls 2 des 3 segments ont été insérés avant l'interruption
+    collection = MetadataCollection([{"filename": "a.pdf", "content_hash": content_hash, "chunk_count": 3,
+                                      "chunker_version": CHUNKER_VERSION}] * 2)
+
+    plan = plan_incremental_index([pdf], indexed_files(collection))
+
+    assert [path for path, _ in plan.to_index] == [pdf]
+    assert plan.obsolete_ids == ["id0", "id1"]
+
+
+def test_pdf_without_text_is_marked_and_skipped_while_unchanged(tmp_path):
+    pdf = tmp_path / "scan.pdf"
+    pdf.write_bytes(b"image seule")
+    content_hash = file_content_hash(pdf)
+
+    batches = list(iter_chunk_batches(iter([(pdf, content_hash, []), (tmp_path / "echec.pdf", "e" * 64, None)])))
+
+    # Extraction vide : un marqueur ; extraction en échec : rien, le fichier sera retenté
+    [(batch, files_done)] = batches
+    assert files_done == 2
+    assert [record.id for record in batch] == [empty_file_id("scan.pdf", content_hash)]
+    assert batch[0].document == ""
+
+    plan = plan_incremental_index([pdf], indexed_files(MetadataCollection([batch[0].metadata])))
+    assert plan.is_empty and plan.unchanged == 1
+
+    pdf.write_bytes(b"nouvelle version avec texte")
+    plan = plan_incremental_index([pdf], indexed_files(MetadataCollection([batch[0].metadata])))
+    assert [path for path, _ in plan.to_index] == [pdf]
+    assert plan.obsolete_ids == ["id0"]
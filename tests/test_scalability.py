@@ -90,7 +90,7 @@ def test_analysis_task_on_large_dataset(db_session, large_project, mocker):
     project_from_db.analysis_result = json.dumps({"n_articles": 10000, "mean_score": 7.5})
 
     assert project_from_db.analysis_result is not None, "La tâche d'analyse n'a pas écrit de résultat."
-    results = json.loads(project_from_db.analysis_result)
+    results = project_from_db.analysis_result
     
     assert results['n_articles'] == 10000
     assert results['mean_score'] == pytest.approx(7.5)
@@ -263,6 +263,35 @@ def test_api_post_chat_message_enqueues_task(mock_enqueue, client, db_session):
     response_data = json.loads(response.data) # type: ignore
     assert response_data['job_id'] == "mocked_chat_job_456" # La réponse du serveur est bien 'job_id'
 
+@patch('api.projects.stream_ollama_api', return_value=iter(["La WAI-SR ", "mesure l'alliance."]))
+@patch('api.projects.prepare_chat_prompt', return_value=("prompt RAG", None, None))
+@pytest.mark.usefixtures("mock_redis_and_rq")
+def test_api_chat_stream_sends_tokens_and_saves_answer(mock_prepare, mock_stream, client, db_session):
+    """
+    Teste le chat en streaming : jetons relayés en Server-Sent Events sans passer par RQ,
+    réponse complète enregistrée dans chat_messages à la fin du flux.
+    """
+    # ARRANGE
+    resp = client.post('/api/projects', data=json.dumps({'name': 'API Test Chat Stream', 'mode': 'screening'}), content_type='application/json')
+    project_id = json.loads(resp.data)['id']
+
+    # ACT
+    response = client.post(f'/api/projects/{project_id}/chat/stream', data=json.dumps({"question": "WAI-SR ?"}), content_type='application/json')
+    body = response.get_data(as_text=True)
+
+    # ASSERT
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    events = [block.split("\n") for block in body.strip().split("\n\n")]
+    assert [lines[0] for lines in events] == ["event: token", "event: token", "event: done"]
+    assert json.loads(events[-1][1][len("data: "):]) == {"answer": "La WAI-SR mesure l'alliance."}
+    mock_prepare.assert_called_once_with(project_id, "WAI-SR ?")
+
+    messages = db_session.execute(
+        text("SELECT role, content FROM chat_messages WHERE project_id = :pid ORDER BY role DESC"), {"pid": project_id}
+    ).all()
+    assert [tuple(m) for m in messages] == [("user", "WAI-SR ?"), ("assistant", "La WAI-SR mesure l'alliance.")]
+
 # =================================================================
 # === DÉBUT DES NOUVEAUX TESTS AJOUTÉS (Couverture restante) ===
 # =================================================================
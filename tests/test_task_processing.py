@@ -32,6 +32,10 @@ from unittest import mock
 # --- Imports des modèles et tâches ---
 from utils.models import Project, SearchResult, Extraction, Grid, ChatMessage, AnalysisProfile, RiskOfBias
 from utils.file_handlers import sanitize_filename # <-- CORRECTION 4 : IMPORT MANQUANT AJOUTÉ
+from utils.chunker import approx_token_count
+from utils.embedding_cache import EmbeddingCache
+from utils.hybrid_search import LexicalIndex
+from utils.answer_cache import AnswerCache
 
 # Bloc d'importation consolidé
 from backend.tasks_v4_complete import (
@@ -52,6 +56,7 @@ from backend.tasks_v4_complete import (
     calculate_kappa_task,
     index_project_pdfs_task,
     fetch_online_pdf_task,
+    increment_processed_count,
     PROJECTS_DIR
 )
 
@@ -66,15 +71,13 @@ def mock_embedding_model(mocker):
     Les tests ayant des besoins différents (comme l'indexation RAG) doivent prendre cette fixture
     en argument et la reconfigurer localement.
     """
-    # 1. Comportement par défaut (pour RAG Chat, etc.)
-    mock_result_default = MagicMock()
-    mock_result_default.tolist.return_value = [[0.1] * 384] # Vecteur 2D
-    
+    # 1. Comportement par défaut (pour RAG Chat, etc.) : un vecteur par texte encodé
     mock_instance = MagicMock()
-    mock_instance.encode.return_value = mock_result_default
+    mock_instance.encode.side_effect = lambda texts, **kw: np.full((len(texts), 384), 0.1, dtype=np.float32)
     
-    # 2. Appliquer le patch pour la durée de chaque test
+    # 2. Appliquer le patch pour la durée de chaque test (sans cache d'embeddings partagé)
     patcher = mocker.patch('backend.tasks_v4_complete.embedding_model', mock_instance, create=True)
+    mocker.patch('utils.embedding_cache.get_embedding_cache', return_value=None)
     
     yield mock_instance
     
@@ -226,7 +229,7 @@ def test_process_single_article_task_full_extraction_with_pdf_and_grid(db_sessio
 
     assert result is not None
     assert result['analysis_source'] == "pdf"
-    assert json.loads(result['extracted_data']) == mock_ai_response
+    assert result['extracted_data'] == mock_ai_response
     
     assert mock_ollama_api.call_count == 2
     
@@ -325,7 +328,7 @@ def test_run_synthesis_task_filters_by_score(db_session, mocker):
     updated_project = db_session.get(Project, project_id)
     db_session.refresh(updated_project)
     assert updated_project.status == 'completed'
-    assert json.loads(updated_project.synthesis_result) == mock_ai_response
+    assert updated_project.synthesis_result == mock_ai_response
 
 @pytest.mark.gpu
 def test_run_discussion_generation_task(db_session, mocker):
@@ -402,7 +405,7 @@ def test_run_atn_stakeholder_analysis_task_aggregation_logic(db_session, mocker)
     # ASSERT
     updated_project = db_session.get(Project, project_id)
     assert updated_project.status == 'completed'
-    result = json.loads(updated_project.analysis_result)
+    result = updated_project.analysis_result
     
     assert result['total_studies'] == 2
     assert result['atn_metrics']['empathy_analysis']['mean_ai_empathy'] == 7.0 
@@ -448,6 +451,30 @@ def test_add_manual_articles_task_ignores_duplicates(db_session, mocker):
     assert "Article récupéré" in titles
 
 
+
+def test_add_manual_articles_task_enqueues_only_inserted(db_session, mocker):
+    """Seuls les articles réellement insérés reçoivent une tâche d'analyse."""
+    project_id = str(uuid.uuid4())
+    db_session.add(Project(id=project_id, name="Test Manual Bulk"))
+    db_session.flush()
+    db_session.add(SearchResult(id=str(uuid.uuid4()), project_id=project_id, article_id="12345", title="Existant"))
+    db_session.flush()
+
+    mocker.patch('backend.tasks_v4_complete.send_project_notification')
+    mock_enqueue = mocker.patch('backend.tasks_v4_complete.analysis_queue.enqueue')
+    items = [
+        {"article_id": "12345", "title": "Existant (doublon)"},
+        {"article_id": "67890", "title": "Nouvel article"},
+        {"article_id": "67890", "title": "Répété dans le lot"},
+    ]
+
+    result = add_manual_articles_task.__wrapped__(project_id, items)
+
+    assert result == {"inserted": ["67890"], "skipped": 1}
+    assert mock_enqueue.call_count == 1
+    assert mock_enqueue.call_args.kwargs['args'][1]["title"] == "Nouvel article"
+    assert db_session.query(SearchResult).filter_by(project_id=project_id).count() == 2
+
 @pytest.mark.gpu
 def test_answer_chat_question_task_rag_logic(db_session, mocker, mock_embedding_model):
     """
@@ -461,21 +488,18 @@ def test_answer_chat_question_task_rag_logic(db_session, mocker, mock_embedding_
     db_session.add(project)
     db_session.flush()
 
-    mock_query_results = {'documents': [["Contexte trouvé sur le sujet A."]]}
-    mock_embedding_vector_list = [[0.1, 0.2, 0.3]] # Ce que .tolist() DOIT retourner (2D)
+    mock_query_results = {'ids': [["seg-a"]], 'documents': [["Contexte trouvé sur le sujet A."]], 'metadatas': [[{}]]}
+    mock_embedding_vector_list = [[0.5, 0.25, 0.125]] # Valeurs exactes en float16 (précision du cache)
     mock_ai_response = "Réponse basée sur le Contexte A."
 
-    mock_chroma_instance = MagicMock()
     mock_collection = MagicMock()
     mock_collection.query.return_value = mock_query_results
-    mock_chroma_instance.get_collection.return_value = mock_collection
-
-    mocker.patch('backend.tasks_v4_complete.chromadb.Client', return_value=mock_chroma_instance)
+    mock_get_collection = mocker.patch('backend.tasks_v4_complete.get_project_collection', return_value=mock_collection)
+    mocker.patch('backend.tasks_v4_complete.get_lexical_index', return_value=None)  # projet indexé avant BM25
+    mocker.patch('utils.answer_cache.get_answer_cache', return_value=None)
 
     # Configurer le mock (fourni par la fixture autouse) pour ce test spécifique
-    mock_encode_return = MagicMock()
-    mock_encode_return.tolist.return_value = mock_embedding_vector_list # RAG attend une liste 2D
-    mock_embedding_model.encode.return_value = mock_encode_return 
+    mock_embedding_model.encode.side_effect = lambda texts, **kw: np.array(mock_embedding_vector_list)
 
     mock_ollama_api = mocker.patch('backend.tasks_v4_complete.call_ollama_api', return_value=mock_ai_response)
 
@@ -487,13 +511,14 @@ def test_answer_chat_question_task_rag_logic(db_session, mocker, mock_embedding_
     db_session.flush()
 
     # ASSERT
-    mock_chroma_instance.get_collection.assert_called_once_with(name=f"project_{project_id}")
-    mock_embedding_model.encode.assert_called_once_with([question])
-    mock_encode_return.tolist.assert_called_once()
+    mock_get_collection.assert_called_once_with(project_id)
+    mock_embedding_model.encode.assert_called_once()
+    assert mock_embedding_model.encode.call_args.args[0] == [question]
 
     mock_collection.query.assert_called_once_with(
         query_embeddings=mock_embedding_vector_list,
-        n_results=3
+        n_results=20,
+        include=['documents', 'metadatas']
     )
     
     mock_ollama_api.assert_called_once()
@@ -504,6 +529,58 @@ def test_answer_chat_question_task_rag_logic(db_session, mocker, mock_embedding_
     messages = db_session.query(ChatMessage).filter_by(project_id=project_id).all()
     assert len(messages) == 2
 
+@pytest.mark.gpu
+def test_answer_chat_question_task_semantic_cache(db_session, mocker, mock_embedding_model, tmp_path):
+    """
+    Une question quasi identique reposée sur le même index est servie par le cache sémantique
+    (sans recherche ni appel au LLM) ; une réindexation invalide la réponse en cache.
+    """
+    # ARRANGE
+    project_id = str(uuid.uuid4())
+    db_session.add(Project(id=project_id, name="Chat Cache Project"))
+    db_session.flush()
+
+    mock_collection = MagicMock()
+    mock_collection.query.return_value = {'ids': [["seg-a"]], 'documents': [["Le JSPE mesure l'empathie."]], 'metadatas': [[{}]]}
+    mocker.patch('backend.tasks_v4_complete.get_project_collection', return_value=mock_collection)
+    mocker.patch('backend.tasks_v4_complete.get_lexical_index', return_value=None)
+    mocker.patch('utils.answer_cache.get_answer_cache', return_value=AnswerCache(tmp_path / "answer_cache.sqlite3"))
+    mock_generation = mocker.patch('utils.answer_cache.index_generation', return_value=1)
+    mock_ollama_api = mocker.patch('backend.tasks_v4_complete.call_ollama_api', side_effect=["Le JSPE.", "Le JSPE et l'IRI."])
+
+    # ACT
+    first = answer_chat_question_task(db_session, project_id, "Quels instruments mesurent l'empathie ?")
+    second = answer_chat_question_task(db_session, project_id, "quels instruments mesurent l'empathie?")
+    mock_generation.return_value = 2  # le projet a été réindexé
+    third = answer_chat_question_task(db_session, project_id, "Quels instruments mesurent l'empathie ?")
+
+    # ASSERT
+    assert (first, second, third) == ("Le JSPE.", "Le JSPE.", "Le JSPE et l'IRI.")
+    assert mock_ollama_api.call_count == 2
+    assert mock_collection.query.call_count == 2
+    assert db_session.query(ChatMessage).filter_by(project_id=project_id).count() == 6
+
+
+def test_answer_chat_question_task_does_not_cache_empty_answer(db_session, mocker, mock_embedding_model, tmp_path):
+    """Une réponse vide du LLM n'est pas mise en cache : la même question refait appel au LLM."""
+    project_id = str(uuid.uuid4())
+    db_session.add(Project(id=project_id, name="Chat Empty Answer"))
+    db_session.flush()
+
+    mock_collection = MagicMock()
+    mock_collection.query.return_value = {'ids': [["seg-a"]], 'documents': [["Le JSPE mesure l'empathie."]], 'metadatas': [[{}]]}
+    mocker.patch('backend.tasks_v4_complete.get_project_collection', return_value=mock_collection)
+    mocker.patch('backend.tasks_v4_complete.get_lexical_index', return_value=None)
+    mocker.patch('utils.answer_cache.get_answer_cache', return_value=AnswerCache(tmp_path / "answer_cache.sqlite3"))
+    mocker.patch('utils.answer_cache.index_generation', return_value=1)
+    mock_ollama_api = mocker.patch('backend.tasks_v4_complete.call_ollama_api', side_effect=["  ", "Le JSPE."])
+
+    answer_chat_question_task(db_session, project_id, "Quels instruments mesurent l'empathie ?")
+    second = answer_chat_question_task(db_session, project_id, "Quels instruments mesurent l'empathie ?")
+
+    assert second == "Le JSPE."
+    assert mock_ollama_api.call_count == 2
+
 def test_import_pdfs_from_zotero_task(db_session, mocker):
     """
     Teste la tâche d'import PDF Zotero.
@@ -629,7 +706,7 @@ def test_run_knowledge_graph_task(db_session, mocker):
     
     updated_project = db_session.get(Project, project_id)
     assert updated_project.status == 'completed'
-    assert json.loads(updated_project.knowledge_graph) == mock_graph_json
+    assert updated_project.knowledge_graph == mock_graph_json
     mock_notify.assert_called_once_with(project_id, 'analysis_completed', mocker.ANY, {'analysis_type': 'knowledge_graph'})
 
 def test_run_prisma_flow_task(db_session, mocker):
@@ -699,7 +776,7 @@ def test_run_meta_analysis_task(db_session, mocker):
     db_session.refresh(updated_project)
     assert updated_project.status == 'completed'
     
-    result = json.loads(updated_project.analysis_result)
+    result = updated_project.analysis_result
     assert result['n_articles'] == 3
     assert result['mean_score'] == pytest.approx(8.0)
     assert result['stddev'] == pytest.approx(1.0)
@@ -728,7 +805,7 @@ def test_run_descriptive_stats_task(db_session, mocker):
     updated_project = db_session.get(Project, project_id)
     assert updated_project.status == 'completed'
     
-    result = json.loads(updated_project.analysis_result)
+    result = updated_project.analysis_result
     assert result['total_extractions'] == 3
     assert result['mean_score'] == pytest.approx(5.0)
     assert result['median_score'] == pytest.approx(5.0)
@@ -766,7 +843,7 @@ def test_run_atn_score_task(db_session, mocker):
     # ASSERT
     mock_savefig.assert_called_once()
     updated_project = db_session.get(Project, project_id)
-    result = json.loads(updated_project.analysis_result)
+    result = updated_project.analysis_result
 
     assert result['total_articles_scored'] == 2
     assert result['mean_atn'] == pytest.approx((10 + 0) / 2, 0.1)
@@ -807,7 +884,7 @@ def test_calculate_kappa_task(db_session, mocker):
     # ASSERT
     updated_project = db_session.get(Project, project_id)
     db_session.refresh(updated_project)
-    result = json.loads(updated_project.inter_rater_reliability)
+    result = updated_project.inter_rater_reliability
     
     # Calcul manuel:
     # E1: [1, 1, 0]
@@ -820,72 +897,83 @@ def test_calculate_kappa_task(db_session, mocker):
     assert result['interpretation'] == "Accord passable"
     mock_notify.assert_called_once()
 
+class FakeCollection:
+    """Collection Chroma minimale (get / upsert / delete) pour les tests d'indexation."""
+
+    def __init__(self):
+        self.items = {}
+
+    def get(self, ids=None, include=None):
+        ids = list(self.items) if ids is None else ids
+        return {"ids": ids, "documents": [self.items[i][0] for i in ids], "metadatas": [self.items[i][1] for i in ids]}
+
+    def upsert(self, documents, embeddings, ids, metadatas):
+        for seg_id, doc, meta in zip(ids, documents, metadatas):
+            self.items[seg_id] = (doc, meta)
+
+    def delete(self, ids):
+        for seg_id in ids:
+            self.items.pop(seg_id, None)
+
+
 @pytest.mark.gpu
-def test_index_project_pdfs_task(db_session, mocker, mock_embedding_model):
+def test_index_project_pdfs_task(db_session, mocker, mock_embedding_model, tmp_path):
     """
-    Teste l'indexation RAG (ChromaDB).
-    Ce test RECONFIGURE le mock 'mock_embedding_model' (fourni par la fixture)
-    pour correspondre aux attentes (incorrectes) de CETTE tâche (vecteur 1D).
+    Teste l'indexation RAG incrémentale : un second passage ne réencode que les PDFs
+    ajoutés ou modifiés et retire les segments des PDFs supprimés.
     """
     # ARRANGE
-    project_id = str(uuid.uuid4()) # Déjà unique.
-    project = Project(id=project_id, name="Test Index RAG")
-    db_session.add(project)
+    project_id = str(uuid.uuid4())
+    db_session.add(Project(id=project_id, name="Test Index RAG"))
     db_session.flush()
 
-    # Mocks pour ChromaDB
-    mock_chroma_instance = MagicMock()
-    mock_collection = MagicMock()
-    mock_chroma_instance.get_or_create_collection.return_value = mock_collection
-    mocker.patch('backend.tasks_v4_complete.chromadb.Client', return_value=mock_chroma_instance)
-    
-    # Mocks pour les fichiers
-    mock_pdf_path = MagicMock(spec=Path)
-    mock_pdf_path.stem = "mock_pdf_stem"
-    mock_pdf_path.name = "mock_pdf.pdf"
-    mocker.patch('backend.tasks_v4_complete.Path.exists', return_value=True)
-    
-    total_pdfs = len(mocker.patch('backend.tasks_v4_complete.Path.glob', return_value=[mock_pdf_path]).return_value) # Define total_pdfs
-
-    # Mock lecture PDF (assez long pour 18 chunks, basé sur le log d'échec précédent)
-    mock_text = ("Chunk texte. " * 200) * 7 # Env. 18200 chars -> 18 chunks
-    mocker.patch('backend.tasks_v4_complete.extract_text_from_pdf', return_value=mock_text)
-
-    # --- CORRECTION DU MOCK EMBEDDING (ISOLATION) ---
-    # Nous reconfigurons le mock fourni par la fixture 'mock_embedding_model'
-    
-    # 1. Créer l'objet de retour (simulant un array numpy)
-    mock_np_array_return_2D = MagicMock()
-    # 2. CORRECTION: Configurer tolist() pour retourner une LISTE DE VECTEURS (2D).
-    # La tâche attend une liste d'embeddings, un pour chaque chunk.
-    mock_np_array_return_2D.tolist.return_value = [[0.123] * 384 for _ in range(18)]
-    
-    # 3. Configurer le mock 'encode' (fourni par la fixture) pour TOUJOURS retourner cet objet
-    mock_embedding_model.encode.return_value = mock_np_array_return_2D
-    # --- FIN CORRECTION MOCK ---
-    
+    project_dir = tmp_path / project_id
+    project_dir.mkdir()
+    for name in ("a.pdf", "b.pdf", "c.pdf"):
+        (project_dir / name).write_bytes(name.encode())
+    mocker.patch('backend.tasks_v4_complete.PROJECTS_DIR', tmp_path)
+
+    collection = FakeCollection()
+    mock_writer = mocker.patch('backend.tasks_v4_complete.project_store_writer')
+    mock_writer.return_value.__enter__.return_value = collection
+    lexical = LexicalIndex(tmp_path / "lexical.sqlite3")
+    mocker.patch('backend.tasks_v4_complete.get_lexical_index', return_value=lexical)
+
+    mock_pages = ["Chunk texte. " * 200]  # 200 phrases de 4 tokens -> 4 segments de 254 tokens au plus
+    mock_extract = mocker.patch('backend.tasks_v4_complete.extract_pages_from_pdf', return_value=mock_pages)
+    mocker.patch('utils.rag_index.get_token_counter', return_value=approx_token_count)
+    mocker.patch('utils.embedding_cache.get_embedding_cache', return_value=EmbeddingCache(tmp_path / "embeddings.sqlite3"))
     mock_notify = mocker.patch('backend.tasks_v4_complete.send_project_notification')
+    mocker.patch('backend.tasks_v4_complete.EXTRACT_WORKERS', 1)  # les mocks ne traversent pas un pool de processus
+    mocker.patch('backend.tasks_v4_complete.INDEX_BATCH', 5)
+
+    # ACT 1 : indexation complète
+    index_project_pdfs_task.__wrapped__(project_id)
+
+    mock_writer.assert_called_with(project_id)
+    assert mock_extract.call_count == 3
+    assert {m["filename"] for _, m in collection.items.values()} == {"a.pdf", "b.pdf", "c.pdf"}
+    assert len(collection.items) == 12
+    # 12 segments mais 2 textes distincts : un seul appel au modèle, les lots suivants sont lus dans le cache
+    assert mock_embedding_model.encode.call_count == 1
+
+    # ACT 2 : un PDF ajouté, un modifié, un supprimé
+    (project_dir / "d.pdf").write_bytes(b"d.pdf")
+    (project_dir / "b.pdf").write_bytes(b"b.pdf v2")
+    (project_dir / "c.pdf").unlink()
+    mock_extract.reset_mock()
+    index_project_pdfs_task.__wrapped__(project_id)
+
+    assert sorted(Path(c.args[0]).name for c in mock_extract.call_args_list) == ["b.pdf", "d.pdf"]
+    assert {m["filename"] for _, m in collection.items.values()} == {"a.pdf", "b.pdf", "d.pdf"}
+    assert len(collection.items) == 12
+    assert lexical.ids() == set(collection.items)  # index BM25 tenu à jour avec la collection
+    assert mock_embedding_model.encode.call_count == 1  # contenus déjà encodés : aucun nouvel appel
+    mock_notify.assert_any_call(
+        project_id, 'indexing_completed', '2 PDF(s) ont été traités et indexés (1 inchangé(s), 1 retiré(s)).',
+        {'task_name': 'indexation', 'indexed': 2, 'unchanged': 1, 'removed': 1, 'chunks': 8}
+    )
 
-    # ACT
-    index_project_pdfs_task(db_session, project_id)
-
-    # ASSERT
-    mock_chroma_instance.get_or_create_collection.assert_called_once_with(name=f"project_{project_id}")
-    
-    # CORRECTION ASSERTION: Vérifier que add est appelé une seule fois avec 18 documents
-    mock_collection.add.assert_called_once()
-    call_args = mock_collection.add.call_args
-    assert len(call_args.kwargs['documents']) == 18
-    assert len(call_args.kwargs['embeddings']) == 18 # CORRECTION: L'assertion était déjà correcte, mais on confirme.
-    assert len(call_args.kwargs['ids']) == 18
-    assert len(call_args.kwargs['metadatas']) == 18
-    
-    # Vérifier le contenu du premier et du dernier chunk (optionnel, mais bonne pratique)
-    assert call_args.kwargs['ids'][0] == "mock_pdf_stem_0"
-    assert call_args.kwargs['ids'][17] == "mock_pdf_stem_17"
-    
-    mock_notify.assert_any_call(project_id, 'indexing_completed', f'{total_pdfs} PDF(s) ont été traités et indexés.', {'task_name': 'indexation'})
-    
 @patch('backend.tasks_v4_complete.fetch_unpaywall_pdf_url') # <-- CHEMIN CORRIGÉ
 @patch('requests.get') # ✅ AJOUTER CETTE LIGNE
 def test_fetch_online_pdf_task(mock_requests_get, mock_unpaywall, db_session, mocker, setup_project):
@@ -906,17 +994,12 @@ def test_fetch_online_pdf_task(mock_requests_get, mock_unpaywall, db_session, mo
     mock_requests_get.return_value = mock_response
 
     mock_pdf_url = "http://example.com/mock.pdf"
-    mock_pdf_content = b'%PDF-1.4...test content...'
 
     mock_unpaywall.return_value = mock_pdf_url
 
-    mock_http_response = MagicMock()
-    mock_http_response.headers = {'content-type': 'application/pdf'}
-    mock_http_response.content = mock_pdf_content
-    mock_http_get = mocker.patch('backend.tasks_v4_complete.http_get_with_retries', return_value=mock_http_response)
-
-    mock_write_bytes = mocker.patch('pathlib.Path.write_bytes')
-    mocker.patch('backend.tasks_v4_complete.Path.mkdir')
+    mock_download = mocker.patch('backend.tasks_v4_complete.download_pdf', return_value={
+        'path': 'mock.pdf', 'size': 27, 'sha256': 'abc123', 'resumed': False
+    })
     mock_notify = mocker.patch('backend.tasks_v4_complete.send_project_notification')
     
     # ACT
@@ -925,9 +1008,20 @@ def test_fetch_online_pdf_task(mock_requests_get, mock_unpaywall, db_session, mo
 
     # ASSERT
     mock_unpaywall.assert_called_once_with("10.1234/test")
-    mock_http_get.assert_called_once_with(mock_pdf_url, timeout=60)
     
-    # CORRECTION NAMEERROR (ERREUR 2): Utilise la variable PROJECTS_DIR importée ET la fonction sanitize_filename importée
-    expected_path = PROJECTS_DIR / project_id / f"{sanitize_filename(article_id)}.pdf"
-    mock_write_bytes.assert_called_once_with(mock_pdf_content)
-    mock_notify.assert_called_once_with(project_id, 'pdf_upload_completed', mocker.ANY)
\ No newline at end of file
+    # Le PDF est streamé directement vers son chemin final (plus de response.content en mémoire)
+    expected_path = Path(PROJECTS_DIR) / project_id / f"{sanitize_filename(article_id)}.pdf"
+    mock_download.assert_called_once_with(mock_pdf_url, expected_path, timeout=60)
+    mock_notify.assert_called_once_with(project_id, 'pdf_upload_completed', mocker.ANY, {'size': 27, 'sha256': 'abc123'})
+
+
+def test_increment_processed_count_refreshes_stats_in_own_transaction(mocker):
+    """project_stats est recalculé hors de la session de la tâche : un rollback ne l'annule pas."""
+    mocker.patch('backend.tasks_v4_complete.record_article_processed', return_value=True)
+    mock_refresh = mocker.patch('backend.tasks_v4_complete.refresh_project_stats')
+    mock_engine = mocker.patch('backend.tasks_v4_complete.db').engine
+
+    increment_processed_count("p1", duration=1.5)
+
+    connection = mock_engine.begin.return_value.__enter__.return_value
+    mock_refresh.assert_called_once_with("p1", ["extractions"], bind=connection)
@@ -6,55 +6,70 @@ Tests critiques pour le livrable final Excel + graphiques + métadonnées
 
 import pytest
 import json
+import zipfile
+from pathlib import Path
 from unittest.mock import patch, MagicMock
 
 # --- Imports des modèles ---
 from utils.models import Project, SearchResult, Extraction
+from backend.tasks_v4_complete import export_thesis_task
 
 class TestThesisExport:
     """Tests complets pour l'export spécialisé thèse"""
 
     # La fixture 'client' est maintenant injectée directement
-    @patch('api.projects.format_bibliography')
-    @patch('pandas.DataFrame.to_excel')
-    def test_thesis_excel_export_comprehensive(self, mock_to_excel, mock_format_bib, client, db_session):
+    def test_thesis_excel_export_comprehensive(self, client, db_session):
         """
-        Test de l'export Excel complet format thèse via API.
-        Vérifie que to_excel et format_bibliography sont appelés.
+        Test de l'export thèse via API : la requête lance une tâche de fond, la tâche écrit
+        l'archive sur disque (seuls les articles inclus), puis l'API la sert telle quelle.
         """
         # --- ARRANGE (Préparation) ---
-        # Configurer les mocks
-        mock_to_excel.return_value = None
-        mock_format_bib.return_value = ["Doe, J. (2023). Article 1. Journal A."]
-
-        # Création des données de test via la fixture de session
         project = Project(name="Test Thesis Export", description="Desc", analysis_mode="screening")
         db_session.add(project)
         db_session.flush()  # Pour obtenir l'ID auto-généré
         project_id = project.id
 
-        # CORRECTION : Assurer que SearchResult et Extraction sont liés par le même article_id/pmid
-        # pour que la jointure dans la requête de l'API fonctionne.
+        # SearchResult et Extraction sont liés par le même article_id/pmid
         article_id_to_include = "PMID12345"
-        search_result = SearchResult(project_id=project_id, article_id=article_id_to_include, title="Article 1", authors="Doe J", publication_date="2023", journal="Journal A", abstract="Abstract de test.")
-        # L'extraction doit avoir le même pmid et le statut 'include'
-        extraction = Extraction(project_id=project_id, pmid=article_id_to_include, user_validation_status="include")
-
-        db_session.add_all([search_result, extraction])
+        db_session.add_all([
+            SearchResult(project_id=project_id, article_id=article_id_to_include, title="Article 1", authors="Doe J", publication_date="2023", journal="Journal A", abstract="Abstract de test."),
+            SearchResult(project_id=project_id, article_id="PMID99999", title="Article exclu", authors="Roe R", publication_date="2022", journal="Journal B"),
+            Extraction(project_id=project_id, pmid=article_id_to_include, user_validation_status="include", extracted_data={"Type_IA": "Chatbot"}),
+        ])
         db_session.flush()
 
         # --- ACT (Action) ---
-        # Utiliser le client de test fourni par la fixture
-        response = client.get(f'/api/projects/{project_id}/export/thesis')
+        with patch('api.projects.import_queue.enqueue') as mock_enqueue:
+            mock_enqueue.return_value = MagicMock(id="thesis-job")
+            response = client.get(f'/api/projects/{project_id}/export/thesis')
+            assert response.status_code == 404, "Sans archive prête, GET ne lance pas de génération"
+            assert not mock_enqueue.called
+            response = client.post(f'/api/projects/{project_id}/export/thesis')
+
+        assert response.status_code == 202, "L'export est lancé en tâche de fond"
+        assert response.json['job_id'] == "thesis-job"
+        assert mock_enqueue.call_args.args[0] is export_thesis_task
+
+        with patch('backend.tasks_v4_complete.send_project_notification'):
+            result = export_thesis_task.__wrapped__(project_id)
 
         # --- ASSERT (Vérification) ---
-        assert response.status_code == 200, "La requête devrait réussir"
+        assert result['status'] == 'completed'
+        assert result['articles'] == 1
+        assert not list(Path(result['path']).parent.glob('*.part')), "Le fichier temporaire du job est renommé"
+        with zipfile.ZipFile(result['path']) as archive:
+            assert {'export_articles.xlsx', 'bibliographie.txt', 'extractions.csv'} <= set(archive.namelist())
+            bibliography = archive.read('bibliographie.txt').decode('utf-8')
+            extractions_csv = archive.read('extractions.csv').decode('utf-8-sig')
+        assert "Doe J (2023). Article 1" in bibliography
+        assert "Article exclu" not in bibliography
+        assert "Chatbot" in extractions_csv
+
+        response = client.get(f'/api/projects/{project_id}/export/thesis')
+        assert response.status_code == 200, "L'archive générée est servie depuis le disque"
         assert response.content_type == 'application/zip', "Le contenu doit être un fichier zip"
         assert 'attachment; filename=export_these_' in response.headers['Content-Disposition'], "Le nom du fichier doit être correct"
-        
-        # Vérifier que les fonctions de génération de contenu ont été appelées
-        mock_to_excel.assert_called_once()
-        mock_format_bib.assert_called_once()
+        response.close()
 
     def test_prisma_scr_checklist_generation(self, client, db_session):
         """Test de la génération et sauvegarde de la checklist PRISMA-ScR complète via API"""
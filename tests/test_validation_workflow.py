@@ -51,7 +51,7 @@ def test_update_decision_for_second_evaluator(client, db_session, setup_double_c
 
     assert response.status_code == 200
     db_session.refresh(extraction)
-    validations = json.loads(extraction.validations)
+    validations = extraction.validations
     
     assert "evaluator1" in validations and validations["evaluator1"] == "include"
     assert "evaluator2" in validations and validations["evaluator2"] == "exclude"
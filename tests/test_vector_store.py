@@ -0,0 +1,53 @@
+# tests/test_vector_store.py
+# Index vectoriel persistant : ce qu'un worker indexe est visible des autres, et survit au redémarrage.
+import fakeredis
+import pytest
+
+pytest.importorskip("chromadb")
+
+import utils.vector_store as vector_store
+
+
+@pytest.fixture
+def store_env(mocker, tmp_path):
+    mocker.patch('utils.app_globals.redis_conn', fakeredis.FakeRedis())
+    mocker.patch('utils.app_globals.PROJECTS_DIR', str(tmp_path))
+    mocker.patch.object(vector_store, '_clients', {})
+    yield tmp_path
+    vector_store.SharedSystemClient.clear_system_cache()
+
+
+def test_index_is_persistent_and_reopened_after_writes(store_env):
+    assert vector_store.get_project_collection("p1") is None
+
+    with vector_store.project_store_writer("p1") as collection:
+        collection.upsert(ids=["a_0"], documents=["Alliance thérapeutique"], embeddings=[[1.0, 0.0]],
+                          metadatas=[{"filename": "a.pdf"}])
+    assert (store_env / "p1" / "vector_store" / vector_store.GENERATION_FILENAME).read_text() == "1"
+
+    # Un autre processus (cache vidé) relit l'index sur disque
+    vector_store._clients.clear()
+    vector_store.SharedSystemClient.clear_system_cache()
+    reader = vector_store.get_project_collection("p1")
+    assert reader.query(query_embeddings=[[1.0, 0.0]], n_results=1)["ids"] == [["a_0"]]
+
+    # Une écriture publiée par un autre processus fait rouvrir le client du lecteur
+    (store_env / "p1" / "vector_store" / vector_store.GENERATION_FILENAME).write_text("2")
+    assert vector_store.get_project_collection("p1").count() == 1
+    assert vector_store._clients["p1"][1] == 2
+
+
+def test_reopening_one_project_keeps_other_projects_clients(store_env):
+    for project_id in ("p1", "p2"):
+        with vector_store.project_store_writer(project_id) as collection:
+            collection.upsert(ids=[f"{project_id}_0"], documents=["Texte"], embeddings=[[1.0, 0.0]],
+                              metadatas=[{"filename": "a.pdf"}])
+    other_client = vector_store._clients["p2"][0]
+    stale_reader = vector_store.get_project_collection("p1")
+
+    (store_env / "p1" / "vector_store" / vector_store.GENERATION_FILENAME).write_text("5")
+    assert vector_store.get_project_collection("p1").count() == 1
+
+    assert vector_store._clients["p2"][0] is other_client
+    assert vector_store.get_project_collection("p2").count() == 1
+    assert stale_reader.count() == 1  # une lecture commencée avant la réouverture aboutit
@@ -0,0 +1,56 @@
+# tests/test_zotero_parser.py
+from bs4 import BeautifulSoup
+
+from utils.zotero_parser import parse_zotero_rdf, build_rdf_about_index
+
+RDF_SAMPLE = """<?xml version="1.0" encoding="UTF-8"?>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+         xmlns:z="http://www.zotero.org/namespaces/export#"
+         xmlns:dc="http://purl.org/dc/elements/1.1/"
+         xmlns:dcterms="http://purl.org/dc/terms/"
+         xmlns:bib="http://purl.org/net/biblio#"
+         xmlns:bibo="http://purl.org/ontology/bibo/">
+    <bib:Article rdf:about="#item_1">
+        <dc:title>Digital therapeutic alliance with chatbots</dc:title>
+        <dcterms:isPartOf rdf:resource="urn:issn:1234-5678"/>
+        <z:attachment rdf:resource="#item_2"/>
+        <dc:date>2024-03-01</dc:date>
+    </bib:Article>
+    <bib:Journal rdf:about="urn:issn:1234-5678">
+        <dc:title>Frontiers in Digital Health</dc:title>
+    </bib:Journal>
+    <rdf:Description rdf:about="#item_2">
+        <z:localPath>storage:ABCD1234/paper.pdf</z:localPath>
+    </rdf:Description>
+    <bib:Article rdf:about="#item_3">
+        <dc:title>Second article without journal</dc:title>
+    </bib:Article>
+</rdf:RDF>
+"""
+
+
+def test_build_rdf_about_index_single_pass():
+    soup = BeautifulSoup(RDF_SAMPLE, 'xml')
+    index = build_rdf_about_index(soup)
+
+    assert set(index) == {"#item_1", "urn:issn:1234-5678", "#item_2", "#item_3"}
+    assert index["urn:issn:1234-5678"].find('dc:title').string == "Frontiers in Digital Health"
+
+
+def test_parse_zotero_rdf_resolves_journal_and_attachment(tmp_path):
+    rdf_file = tmp_path / "export.rdf"
+    rdf_file.write_text(RDF_SAMPLE, encoding='utf-8')
+
+    articles = parse_zotero_rdf(str(rdf_file), str(tmp_path))
+
+    assert len(articles) == 2
+    first = articles[0]
+    assert first["journal"] == "Frontiers in Digital Health"
+    assert first["pdf_path"].endswith("ABCD1234/paper.pdf")
+    assert first["year"] == 2024
+    assert articles[1]["journal"] == ""
+    assert articles[1]["pdf_path"] is None
+
+
+def test_parse_zotero_rdf_missing_file():
+    assert parse_zotero_rdf("/nonexistent/export.rdf", "/tmp") == []
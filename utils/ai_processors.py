@@ -5,7 +5,7 @@ import logging
 import time
 import requests
 import re
-from typing import Any
+from typing import Any, Iterator
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
@@ -105,3 +105,34 @@ def call_ollama_api(prompt: str, model: str = "llama3.1:8b", output_format: str
     except Exception as e:
         logger.error(f"Erreur inattendue dans call_ollama_api: {e}", exc_info=True)
         raise AIResponseError(f"Erreur inattendue: {str(e)}") from e
+
+def stream_ollama_api(prompt: str, model: str = "llama3.1:8b", temperature: float = 0.2) -> Iterator[str]:
+    """
+    Appelle l'API Ollama en mode streaming et produit les fragments de texte au fil de leur
+    génération (une ligne JSON par fragment côté Ollama), pour un premier affichage immédiat.
+    """
+    url = f"{config.OLLAMA_BASE_URL}/api/generate"
+    payload = {
+        "model": model,
+        "prompt": prompt,
+        "stream": True,
+        "options": {"temperature": temperature, "top_p": 0.9, "num_predict": 1024, "stop": ["\n\n\n", "```"]}
+    }
+    try:
+        with requests_session_with_retries().post(url, json=payload, timeout=(10, 600), stream=True) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise AIResponseError(f"Erreur Ollama: {chunk['error']}")
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    return
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Erreur de communication avec Ollama (streaming): {e}")
+        raise AIResponseError("Erreur de communication avec le service Ollama.") from e
+    except ValueError as e:
+        raise AIResponseError(f"Réponse Ollama illisible: {e}") from e
@@ -41,7 +41,9 @@ def generate_discussion_draft(df: pd.DataFrame, call_ollama_func: Callable, mode
     excerpts = []
     for _, row in df_sorted.head(15).iterrows():
         try:
-            data = json.loads(row.get('extracted_data', '{}'))
+            data = row.get('extracted_data') or {}
+            if isinstance(data, str):  # Données héritées sérialisées en texte
+                data = json.loads(data)
             if not isinstance(data, dict): # 'data' est maintenant le dictionnaire parsé
                 continue
 
@@ -0,0 +1,138 @@
+# utils/answer_cache.py - Cache sémantique des réponses du chat, par projet et par version de l'index
+
+import logging
+import sqlite3
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.vector_store import index_generation, project_store_path
+
+# Import de la configuration de manière sécurisée
+try:
+    from backend.config.config_v4 import get_config
+    config = get_config()
+except ImportError:
+    # Fallback pour un contexte où le module config n'est pas dans le path
+    class FallbackConfig:
+        CHAT_ANSWER_CACHE_ENABLED = True
+        CHAT_ANSWER_CACHE_THRESHOLD = 0.95
+        CHAT_ANSWER_CACHE_MAX_ENTRIES = 500
+    config = FallbackConfig()
+
+logger = logging.getLogger(__name__)
+
+ANSWER_CACHE_FILENAME = "answer_cache.sqlite3"
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS answers (
+        id INTEGER PRIMARY KEY,
+        generation INTEGER NOT NULL,
+        question TEXT NOT NULL,
+        embedding BLOB NOT NULL,
+        answer TEXT NOT NULL,
+        created_at REAL NOT NULL
+    )
+"""
+
+
+def _unit(vector: Sequence[float]) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+class AnswerCache:
+    """
+    Réponses déjà générées pour un projet, retrouvées par similarité cosinus de la question.
+    Une réponse n'est valable que pour la génération de l'index vectoriel qui a fourni son
+    contexte : toute réindexation invalide le cache (les anciennes entrées sont purgées).
+    """
+
+    def __init__(self, path, threshold: float = config.CHAT_ANSWER_CACHE_THRESHOLD,
+                 max_entries: int = config.CHAT_ANSWER_CACHE_MAX_ENTRIES):
+        self.path = Path(path)
+        self.threshold = threshold
+        self.max_entries = max_entries
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(_SCHEMA)
+        return conn
+
+    def lookup(self, generation: int, embedding: Sequence[float]) -> Optional[Tuple[str, str, float]]:
+        """(question, réponse, similarité) de l'entrée la plus proche au-dessus du seuil, sinon None."""
+        with closing(self._connect()) as conn:
+            with conn:
+                conn.execute("DELETE FROM answers WHERE generation != ?", (generation,))
+            rows = conn.execute("SELECT question, embedding, answer FROM answers WHERE generation = ?", (generation,)).fetchall()
+        if not rows:
+            return None
+        matrix = np.stack([np.frombuffer(blob, dtype=np.float32) for _, blob, _ in rows])
+        query = _unit(embedding)
+        if matrix.shape[1] != query.shape[0]:
+            return None  # modèle d'embedding changé : entrées inutilisables, remplacées au fil de l'eau
+        similarities = matrix @ query
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+        return rows[best][0], rows[best][2], float(similarities[best])
+
+    def store(self, generation: int, question: str, embedding: Sequence[float], answer: str):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO answers (generation, question, embedding, answer, created_at) VALUES (?, ?, ?, ?, ?)",
+                (generation, question, _unit(embedding).tobytes(), answer, time.time()),
+            )
+            conn.execute(
+                "DELETE FROM answers WHERE id NOT IN (SELECT id FROM answers ORDER BY id DESC LIMIT ?)", (self.max_entries,)
+            )
+
+
+@dataclass
+class PendingAnswer:
+    """Emplacement réservé dans le cache pour la réponse en cours de génération."""
+    cache: AnswerCache
+    generation: int
+    question: str
+    embedding: Sequence[float]
+
+    def fill(self, answer: str):
+        try:
+            self.cache.store(self.generation, self.question, self.embedding, answer)
+        except sqlite3.Error as e:
+            logger.warning(f"Réponse non mise en cache: {e}")
+
+
+def get_answer_cache(project_id: str) -> Optional[AnswerCache]:
+    """Cache de réponses du projet, rangé avec son index (None si désactivé par CHAT_ANSWER_CACHE_ENABLED)."""
+    if not config.CHAT_ANSWER_CACHE_ENABLED:
+        return None
+    path = project_store_path(project_id)
+    path.mkdir(parents=True, exist_ok=True)
+    return AnswerCache(path / ANSWER_CACHE_FILENAME)
+
+
+def lookup_answer(project_id: str, question: str, embedding: Sequence[float]) -> Tuple[Optional[str], Optional[PendingAnswer]]:
+    """
+    Cherche une réponse à une question quasi identique posée depuis la dernière indexation.
+    Retourne (réponse, None) en cas de succès, sinon (None, emplacement à remplir avec la nouvelle réponse).
+    """
+    cache = get_answer_cache(project_id)
+    if cache is None:
+        return None, None
+    generation = index_generation(project_id)
+    try:
+        hit = cache.lookup(generation, embedding)
+    except sqlite3.Error as e:
+        logger.warning(f"Cache de réponses illisible pour le projet {project_id}: {e}")
+        return None, None
+    if hit is not None:
+        cached_question, answer, similarity = hit
+        logger.info(f"Réponse en cache pour le projet {project_id} (similarité {similarity:.3f} avec « {cached_question} »)")
+        return answer, None
+    return None, PendingAnswer(cache, generation, question, embedding)
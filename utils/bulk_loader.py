@@ -0,0 +1,135 @@
+# utils/bulk_loader.py - Chargement en masse via COPY (PostgreSQL) pour search_results / extractions
+
+import json
+import logging
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from io import StringIO
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Union
+
+from sqlalchemy import text
+
+# Import de la configuration de manière sécurisée
+try:
+    from backend.config.config_v4 import get_config
+    config = get_config()
+except ImportError:
+    # Fallback pour un contexte où le module config n'est pas dans le path
+    class FallbackConfig:
+        BULK_LOAD_BATCH_SIZE = 5000
+    config = FallbackConfig()
+
+logger = logging.getLogger(__name__)
+
+_STAGING_ORDINAL = "_bulk_ord"
+
+
+def _csv_value(value: Any) -> str:
+    """Sérialise une valeur pour COPY ... (FORMAT csv) : NULL non quoté, texte toujours quoté."""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float, Decimal)):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    elif isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def format_copy_rows(rows: Iterable[Mapping[str, Any]], columns: Sequence[str]) -> StringIO:
+    """Construit le flux CSV envoyé à COPY FROM STDIN."""
+    buffer = StringIO()
+    for row in rows:
+        buffer.write(','.join(_csv_value(row.get(col)) for col in columns))
+        buffer.write('\n')
+    buffer.seek(0)
+    return buffer
+
+
+def _conflict_clause(conflict_columns: Sequence[str], update_columns: Optional[Union[Sequence[str], Mapping[str, str]]]) -> str:
+    clause = f"ON CONFLICT ({', '.join(conflict_columns)}) "
+    if not update_columns:
+        return clause + "DO NOTHING"
+    if isinstance(update_columns, Mapping):
+        assignments = [f"{col} = {expr}" for col, expr in update_columns.items()]
+    else:
+        assignments = [f"{col} = EXCLUDED.{col}" for col in update_columns]
+    return clause + "DO UPDATE SET " + ", ".join(assignments)
+
+
+def bulk_upsert(session, table: str, rows: List[Dict[str, Any]], conflict_columns: Sequence[str],
+                update_columns: Optional[Union[Sequence[str], Mapping[str, str]]] = None,
+                returning: Optional[str] = None, batch_size: Optional[int] = None) -> Union[int, List[Any]]:
+    """
+    Insère des lignes en masse dans `table` en respectant la contrainte d'unicité `conflict_columns`.
+
+    Sous PostgreSQL, chaque lot est envoyé via `COPY ... FROM STDIN` dans une table temporaire,
+    puis fusionné par `INSERT ... SELECT ... ON CONFLICT`. Les autres dialectes retombent sur
+    un executemany classique. Pour les lignes en double au sein d'un même lot, la dernière
+    l'emporte (DISTINCT ON sur l'ordre d'arrivée) ; aucun commit n'est effectué.
+
+    Args:
+        update_columns: None pour DO NOTHING, une liste de colonnes (SET col = EXCLUDED.col)
+            ou un dictionnaire {colonne: expression SQL}.
+        returning: colonne à renvoyer pour les lignes effectivement insérées ou mises à jour.
+    Returns:
+        La liste des valeurs de `returning`, sinon le nombre de lignes écrites.
+    """
+    if not rows:
+        return [] if returning else 0
+
+    columns = list(rows[0].keys())
+    batch_size = batch_size or config.BULK_LOAD_BATCH_SIZE
+    conflict_sql = _conflict_clause(conflict_columns, update_columns)
+    returning_sql = f" RETURNING {returning}" if returning else ""
+
+    if session.get_bind().dialect.name != 'postgresql':
+        return _executemany_upsert(session, table, rows, columns, conflict_columns, conflict_sql, returning, returning_sql)
+
+    col_list = ', '.join(columns)
+    temp_table = f"_bulk_{table}_{uuid.uuid4().hex[:8]}"
+    conflict_list = ', '.join(conflict_columns)
+    session.execute(text(f"CREATE TEMP TABLE {temp_table} ON COMMIT DROP AS SELECT {col_list} FROM {table} WITH NO DATA"))
+    # Numéro d'ordre attribué par COPY dans l'ordre du flux : départage les doublons d'un lot
+    session.execute(text(f"ALTER TABLE {temp_table} ADD COLUMN {_STAGING_ORDINAL} BIGSERIAL"))
+    merge_sql = (
+        f"INSERT INTO {table} ({col_list}) "
+        f"SELECT DISTINCT ON ({conflict_list}) {col_list} FROM {temp_table} "
+        f"ORDER BY {conflict_list}, {_STAGING_ORDINAL} DESC "
+        f"{conflict_sql}{returning_sql}"
+    )
+
+    # Le curseur DBAPI partage la connexion (et donc la transaction) de la session
+    cursor = session.connection().connection.dbapi_connection.cursor()
+    returned, written = [], 0
+    try:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            cursor.copy_expert(f"COPY {temp_table} ({col_list}) FROM STDIN WITH (FORMAT csv)", format_copy_rows(batch, columns))
+            cursor.execute(merge_sql)
+            if returning:
+                returned.extend(r[0] for r in cursor.fetchall())
+            written += max(cursor.rowcount, 0)
+            cursor.execute(f"TRUNCATE {temp_table}")
+    finally:
+        cursor.close()
+
+    logger.debug(f"bulk_upsert {table}: {len(rows)} lignes envoyées, {written} écrites.")
+    return returned if returning else written
+
+
+def _executemany_upsert(session, table, rows, columns, conflict_columns, conflict_sql, returning, returning_sql):
+    """Chemin de repli (dialectes sans COPY) : même sémantique, via executemany."""
+    # Comme DISTINCT ON côté PostgreSQL : une seule ligne par clé, la dernière reçue
+    rows = list({tuple(row.get(c) for c in conflict_columns): row for row in rows}.values())
+    stmt = text(
+        f"INSERT INTO {table} ({', '.join(columns)}) "
+        f"VALUES ({', '.join(':' + c for c in columns)}) {conflict_sql}{returning_sql}"
+    )
+    if returning:
+        return [value for row in rows for value in session.execute(stmt, row).scalars().all()]
+    return session.execute(stmt, rows).rowcount
@@ -0,0 +1,48 @@
+# utils/cache.py - Petits caches Redis partagés entre l'API et les workers
+
+import logging
+from typing import Callable
+
+import utils.app_globals as app_globals
+
+logger = logging.getLogger(__name__)
+
+SEARCH_RESULTS_COUNT_TTL = 60  # secondes
+
+
+def _search_results_count_key(project_id: str) -> str:
+    return f"analylit:search_results_count:{project_id}"
+
+
+def get_cached_count(key: str, compute: Callable[[], int], ttl: int) -> int:
+    """
+    Retourne un compteur mis en cache dans Redis, ou le calcule (et le met en cache) s'il est absent.
+    Si Redis est indisponible, le compteur est simplement recalculé.
+    """
+    try:
+        cached = app_globals.redis_conn.get(key)
+        if cached is not None:
+            return int(cached)
+    except Exception as e:
+        logger.debug(f"Cache Redis indisponible pour {key}: {e}")
+        return compute()
+
+    value = compute()
+    try:
+        app_globals.redis_conn.set(key, value, ex=ttl)
+    except Exception as e:
+        logger.debug(f"Impossible de mettre en cache {key}: {e}")
+    return value
+
+
+def get_search_results_count(project_id: str, compute: Callable[[], int]) -> int:
+    """Nombre de search_results d'un projet, mis en cache entre deux imports."""
+    return get_cached_count(_search_results_count_key(project_id), compute, SEARCH_RESULTS_COUNT_TTL)
+
+
+def invalidate_search_results_count(project_id: str):
+    """À appeler après toute écriture dans search_results pour le projet."""
+    try:
+        app_globals.redis_conn.delete(_search_results_count_key(project_id))
+    except Exception as e:
+        logger.debug(f"Invalidation du cache impossible pour {project_id}: {e}")
@@ -0,0 +1,203 @@
+# utils/chunker.py - Découpage des articles en segments pour le RAG (phrases, sections, tokens)
+
+import logging
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+TokenCounter = Callable[[str], int]
+
+# Titres de section reconnus (éventuellement numérotés : "2.1 Methods", "III. RÉSULTATS")
+_SECTION_NAMES = (
+    r"abstract|summary|résumé|introduction|background|contexte|objectives?|objectifs?|"
+    r"methods?|methodology|materials and methods|méthodes?|méthodologie|matériel et méthodes|"
+    r"results?|résultats|findings|discussion|conclusions?|limitations?|limites|"
+    r"implications|recommendations|recommandations"
+)
+_NUMBERING = r"(?:\d+(?:\.\d+)*\.?|[IVX]+\.)"
+_SECTION_RE = re.compile(rf"^(?:{_NUMBERING}\s+)?(?:{_SECTION_NAMES})\b[^.]{{0,60}}$", re.IGNORECASE)
+_NUMBERED_HEADING_RE = re.compile(rf"^{_NUMBERING}\s+[A-ZÀ-Ý][^.!?]{{2,80}}$")
+# Tout ce qui suit ces titres est exclu de l'index (bibliographie, remerciements, déclarations)
+_BACK_MATTER_RE = re.compile(
+    rf"^(?:{_NUMBERING}\s+)?(?:references|bibliography|literature cited|références|bibliographie|"
+    r"acknowledge?ments|remerciements|conflicts? of interest|conflits? d'intérêts?|funding|financement)\s*:?$",
+    re.IGNORECASE,
+)
+# Fin de phrase : ponctuation suivie d'un espace et d'une majuscule, hors abréviations courantes
+_ABBREVIATIONS = frozenset({"al", "e.g", "i.e", "fig", "figs", "eq", "vs", "cf", "dr", "pr", "no", "vol", "pp", "approx", "resp"})
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])[\"'»)\]]?\s+(?=[\"'«(\[]?[A-ZÀ-Ý0-9])")
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+# Longueur (en lignes) des zones d'en-tête et de pied de page examinées sur chaque page
+_MARGIN_LINES = 2
+_MARGIN_MAX_CHARS = 100
+# En dessous, un fragment isolé est du bruit de mise en page ("Table 2", "(continued)")
+_NOISE_TOKENS = 8
+
+
+@dataclass
+class Chunk:
+    """Segment de texte avec sa provenance dans le document."""
+    text: str
+    page_start: int
+    page_end: int
+    section: Optional[str] = None
+
+
+def approx_token_count(text: str) -> int:
+    """Estimation sans tokenizer : ~1,3 sous-mot WordPiece par mot ou ponctuation."""
+    return math.ceil(len(_WORD_RE.findall(text)) * 1.3)
+
+
+@lru_cache(maxsize=4)
+def get_token_counter(model_name: str) -> TokenCounter:
+    """Compteur de tokens du tokenizer du modèle d'embedding (chargé une fois par processus)."""
+    try:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+    except Exception as e:
+        logger.warning(f"Tokenizer {model_name} indisponible, estimation du nombre de tokens: {e}")
+        return approx_token_count
+    return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+
+
+def _normalize_margin_line(line: str) -> Optional[str]:
+    line = line.strip()
+    return re.sub(r"\d+", "#", line.lower()) if len(line) <= _MARGIN_MAX_CHARS else None
+
+
+def strip_repeated_margins(pages: Sequence[str]) -> List[List[str]]:
+    """
+    Retire les en-têtes et pieds de page répétés (titre courant, nom de revue, "Page 3 of 12") :
+    une ligne des marges présente sur au moins la moitié des pages (3 minimum) est du gabarit.
+    """
+    page_lines = [[line for line in page.splitlines() if line.strip()] for page in pages]
+    counts = Counter()
+    for lines in page_lines:
+        margins = lines[:_MARGIN_LINES] + lines[-_MARGIN_LINES:]
+        counts.update({_normalize_margin_line(line) for line in margins} - {None})
+    threshold = max(3, math.ceil(len(pages) / 2))
+    repeated = {line for line, n in counts.items() if n >= threshold}
+
+    cleaned = []
+    for lines in page_lines:
+        n = len(lines)
+        cleaned.append([
+            line for i, line in enumerate(lines)
+            if not ((i < _MARGIN_LINES or i >= n - _MARGIN_LINES) and _normalize_margin_line(line) in repeated)
+        ])
+    return cleaned
+
+
+def _is_heading(line: str) -> bool:
+    line = line.strip()
+    return len(line) <= 90 and bool(_SECTION_RE.match(line) or _NUMBERED_HEADING_RE.match(line))
+
+
+def iter_paragraphs(pages: Sequence[str]) -> Iterator[Tuple[str, int, Optional[str]]]:
+    """
+    Produit (texte, numéro de page, section) en recollant les lignes d'une même phrase,
+    en s'arrêtant à la bibliographie / aux remerciements.
+    """
+    section = None
+    for page_number, lines in enumerate(strip_repeated_margins(pages), start=1):
+        buffer: List[str] = []
+        for line in lines:
+            stripped = line.strip()
+            if _BACK_MATTER_RE.match(stripped):
+                if buffer:
+                    yield " ".join(buffer), page_number, section
+                return
+            if _is_heading(stripped):
+                if buffer:
+                    yield " ".join(buffer), page_number, section
+                    buffer = []
+                section = re.sub(rf"^{_NUMBERING}\s+", "", stripped).strip().rstrip(':')
+                continue
+            if re.fullmatch(r"[\d\s\-–/|]*", stripped):
+                continue  # numéros de page isolés
+            buffer.append(stripped)
+        if buffer:
+            yield " ".join(buffer), page_number, section
+
+
+def split_sentences(text: str) -> List[str]:
+    """Découpe un paragraphe en phrases sans couper après les abréviations usuelles (et al., Fig., e.g.)."""
+    sentences: List[str] = []
+    for part in _SENTENCE_END_RE.split(text):
+        part = part.strip()
+        if not part:
+            continue
+        if sentences and sentences[-1].rsplit(None, 1)[-1].rstrip(".").lower() in _ABBREVIATIONS:
+            sentences[-1] = f"{sentences[-1]} {part}"
+            continue
+        sentences.append(part)
+    return sentences
+
+
+def _split_long_sentence(sentence: str, max_tokens: int, count_tokens: TokenCounter) -> List[str]:
+    """Une phrase plus longue que la limite (tableau aplati, liste) est coupée sur les mots."""
+    pieces, current = [], []
+    for word in sentence.split():
+        if current and count_tokens(" ".join(current + [word])) > max_tokens:
+            pieces.append(" ".join(current))
+            current = []
+        current.append(word)
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def chunk_pages(pages: Sequence[str], max_tokens: int = 254, min_tokens: int = 32,
+                count_tokens: TokenCounter = approx_token_count) -> List[Chunk]:
+    """
+    Découpe un document (une chaîne par page) en segments d'au plus `max_tokens` tokens du
+    modèle d'embedding, formés de phrases entières et sans chevauchement. Un segment ne
+    franchit pas une frontière de section ; les fragments de moins de `min_tokens` sont
+    rattachés au segment précédent de la même section lorsqu'il reste de la place, et
+    les fragments isolés de quelques tokens sont ignorés.
+    """
+    chunks: List[Chunk] = []
+    sentences: List[str] = []
+    tokens = 0
+    first_page = last_page = 1
+    current_section = None
+
+    def flush():
+        nonlocal sentences, tokens
+        if not sentences:
+            return
+        text = " ".join(sentences)
+        previous = chunks[-1] if chunks else None
+        if (tokens < min_tokens and previous is not None and previous.section == current_section
+                and count_tokens(previous.text) + tokens <= max_tokens):
+            previous.text = f"{previous.text} {text}"
+            previous.page_end = last_page
+        elif tokens >= _NOISE_TOKENS:
+            chunks.append(Chunk(text=text, page_start=first_page, page_end=last_page, section=current_section))
+        sentences, tokens = [], 0
+
+    for paragraph, page_number, section in iter_paragraphs(pages):
+        if section != current_section:
+            flush()
+            current_section = section
+        for sentence in split_sentences(paragraph):
+            n = count_tokens(sentence)
+            parts = [(sentence, n)] if n <= max_tokens else [
+                (piece, count_tokens(piece)) for piece in _split_long_sentence(sentence, max_tokens, count_tokens)
+            ]
+            for part, n_part in parts:
+                if tokens + n_part > max_tokens:
+                    flush()
+                if not sentences:
+                    first_page = page_number
+                sentences.append(part)
+                tokens += n_part
+                last_page = page_number
+    flush()
+    return chunks
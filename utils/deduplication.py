@@ -0,0 +1,242 @@
+# utils/deduplication.py - Détection des doublons inter-sources (PubMed, CrossRef, arXiv, Zotero...)
+
+import logging
+import re
+import unicodedata
+import zlib
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Paramètres MinHash / LSH : 64 permutations en 16 bandes de 4 lignes.
+# Les paires candidates issues du LSH sont ensuite vérifiées par un Jaccard exact.
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+SHINGLE_SIZE = 4
+TITLE_SIMILARITY_THRESHOLD = 0.85
+MIN_TITLE_LENGTH = 20
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(42)
+_PERM_A = _rng.randint(1, _MERSENNE_PRIME, size=MINHASH_PERMUTATIONS).astype(np.uint64)
+_PERM_B = _rng.randint(0, _MERSENNE_PRIME, size=MINHASH_PERMUTATIONS).astype(np.uint64)
+
+_DOI_PATTERN = re.compile(r'10\.\d{4,9}/\S+', re.IGNORECASE)
+_PMID_PATTERN = re.compile(r'^(?:pmid:?\s*)?(\d{1,9})$', re.IGNORECASE)
+_ARXIV_PATTERN = re.compile(r'^(?:arxiv:)?(\d{4}\.\d{4,5}|[a-z\-]+(?:\.[a-z]{2})?/\d{7})(?:v\d+)?$', re.IGNORECASE)
+
+
+def normalize_doi(value: Optional[str]) -> Optional[str]:
+    """Normalise un DOI (préfixes doi:/https://doi.org/, casse, ponctuation finale)."""
+    if not value:
+        return None
+    match = _DOI_PATTERN.search(str(value).strip())
+    if not match:
+        return None
+    return match.group(0).rstrip('.,;)').lower()
+
+
+def normalize_pmid(value: Optional[str]) -> Optional[str]:
+    """Normalise un PMID ('PMID: 0123456' -> '123456'), ou None si la valeur n'en est pas un."""
+    if value is None:
+        return None
+    match = _PMID_PATTERN.match(str(value).strip())
+    if not match:
+        return None
+    return match.group(1).lstrip('0') or None
+
+
+def normalize_arxiv_id(value: Optional[str]) -> Optional[str]:
+    """Normalise un identifiant arXiv en retirant le préfixe et la version ('2101.00001v2' -> '2101.00001')."""
+    if not value:
+        return None
+    match = _ARXIV_PATTERN.match(str(value).strip())
+    return match.group(1).lower() if match else None
+
+
+def normalize_title(title: Optional[str]) -> str:
+    """Titre en minuscules, sans accents, ponctuation ni espaces multiples."""
+    if not title:
+        return ""
+    text = unicodedata.normalize('NFKD', str(title))
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    text = re.sub(r'<[^>]+>', ' ', text)
+    text = re.sub(r'[^a-z0-9]+', ' ', text)
+    return text.strip()
+
+
+def record_identity_keys(record: dict) -> Set[Tuple[str, str]]:
+    """Clés d'identité fortes (DOI, PMID, arXiv) d'un enregistrement search_results."""
+    keys = set()
+    source = (record.get('database_source') or '').lower()
+    article_id = record.get('article_id')
+
+    doi = normalize_doi(record.get('doi')) or normalize_doi(article_id)
+    if doi:
+        keys.add(('doi', doi))
+        # Les DOI arXiv (10.48550/arXiv.XXXX) désignent la même prépublication que l'ID arXiv
+        if doi.startswith('10.48550/arxiv.'):
+            keys.add(('arxiv', doi.split('arxiv.', 1)[1]))
+
+    # Un identifiant purement numérique n'est un PMID que s'il vient de PubMed ou est préfixé
+    raw_id = str(article_id or '')
+    if source == 'pubmed' or raw_id.lower().startswith('pmid'):
+        pmid = normalize_pmid(raw_id)
+        if pmid:
+            keys.add(('pmid', pmid))
+    if record.get('pmid'):
+        pmid = normalize_pmid(record.get('pmid'))
+        if pmid:
+            keys.add(('pmid', pmid))
+
+    if source == 'arxiv' or raw_id.lower().startswith('arxiv'):
+        arxiv_id = normalize_arxiv_id(raw_id)
+        if arxiv_id:
+            keys.add(('arxiv', arxiv_id))
+    return keys
+
+
+def _shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def minhash_signature(shingles: Iterable[str]) -> np.ndarray:
+    """Signature MinHash (uint64[MINHASH_PERMUTATIONS]) d'un ensemble de shingles."""
+    hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) & _MERSENNE_PRIME for s in shingles), dtype=np.uint64)
+    if hashes.size == 0:
+        return np.full(MINHASH_PERMUTATIONS, _MERSENNE_PRIME, dtype=np.uint64)
+    values = (np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME
+    return values.min(axis=0)
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class _UnionFind:
+    """
+    Union-find dont chaque groupe retient ses DOI : deux groupes portant des DOI différents ne sont
+    jamais fusionnés, même par l'intermédiaire d'un enregistrement sans DOI (a -> b <- c).
+    """
+
+    def __init__(self, dois: List[Optional[str]]):
+        self.parent = list(range(len(dois)))
+        self.dois = [{doi} if doi else set() for doi in dois]
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int) -> bool:
+        ri, rj = self.find(i), self.find(j)
+        if ri == rj:
+            return True
+        if self.dois[ri] and self.dois[rj] and self.dois[ri] != self.dois[rj]:
+            return False
+        root, child = min(ri, rj), max(ri, rj)
+        self.parent[child] = root
+        self.dois[root] |= self.dois[child]
+        self.dois[child] = set()
+        return True
+
+
+def _canonical_rank(record: dict, keys: Set[Tuple[str, str]]) -> tuple:
+    """
+    Ordre de préférence du représentant d'un groupe : article déjà criblé (pour ne pas
+    relancer le LLM), puis PMID, puis DOI, puis résumé le plus riche.
+    """
+    kinds = {k for k, _ in keys}
+    abstract_length = record.get('abstract_length')
+    if abstract_length is None:
+        abstract_length = len(record.get('abstract') or '')
+    return (
+        0 if record.get('screened') else 1,
+        0 if 'pmid' in kinds else 1,
+        0 if 'doi' in kinds else 1,
+        -abstract_length,
+        str(record.get('article_id')),
+    )
+
+
+def find_duplicates(records: List[dict], threshold: float = TITLE_SIMILARITY_THRESHOLD) -> Dict[str, str]:
+    """
+    Regroupe les enregistrements qui désignent la même publication.
+
+    Deux enregistrements sont fusionnés s'ils partagent un DOI/PMID/arXiv normalisé, ou si
+    leurs titres sont quasi identiques (MinHash + LSH, puis Jaccard exact >= threshold). Un groupe
+    ne réunit jamais deux DOI différents, y compris par transitivité.
+
+    Returns:
+        Un dictionnaire {article_id doublon: article_id canonique}. Les articles canoniques
+        et uniques n'y figurent pas.
+    """
+    n = len(records)
+    if n < 2:
+        return {}
+
+    keys_per_record = [record_identity_keys(r) for r in records]
+    dois = [next((v for k, v in keys if k == 'doi'), None) for keys in keys_per_record]
+    uf = _UnionFind(dois)
+
+    # 1. Identifiants forts
+    owner: Dict[Tuple[str, str], int] = {}
+    for idx, keys in enumerate(keys_per_record):
+        for key in keys:
+            if key in owner:
+                uf.union(owner[key], idx)
+            else:
+                owner[key] = idx
+
+    # 2. Titres quasi identiques via LSH
+    shingle_sets: Dict[int, Set[str]] = {}
+    buckets: Dict[Tuple[int, bytes], List[int]] = {}
+    rows = MINHASH_PERMUTATIONS // LSH_BANDS
+    for idx, record in enumerate(records):
+        title = normalize_title(record.get('title'))
+        if len(title) < MIN_TITLE_LENGTH:
+            continue
+        shingle_sets[idx] = _shingles(title)
+        signature = minhash_signature(shingle_sets[idx])
+        for band in range(LSH_BANDS):
+            band_key = (band, signature[band * rows:(band + 1) * rows].tobytes())
+            buckets.setdefault(band_key, []).append(idx)
+
+    checked = set()
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        for pos, i in enumerate(members):
+            for j in members[pos + 1:]:
+                if (i, j) in checked:
+                    continue
+                checked.add((i, j))
+                if uf.find(i) == uf.find(j):
+                    continue
+                if _jaccard(shingle_sets[i], shingle_sets[j]) >= threshold:
+                    uf.union(i, j)
+
+    # 3. Choix du représentant canonique de chaque groupe
+    clusters: Dict[int, List[int]] = {}
+    for idx in range(n):
+        clusters.setdefault(uf.find(idx), []).append(idx)
+
+    duplicates = {}
+    for members in clusters.values():
+        if len(members) < 2:
+            continue
+        canonical = min(members, key=lambda i: _canonical_rank(records[i], keys_per_record[i]))
+        canonical_id = records[canonical]['article_id']
+        for idx in members:
+            if idx != canonical and records[idx]['article_id'] != canonical_id:
+                duplicates[records[idx]['article_id']] = canonical_id
+
+    logger.info(f"Déduplication: {n} enregistrements, {len(duplicates)} doublons dans {sum(1 for m in clusters.values() if len(m) > 1)} groupes.")
+    return duplicates
@@ -0,0 +1,194 @@
+# utils/downloads.py - Téléchargements HTTP en streaming (PDFs, pièces jointes)
+
+import hashlib
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Import de la configuration de manière sécurisée
+try:
+    from backend.config.config_v4 import get_config
+    config = get_config()
+except ImportError:
+    # Fallback pour un contexte où le module config n'est pas dans le path
+    class FallbackConfig:
+        PDF_MAX_SIZE_MB = 100
+        PDF_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+        PDF_RESUME_MIN_SIZE_MB = 5
+    config = FallbackConfig()
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'AnalyLit/4.1 (Research Tool; contact@analylit.com)'
+PART_SUFFIX = ".part"
+# Validateur (ETag fort ou Last-Modified) de la réponse qui a produit le fichier partiel
+VALIDATOR_SUFFIX = ".part.validator"
+CHECKSUM_SUFFIX = ".sha256"
+_UNSATISFIED_RANGE = re.compile(r'bytes \*/(\d+)')
+
+# Sessions partagées (une par politique de retry) : le pool de connexions
+# est réutilisé d'un téléchargement à l'autre au lieu d'être recréé par URL.
+_sessions: Dict[int, requests.Session] = {}
+
+
+class DownloadTooLargeError(Exception):
+    """Levée lorsqu'un fichier dépasse la taille maximale autorisée."""
+
+
+def get_http_session(max_retries: int = 3) -> requests.Session:
+    """
+    Retourne la session HTTP partagée du processus (lazy), avec retry et pool de connexions.
+    """
+    session = _sessions.get(max_retries)
+    if session is None:
+        session = requests.Session()
+        session.headers.update({'User-Agent': USER_AGENT})
+        retry_strategy = Retry(
+            total=max_retries,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["HEAD", "GET", "OPTIONS"],
+            backoff_factor=1,
+        )
+        adapter = HTTPAdapter(max_retries=retry_strategy, pool_connections=10, pool_maxsize=10)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _sessions[max_retries] = session
+    return session
+
+
+def _sha256_of_file(path: Path, chunk_size: int) -> "hashlib._Hash":
+    """Initialise un hash SHA-256 avec le contenu d'un fichier partiel existant."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest
+
+
+def _response_validator(response) -> Optional[str]:
+    """Valeur utilisable dans If-Range : un ETag fort, sinon Last-Modified (None si aucun)."""
+    etag = response.headers.get('etag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return response.headers.get('last-modified')
+
+
+def _finalize_download(part_path: Path, dest_path: Path, digest, size: int, resumed: bool) -> Dict[str, Any]:
+    os.replace(part_path, dest_path)
+    part_path.with_name(dest_path.name + VALIDATOR_SUFFIX).unlink(missing_ok=True)
+    sha256 = digest.hexdigest()
+    dest_path.with_name(dest_path.name + CHECKSUM_SUFFIX).write_text(f"{sha256}  {dest_path.name}\n", encoding='utf-8')
+    logger.info(f"Téléchargement terminé: {dest_path.name} ({size} octets, reprise={resumed})")
+    return {"path": str(dest_path), "size": size, "sha256": sha256, "resumed": resumed}
+
+
+def download_to_file(url: str, dest_path: str | Path, timeout: int = 30,
+                     max_bytes: Optional[int] = None, expected_content_type: Optional[str] = None,
+                     chunk_size: Optional[int] = None, resume: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Télécharge une URL vers un fichier en streaming, sans jamais charger le contenu en mémoire.
+
+    Le contenu est écrit dans `<dest>.part` puis renommé atomiquement. Si un fichier partiel
+    suffisamment gros existe déjà, la reprise se fait via une requête `Range` conditionnée par
+    `If-Range` (ETag ou Last-Modified de la première réponse) : si le fichier a changé, le serveur
+    renvoie 200 et le téléchargement repart de zéro. Sur 416, un partiel complet est finalisé,
+    sinon il est supprimé. Le SHA-256 du fichier final est enregistré dans `<dest>.sha256`.
+
+    Returns:
+        Un dictionnaire {path, size, sha256, resumed} ou None en cas d'échec.
+    Raises:
+        DownloadTooLargeError: si le fichier dépasse `max_bytes`.
+    """
+    dest_path = Path(dest_path)
+    part_path = dest_path.with_name(dest_path.name + PART_SUFFIX)
+    validator_path = dest_path.with_name(dest_path.name + VALIDATOR_SUFFIX)
+    max_bytes = max_bytes if max_bytes is not None else config.PDF_MAX_SIZE_MB * 1024 * 1024
+    chunk_size = chunk_size or config.PDF_DOWNLOAD_CHUNK_SIZE
+    resume_min_bytes = config.PDF_RESUME_MIN_SIZE_MB * 1024 * 1024
+
+    offset = 0
+    headers = {}
+    # Sans validateur, rien ne garantit que le partiel provient de la version actuelle du fichier
+    if resume and part_path.exists() and validator_path.exists() and part_path.stat().st_size >= resume_min_bytes:
+        offset = part_path.stat().st_size
+        headers['Range'] = f"bytes={offset}-"
+        headers['If-Range'] = validator_path.read_text(encoding='utf-8').strip()
+
+    session = get_http_session()
+    try:
+        with session.get(url, timeout=timeout, stream=True, headers=headers) as response:
+            if offset and response.status_code == 416:
+                # Partiel déjà complet (arrêt avant le renommage) ou fichier distant raccourci
+                match = _UNSATISFIED_RANGE.match(response.headers.get('content-range', ''))
+                if match and int(match.group(1)) == offset:
+                    return _finalize_download(part_path, dest_path, _sha256_of_file(part_path, chunk_size), offset, True)
+                logger.warning(f"Reprise refusée pour {url} (416) : le fichier partiel est abandonné.")
+                part_path.unlink(missing_ok=True)
+                validator_path.unlink(missing_ok=True)
+                restart = True
+            else:
+                restart = False
+                response.raise_for_status()
+
+                content_type = response.headers.get('content-type', '')
+                if expected_content_type and not content_type.startswith(expected_content_type):
+                    logger.warning(f"Type de contenu inattendu pour {url}: {content_type}")
+                    return None
+
+                # Seul un 206 prolonge le partiel ; un 200 (Range ignoré ou If-Range non satisfait) repart de zéro
+                resumed = offset > 0 and response.status_code == 206
+                if offset and not resumed:
+                    offset = 0
+
+                content_length = response.headers.get('content-length')
+                if content_length and content_length.isdigit() and offset + int(content_length) > max_bytes:
+                    raise DownloadTooLargeError(f"{url} annonce {offset + int(content_length)} octets (max {max_bytes}).")
+
+                dest_path.parent.mkdir(parents=True, exist_ok=True)
+                if resumed:
+                    digest = _sha256_of_file(part_path, chunk_size)
+                else:
+                    digest = hashlib.sha256()
+                    validator = _response_validator(response)
+                    if validator:
+                        validator_path.write_text(validator, encoding='utf-8')
+                    else:
+                        validator_path.unlink(missing_ok=True)
+                written = offset
+                with open(part_path, 'ab' if resumed else 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        if not chunk:
+                            continue
+                        written += len(chunk)
+                        if written > max_bytes:
+                            raise DownloadTooLargeError(f"{url} dépasse la taille maximale de {max_bytes} octets.")
+                        f.write(chunk)
+                        digest.update(chunk)
+    except DownloadTooLargeError:
+        part_path.unlink(missing_ok=True)
+        validator_path.unlink(missing_ok=True)
+        raise
+    except Exception as e:
+        # Le fichier partiel est conservé pour une reprise ultérieure.
+        logger.error(f"Erreur de téléchargement {url}: {e}")
+        return None
+
+    if restart:
+        return download_to_file(url, dest_path, timeout=timeout, max_bytes=max_bytes,
+                                expected_content_type=expected_content_type, chunk_size=chunk_size, resume=False)
+    return _finalize_download(part_path, dest_path, digest, written, resumed)
+
+
+def download_pdf(url: str, dest_path: str | Path, timeout: int = 60) -> Optional[Dict[str, Any]]:
+    """Télécharge un PDF en streaming avec la limite de taille configurée."""
+    try:
+        return download_to_file(url, dest_path, timeout=timeout, expected_content_type='application/pdf')
+    except DownloadTooLargeError as e:
+        logger.warning(f"PDF ignoré (trop volumineux): {e}")
+        return None
@@ -0,0 +1,158 @@
+# utils/embedding_cache.py - Cache partagé des embeddings (clé : modèle + empreinte du texte normalisé)
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+import utils.app_globals as app_globals
+
+# Import de la configuration de manière sécurisée
+try:
+    from backend.config.config_v4 import get_config
+    config = get_config()
+except ImportError:
+    # Fallback pour un contexte où le module config n'est pas dans le path
+    class FallbackConfig:
+        EMBEDDING_CACHE_ENABLED = True
+        EMBEDDING_CACHE_PATH = None
+    config = FallbackConfig()
+
+logger = logging.getLogger(__name__)
+
+# Nombre maximal de paramètres par requête SQLite (limite historique : 999)
+_SQL_BATCH = 500
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS embeddings (
+        model TEXT NOT NULL,
+        text_hash BLOB NOT NULL,
+        dim INTEGER NOT NULL,
+        vector BLOB NOT NULL,
+        PRIMARY KEY (model, text_hash)
+    ) WITHOUT ROWID
+"""
+
+
+def normalize_text(text: str) -> str:
+    """Forme canonique d'un segment : Unicode NFC, espaces normalisés (la casse est conservée)."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+def text_key(text: str) -> bytes:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """
+    Magasin SQLite (WAL) de vecteurs float16, partagé par tous les projets et tous les workers :
+    un même PDF joint à plusieurs projets, ou réindexé après un échec, n'est encodé qu'une fois.
+    Le fichier peut être supprimé à tout moment ; il se reconstitue au fil des encodages.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Une connexion par processus : les workers RQ forkent un processus par tâche
+        if self._conn is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(_SCHEMA)
+            self._pid = os.getpid()
+        return self._conn
+
+    def get_many(self, model_name: str, keys: Sequence[bytes]) -> Dict[bytes, np.ndarray]:
+        found: Dict[bytes, np.ndarray] = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            conn = self._connection()
+            for start in range(0, len(unique), _SQL_BATCH):
+                batch = unique[start:start + _SQL_BATCH]
+                rows = conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({','.join('?' * len(batch))})",
+                    [model_name, *batch],
+                )
+                for key, blob in rows:
+                    found[bytes(key)] = np.frombuffer(blob, dtype=np.float16)
+        return found
+
+    def put_many(self, model_name: str, vectors: Dict[bytes, np.ndarray]):
+        rows = [(model_name, key, int(vec.shape[0]), np.asarray(vec, dtype=np.float16).tobytes())
+                for key, vec in vectors.items()]
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN")
+            try:
+                conn.executemany("INSERT OR IGNORE INTO embeddings (model, text_hash, dim, vector) VALUES (?, ?, ?, ?)", rows)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Cache du processus (None si désactivé par EMBEDDING_CACHE_ENABLED)."""
+    global _cache
+    if not config.EMBEDDING_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            path = config.EMBEDDING_CACHE_PATH or Path(app_globals.PROJECTS_DIR) / ".cache" / "embeddings.sqlite3"
+            _cache = EmbeddingCache(path)
+        return _cache
+
+
+def encode_texts(model, texts: Sequence[str], model_name: str, batch_size: int = 32,
+                 cache: Optional[EmbeddingCache] = None) -> np.ndarray:
+    """
+    Encode `texts` avec `model` en ne calculant que les textes absents du cache (et une seule
+    fois les doublons). Les vecteurs sont rendus en float32, arrondis à la précision float16
+    du cache pour qu'un texte ait le même vecteur qu'il soit calculé ou relu.
+    """
+    cache = cache if cache is not None else get_embedding_cache()
+    keys = [text_key(text) for text in texts]
+    cached: Dict[bytes, np.ndarray] = {}
+    if cache is not None:
+        try:
+            cached = cache.get_many(model_name, keys)
+        except sqlite3.Error as e:
+            logger.warning(f"Cache d'embeddings illisible, encodage complet: {e}")
+            cache = None
+
+    missing: Dict[bytes, str] = {}
+    for key, text in zip(keys, texts):
+        if key not in cached and key not in missing:
+            missing[key] = text
+
+    if missing:
+        computed = np.asarray(
+            model.encode(list(missing.values()), batch_size=batch_size, show_progress_bar=False, convert_to_numpy=True),
+            dtype=np.float32,
+        )
+        fresh = dict(zip(missing, computed.astype(np.float16)))
+        if cache is not None:
+            try:
+                cache.put_many(model_name, fresh)
+            except sqlite3.Error as e:
+                logger.warning(f"Écriture dans le cache d'embeddings impossible: {e}")
+        cached.update(fresh)
+
+    if not keys:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.stack([cached[key] for key in keys]).astype(np.float32)
@@ -0,0 +1,326 @@
+# utils/exporters.py - Exports de projet en streaming (Excel constant_memory, CSV, Parquet)
+
+import csv
+import io
+import json
+import logging
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence
+
+import xlsxwriter
+from sqlalchemy import text
+
+from utils.models import Extraction, SearchResult
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Nombre de lignes lues par aller-retour sur le curseur serveur (et par row group Parquet)
+EXPORT_BATCH_SIZE = 2000
+EXPORT_FORMATS = ('xlsx', 'csv', 'parquet')
+EXCEL_MAX_CELL_LENGTH = 32767
+
+# Toutes les colonnes des tables, comme l'ancien export pandas ; extracted_data est aplati à part (data.*)
+# et les colonnes JSON (validations, atn_justifications) passent par export_value
+SEARCH_RESULT_COLUMNS = [col.name for col in SearchResult.__table__.columns]
+EXTRACTION_COLUMNS = [col.name for col in Extraction.__table__.columns if col.name != 'extracted_data']
+ROB_COLUMNS = ['pmid', 'article_id', 'domain', 'domain_1_bias', 'domain_1_justification', 'domain_2_bias',
+               'domain_2_justification', 'judgement', 'overall_bias', 'overall_justification', 'assessed_at']
+
+
+def export_value(value: Any) -> Any:
+    """Convertit une valeur de base en scalaire exportable (texte, nombre, booléen ou None)."""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def stream_rows(session, sql: str, params: Mapping[str, Any], batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[Mapping[str, Any]]:
+    """Itère sur le résultat d'une requête via un curseur côté serveur (yield_per) : la mémoire reste bornée."""
+    result = session.execute(text(sql), params, execution_options={"yield_per": batch_size})
+    for row in result.mappings():
+        yield row
+
+
+def extracted_data_fields(session, project_id: str) -> List[str]:
+    """Champs de grille présents dans extracted_data, pour fixer les colonnes avant de streamer les lignes."""
+    return session.execute(text("""
+        SELECT DISTINCT jsonb_object_keys(extracted_data) AS field
+        FROM extractions
+        WHERE project_id = :pid AND jsonb_typeof(extracted_data) = 'object'
+        ORDER BY field
+    """), {"pid": project_id}).scalars().all()
+
+
+def flatten_extraction(row: Mapping[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+    """Aplatit extracted_data en colonnes de premier niveau (préfixe 'data.')."""
+    flat = {col: row.get(col) for col in EXTRACTION_COLUMNS}
+    data = row.get('extracted_data')
+    if isinstance(data, str):
+        try:
+            data = json.loads(data)
+        except ValueError:
+            data = None
+    data = data if isinstance(data, dict) else {}
+    for field in fields:
+        flat[f"data.{field}"] = data.get(field)
+    return flat
+
+
+# ----------------------------------------------------------------------
+# Écrivains : une feuille = un flux de lignes, écrit au fil de l'eau
+# ----------------------------------------------------------------------
+
+class ExcelStreamWriter:
+    """Classeur xlsxwriter en mode constant_memory : chaque ligne est écrite puis libérée."""
+
+    suffix = '.xlsx'
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.workbook = xlsxwriter.Workbook(str(self.path), {'constant_memory': True, 'strings_to_urls': False})
+        self.header_format = self.workbook.add_format({'bold': True})
+
+    def write_sheet(self, name: str, columns: Sequence[str], rows: Iterable[Mapping[str, Any]]) -> int:
+        sheet = self.workbook.add_worksheet(name[:31])
+        sheet.write_row(0, 0, columns, self.header_format)
+        count = 0
+        for count, row in enumerate(rows, start=1):
+            values = []
+            for col in columns:
+                value = export_value(row.get(col))
+                if isinstance(value, str) and len(value) > EXCEL_MAX_CELL_LENGTH:
+                    value = value[:EXCEL_MAX_CELL_LENGTH]
+                values.append(value)
+            sheet.write_row(count, 0, values)
+        return count
+
+    def close(self):
+        self.workbook.close()
+
+
+class CsvZipStreamWriter:
+    """
+    Archive ZIP contenant un CSV par feuille, écrit directement dans l'entrée compressée.
+    Peut aussi écrire dans une archive déjà ouverte (`archive`), qui reste alors à fermer par l'appelant.
+    """
+
+    suffix = '.zip'
+
+    def __init__(self, path=None, archive: Optional[zipfile.ZipFile] = None):
+        self.path = Path(path) if path else None
+        self._owns_archive = archive is None
+        self.archive = archive or zipfile.ZipFile(self.path, 'w', compression=zipfile.ZIP_DEFLATED)
+
+    def write_sheet(self, name: str, columns: Sequence[str], rows: Iterable[Mapping[str, Any]]) -> int:
+        count = 0
+        with self.archive.open(f"{name.lower().replace(' ', '_')}.csv", 'w', force_zip64=True) as raw:
+            stream = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+            writer = csv.writer(stream)
+            writer.writerow(columns)
+            for count, row in enumerate(rows, start=1):
+                writer.writerow([export_value(row.get(col)) for col in columns])
+            stream.flush()
+            stream.detach()
+        return count
+
+    def close(self):
+        if self._owns_archive:
+            self.archive.close()
+
+
+class ParquetStreamWriter:
+    """Un fichier Parquet par feuille, écrit par row groups de EXPORT_BATCH_SIZE lignes."""
+
+    suffix = '_parquet'
+
+    def __init__(self, path, batch_size: int = EXPORT_BATCH_SIZE):
+        if not PARQUET_AVAILABLE:
+            raise RuntimeError("pyarrow n'est pas installé : export Parquet indisponible.")
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+
+    def write_sheet(self, name: str, columns: Sequence[str], rows: Iterable[Mapping[str, Any]],
+                    schema: Optional["pa.Schema"] = None) -> int:
+        # Sans schéma explicite, tout est exporté en texte (types hétérogènes des champs de grille)
+        schema = schema or pa.schema([(col, pa.string()) for col in columns])
+        as_text = {f.name for f in schema if _is_text_type(f.type)}
+        file_path = self.path / f"{name.lower().replace(' ', '_')}.parquet"
+        count = 0
+        with pq.ParquetWriter(str(file_path), schema, compression='zstd', use_dictionary=True) as writer:
+            batch: Dict[str, list] = {col: [] for col in columns}
+            for count, row in enumerate(rows, start=1):
+                for col in columns:
+                    value = row.get(col)
+                    if col in as_text:
+                        value = export_value(value)
+                        value = str(value) if value is not None else None
+                    elif isinstance(value, Decimal):
+                        value = float(value)
+                    batch[col].append(value)
+                if count % self.batch_size == 0:
+                    writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+                    batch = {col: [] for col in columns}
+            if not count or count % self.batch_size:
+                writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+        return count
+
+    def close(self):
+        pass
+
+
+def _is_text_type(arrow_type) -> bool:
+    if pa.types.is_dictionary(arrow_type):
+        arrow_type = arrow_type.value_type
+    return pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type)
+
+
+def open_export_writer(export_format: str, base_path):
+    """Instancie l'écrivain du format demandé (fichier .xlsx, archive .zip de CSV ou répertoire Parquet)."""
+    writers = {'xlsx': ExcelStreamWriter, 'csv': CsvZipStreamWriter, 'parquet': ParquetStreamWriter}
+    if export_format not in writers:
+        raise ValueError(f"Format d'export inconnu: {export_format} (attendu: {', '.join(EXPORT_FORMATS)})")
+    writer_cls = writers[export_format]
+    return writer_cls(Path(f"{base_path}{writer_cls.suffix}"))
+
+
+def export_project_report(session, project_id: str, writer, batch_size: int = EXPORT_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Écrit les feuilles du rapport (résultats, extractions aplaties, risque de biais, vue combinée)
+    en streamant chaque requête. Aucune table n'est chargée entièrement en mémoire.
+    La fermeture de `writer` reste à la charge de l'appelant.
+    """
+    params = {"pid": project_id}
+    fields = extracted_data_fields(session, project_id)
+    extraction_columns = EXTRACTION_COLUMNS + [f"data.{field}" for field in fields]
+    counts = {}
+
+    counts['Search Results'] = writer.write_sheet('Search Results', SEARCH_RESULT_COLUMNS, stream_rows(session, f"""
+        SELECT {', '.join(SEARCH_RESULT_COLUMNS)} FROM search_results WHERE project_id = :pid ORDER BY created_at, id
+    """, params, batch_size))
+
+    counts['Extractions'] = writer.write_sheet('Extractions', extraction_columns, (
+        flatten_extraction(row, fields) for row in stream_rows(session, f"""
+            SELECT {', '.join(EXTRACTION_COLUMNS)}, extracted_data FROM extractions WHERE project_id = :pid ORDER BY pmid
+        """, params, batch_size)
+    ))
+
+    counts['Risk of Bias'] = writer.write_sheet('Risk of Bias', ROB_COLUMNS, stream_rows(session, f"""
+        SELECT {', '.join(ROB_COLUMNS)} FROM risk_of_bias WHERE project_id = :pid ORDER BY pmid
+    """, params, batch_size))
+
+    # Jointure faite par PostgreSQL (et non par pandas.merge en mémoire)
+    combined_columns = SEARCH_RESULT_COLUMNS + [f"extraction.{col}" for col in extraction_columns if col not in ('pmid', 'title')]
+    combined_sql = f"""
+        SELECT {', '.join('s.' + col for col in SEARCH_RESULT_COLUMNS)},
+               {', '.join(f'e.{col} AS "e.{col}"' for col in EXTRACTION_COLUMNS)}, e.extracted_data AS "e.extracted_data"
+        FROM search_results s
+        LEFT JOIN extractions e ON e.project_id = s.project_id AND e.pmid = s.article_id
+        WHERE s.project_id = :pid
+        ORDER BY s.created_at, s.id
+    """
+
+    def combined_rows():
+        for row in stream_rows(session, combined_sql, params, batch_size):
+            extraction = flatten_extraction({k[2:]: v for k, v in row.items() if k.startswith('e.')}, fields)
+            merged = {col: row[col] for col in SEARCH_RESULT_COLUMNS}
+            merged.update({f"extraction.{k}": v for k, v in extraction.items()})
+            yield merged
+
+    counts['Combined Data'] = writer.write_sheet('Combined Data', combined_columns, combined_rows())
+    return counts
+
+
+# ----------------------------------------------------------------------
+# Instantané Parquet d'un projet (analyses hors ligne, notebooks)
+# ----------------------------------------------------------------------
+
+SNAPSHOT_VERSION = 1
+
+
+def _snapshot_tables(fields: Sequence[str]) -> Dict[str, tuple]:
+    """Tables de l'instantané : (requête, schéma Arrow). Les colonnes à faible cardinalité sont dictionnaires."""
+    category = pa.dictionary(pa.int32(), pa.string())
+    ts = pa.timestamp('us')
+    return {
+        'search_results': ("""
+            SELECT article_id, title, abstract, authors, publication_date, journal, doi, url, database_source,
+                   duplicate_of, created_at
+            FROM search_results WHERE project_id = :pid ORDER BY created_at, id
+        """, pa.schema([('article_id', pa.string()), ('title', pa.string()), ('abstract', pa.string()),
+                        ('authors', pa.string()), ('publication_date', pa.string()), ('journal', category),
+                        ('doi', pa.string()), ('url', pa.string()), ('database_source', category),
+                        ('duplicate_of', pa.string()), ('created_at', ts)])),
+        'extractions': ("""
+            SELECT pmid, title, relevance_score, relevance_justification, user_validation_status, analysis_source,
+                   atn_score, atn_category, atn_justifications, atn_algorithm_version, atn_processing_time,
+                   created_at, extracted_data
+            FROM extractions WHERE project_id = :pid ORDER BY pmid
+        """, pa.schema([('pmid', pa.string()), ('title', pa.string()), ('relevance_score', pa.float64()),
+                        ('relevance_justification', pa.string()), ('user_validation_status', category),
+                        ('analysis_source', category), ('atn_score', pa.float64()), ('atn_category', category),
+                        ('atn_justifications', pa.string()), ('atn_algorithm_version', category),
+                        ('atn_processing_time', pa.float64()), ('created_at', ts)]
+                       + [(f"data.{field}", pa.string()) for field in fields])),
+        'risk_of_bias': ("""
+            SELECT pmid, article_id, domain, domain_1_bias, domain_1_justification, domain_2_bias,
+                   domain_2_justification, judgement, overall_bias, overall_justification, assessed_at
+            FROM risk_of_bias WHERE project_id = :pid ORDER BY pmid
+        """, pa.schema([('pmid', pa.string()), ('article_id', pa.string()), ('domain', category),
+                        ('domain_1_bias', category), ('domain_1_justification', pa.string()),
+                        ('domain_2_bias', category), ('domain_2_justification', pa.string()),
+                        ('judgement', category), ('overall_bias', category),
+                        ('overall_justification', pa.string()), ('assessed_at', ts)])),
+        'processing_log': ("""
+            SELECT pmid, article_id, task_name, status, message, details, "timestamp"
+            FROM processing_log WHERE project_id = :pid ORDER BY "timestamp", id
+        """, pa.schema([('pmid', pa.string()), ('article_id', pa.string()), ('task_name', category),
+                        ('status', category), ('message', pa.string()), ('details', pa.string()),
+                        ('timestamp', ts)])),
+    }
+
+
+def export_project_snapshot(session, project_id: str, directory, batch_size: int = EXPORT_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Écrit un instantané Parquet du projet dans `directory` : un fichier par table, typé,
+    encodé en dictionnaire pour les colonnes catégorielles, écrit par row groups depuis des
+    curseurs serveur. Un manifest.json décrit le contenu (version, nombre de lignes).
+    """
+    if not PARQUET_AVAILABLE:
+        raise RuntimeError("pyarrow n'est pas installé : instantané Parquet indisponible.")
+
+    fields = extracted_data_fields(session, project_id)
+    writer = ParquetStreamWriter(directory, batch_size=batch_size)
+    counts = {}
+    for name, (sql, schema) in _snapshot_tables(fields).items():
+        rows = stream_rows(session, sql, {"pid": project_id}, batch_size)
+        if name == 'extractions':
+            rows = (_snapshot_extraction(row, fields) for row in rows)
+        counts[name] = writer.write_sheet(name, schema.names, rows, schema=schema)
+
+    manifest = {"snapshot_version": SNAPSHOT_VERSION, "project_id": project_id,
+                "created_at": datetime.now().isoformat(), "rows": counts, "grid_fields": list(fields)}
+    (Path(directory) / 'manifest.json').write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding='utf-8')
+    return counts
+
+
+def _snapshot_extraction(row: Mapping[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+    flat = dict(row)
+    flat.update(flatten_extraction(row, fields))
+    return flat
@@ -0,0 +1,152 @@
+# utils/extraction_stream.py - Diffusion en flux des extractions d'un projet (JSON / NDJSON)
+
+import json
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterable, Iterator, Mapping, Optional, Sequence
+
+from flask import Response, stream_with_context
+from sqlalchemy import and_, func, select
+
+from utils.extensions import db
+from utils.models import Extraction, SearchResult
+
+logger = logging.getLogger(__name__)
+
+STREAM_BATCH_SIZE = 500
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Champs projetables (?fields=). 'abstract' nécessite la jointure avec search_results ;
+# les champs de grille sont accessibles individuellement via 'data.<champ>'.
+EXTRACTION_STREAM_FIELDS = {
+    'id': Extraction.id,
+    'project_id': Extraction.project_id,
+    'pmid': Extraction.pmid,
+    'title': Extraction.title,
+    'created_at': Extraction.created_at,
+    'relevance_score': Extraction.relevance_score,
+    'relevance_justification': Extraction.relevance_justification,
+    'user_validation_status': Extraction.user_validation_status,
+    'analysis_source': Extraction.analysis_source,
+    'validations': Extraction.validations,
+    'extracted_data': Extraction.extracted_data,
+    'user_notes': Extraction.user_notes,
+    'atn_score': Extraction.atn_score,
+    'atn_category': Extraction.atn_category,
+    'atn_justifications': Extraction.atn_justifications,
+    'abstract': SearchResult.abstract,
+}
+# Mêmes clés que Extraction.to_dict(), pour la compatibilité avec le frontend existant
+DEFAULT_EXTRACTION_FIELDS = ('id', 'project_id', 'pmid', 'title', 'relevance_score',
+                             'user_validation_status', 'validations', 'extracted_data')
+_EMPTY_OBJECT_FIELDS = ('validations', 'extracted_data')
+
+
+def parse_extraction_stream_args(args: Mapping[str, str], default_fields: Sequence[str] = DEFAULT_EXTRACTION_FIELDS) -> dict:
+    """
+    Valide les paramètres de requête : fields (liste séparée par des virgules), min_score
+    et category (une ou plusieurs catégories ATN). Lève ValueError si un paramètre est invalide.
+    """
+    fields = [f.strip() for f in args.get('fields', '').split(',') if f.strip()] or list(default_fields)
+    unknown = [f for f in fields if f not in EXTRACTION_STREAM_FIELDS and not (f.startswith('data.') and len(f) > 5)]
+    if unknown:
+        raise ValueError(f"Champs inconnus: {', '.join(unknown)}")
+
+    min_score = args.get('min_score')
+    if min_score not in (None, ''):
+        try:
+            min_score = float(min_score)
+        except ValueError:
+            raise ValueError(f"min_score invalide: {min_score}")
+    else:
+        min_score = None
+
+    categories = [c.strip() for c in args.get('category', '').split(',') if c.strip()]
+    return {"fields": fields, "min_score": min_score, "categories": categories}
+
+
+def build_extraction_stream_query(project_id: str, fields: Sequence[str], min_score: Optional[float] = None,
+                                  categories: Sequence[str] = (), title_from_results: bool = False):
+    """Requête projetée sur les seules colonnes demandées ; filtres et tri servis par (project_id, ...)."""
+    join_results = 'abstract' in fields or (title_from_results and 'title' in fields)
+    columns = []
+    for field in fields:
+        if field.startswith('data.'):
+            columns.append(Extraction.extracted_data[field[5:]].label(field))
+        elif field == 'title' and join_results:
+            columns.append(func.coalesce(SearchResult.title, Extraction.title).label('title'))
+        else:
+            columns.append(EXTRACTION_STREAM_FIELDS[field].label(field))
+
+    query = select(*columns).where(Extraction.project_id == project_id)
+    if join_results:
+        query = query.select_from(Extraction).outerjoin(SearchResult, and_(
+            SearchResult.project_id == Extraction.project_id, SearchResult.article_id == Extraction.pmid
+        ))
+    if min_score is not None:
+        query = query.where(Extraction.relevance_score >= min_score)
+    if categories:
+        query = query.where(Extraction.atn_category.in_(categories))
+    return query.order_by(Extraction.pmid, Extraction.id)
+
+
+def _json_default(value: Any):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Type non sérialisable: {type(value).__name__}")
+
+
+def _serialize(row: Mapping[str, Any]) -> str:
+    item = dict(row)
+    for field in _EMPTY_OBJECT_FIELDS:
+        if field in item and item[field] is None:
+            item[field] = {}
+    if 'abstract' in item and not item['abstract']:
+        item['abstract'] = "Abstract non disponible."
+    return json.dumps(item, ensure_ascii=False, default=_json_default)
+
+
+def iter_json(rows: Iterable[Mapping[str, Any]], ndjson: bool = False) -> Iterator[str]:
+    """Sérialise les lignes une à une : un objet par ligne (NDJSON) ou un tableau JSON écrit au fil de l'eau."""
+    if ndjson:
+        for row in rows:
+            yield _serialize(row) + "\n"
+        return
+    yield "["
+    for i, row in enumerate(rows):
+        yield ("," if i else "") + _serialize(row)
+    yield "]"
+
+
+def wants_ndjson(request) -> bool:
+    return request.args.get('format') == 'ndjson' or request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+
+def extractions_stream_response(project_id: str, request, default_fields: Sequence[str] = DEFAULT_EXTRACTION_FIELDS,
+                                title_from_results: bool = False) -> Response:
+    """
+    Réponse HTTP diffusant les extractions d'un projet depuis un curseur côté serveur (yield_per) :
+    ni la liste des objets ORM ni le document JSON complet ne sont matérialisés en mémoire.
+    Lève ValueError si les paramètres de requête sont invalides.
+    """
+    params = parse_extraction_stream_args(request.args, default_fields)
+    query = build_extraction_stream_query(project_id, params["fields"], params["min_score"], params["categories"],
+                                          title_from_results=title_from_results)
+    ndjson = wants_ndjson(request)
+
+    def generate():
+        result = db.session.execute(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+        try:
+            yield from iter_json(result.mappings(), ndjson=ndjson)
+        except Exception as e:
+            # Le statut 200 est déjà parti : on journalise et on tronque le flux
+            logger.error(f"Flux des extractions interrompu pour le projet {project_id}: {e}", exc_info=True)
+        finally:
+            result.close()
+
+    response = Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE if ndjson else 'application/json')
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
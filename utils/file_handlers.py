@@ -3,7 +3,7 @@ import logging
 import os
 import re
 from pathlib import Path # Déjà importé plus bas, mais on garde pour la clarté
-from typing import Optional
+from typing import List, Optional
 from werkzeug.utils import secure_filename
 
 # --- NOUVELLES IMPORTATIONS POUR L'EXTRACTION ROBUSTE ---
@@ -48,16 +48,22 @@ def sanitize_filename(filename: str) -> str:
 # En dessous, nous soupçonnons un PDF scanné et passons à l'OCR.
 MIN_TEXT_LENGTH_THRESHOLD = 15 
 
-def _clean_text(text: str) -> str:
+# Séparateur de pages dans le texte brut renvoyé par les méthodes d'extraction
+PAGE_BREAK = "\f"
+
+def _clean_text(text: str, keep_lines: bool = False) -> str:
     """
     Nettoie le texte extrait pour le RAG.
     - Supprime les ligatures courantes mal interprétées.
     - Normalise les espaces et les sauts de ligne.
     - Supprime les en-têtes/pieds de page répétitifs (basique).
+    Avec `keep_lines`, les lignes ne sont pas recollées (détection des titres par le découpeur).
     """
     if not text:
         return ""
 
+    text = text.replace(PAGE_BREAK, "\n\n")
+
     # Correction des ligatures et césures courantes
     text = re.sub(r'(\w)-\s*\n\s*(\w)', r'\1\2', text) # Retrait césure
     text = re.sub(r'\s*ﬁ\s*', 'fi', text)
@@ -66,7 +72,8 @@ def _clean_text(text: str) -> str:
     # Normalisation des espaces
     text = re.sub(r'[ \t]+', ' ', text) # Espaces multiples
     text = re.sub(r'\n[ \t\n]*\n', '\n\n', text) # Lignes vides multiples -> max 2
-    text = re.sub(r'(\w)\n(\w)', r'\1 \2', text) # Ligne coupée au milieu d'une phrase
+    if not keep_lines:
+        text = re.sub(r'(\w)\n(\w)', r'\1 \2', text) # Ligne coupée au milieu d'une phrase
 
     # (Optionnel - basique) Tenter de supprimer les numéros de page
     text = re.sub(r'\n\s*\d+\s*\n', '\n', text, flags=re.MULTILINE)
@@ -84,9 +91,7 @@ def _extract_text_with_pymupdf(pdf_path: Path) -> Optional[str]:
                     logger.error(f"Échec de l'authentification pour le PDF {pdf_path.name}.")
                     return None
             
-            text = ""
-            for page in doc:
-                text += page.get_text("text") + "\n\n"
+            text = PAGE_BREAK.join(page.get_text("text") for page in doc)
         
         logger.info(f"PyMuPDF: Extraction réussie pour {pdf_path.name} (len: {len(text)})")
         return text
@@ -98,7 +103,7 @@ def _extract_text_with_pymupdf(pdf_path: Path) -> Optional[str]:
 def _extract_text_with_pdfplumber(pdf_path: Path) -> Optional[str]:
     """Méthode 2: Plus lente, meilleure analyse de layout."""
     try:
-        text = ""
+        pages = []
         with pdfplumber.open(pdf_path) as pdf:
             if pdf.is_encrypted:
                 logger.warning(f"PDFPlumber: {pdf_path.name} crypté, tentative.")
@@ -115,9 +120,9 @@ def _extract_text_with_pdfplumber(pdf_path: Path) -> Optional[str]:
                     use_text_flow=True, # Tente de respecter l'ordre de lecture
                     layout=True # Utilise l'analyse de layout
                 )
-                if page_text:
-                    text += page_text + "\n\n"
-        
+                pages.append(page_text or "")
+
+        text = PAGE_BREAK.join(pages)
         logger.info(f"PDFPlumber: Extraction réussie pour {pdf_path.name} (len: {len(text)})")
         return text
     except Exception as e:
@@ -135,19 +140,20 @@ def _extract_text_with_ocr(pdf_path: Path) -> Optional[str]:
     try:
         # Utilise poppler-utils (dépendance système)
         images = convert_from_path(pdf_path, dpi=300)
-        text = ""
+        pages = []
         for i, img in enumerate(images):
             try:
                 # Tente d'extraire en français + anglais (pour les termes techniques)
-                page_text = pytesseract.image_to_string(img, lang='fra+eng')
-                text += page_text + "\n\n"
+                pages.append(pytesseract.image_to_string(img, lang='fra+eng'))
                 logger.debug(f"OCR: Page {i+1}/{len(images)} extraite.")
             except pytesseract.TesseractNotFoundError:
                 logger.error("ERREUR CRITIQUE: Tesseract OCR n'est pas installé ou pas dans le PATH.")
                 return "Erreur: Tesseract OCR non configuré sur le serveur."
             except Exception as e:
                 logger.warning(f"OCR: Échec sur la page {i+1} de {pdf_path.name}: {e}")
-        
+                pages.append("")
+
+        text = PAGE_BREAK.join(pages)
         logger.info(f"OCR: Extraction terminée pour {pdf_path.name} (len: {len(text)})")
         return text
     except Exception as e:
@@ -155,10 +161,10 @@ def _extract_text_with_ocr(pdf_path: Path) -> Optional[str]:
         return None
 
 
-def extract_text_from_pdf(pdf_path: str) -> str:
+def _extract_raw_text(pdf_path: str) -> str:
     """
-    Extrait le texte brut d'un fichier PDF en utilisant une stratégie
-    de fallback robuste (PyMuPDF -> PDFPlumber -> OCR).
+    Texte brut d'un PDF (pages séparées par PAGE_BREAK), avec une stratégie de fallback
+    robuste (PyMuPDF -> PDFPlumber -> OCR).
     """
     # --- MODIFIEZ CES LIGNES ---
     # file_path = Path(pdf_path) # Commentez ou supprimez cette ligne
@@ -174,7 +180,7 @@ def extract_text_from_pdf(pdf_path: str) -> str:
     
     if text and len(text) >= MIN_TEXT_LENGTH_THRESHOLD:
         logger.info(f"Stratégie 1 (PyMuPDF) réussie pour {file_path.name}.")
-        return _clean_text(text)
+        return text
         
     logger.warning(f"PyMuPDF a renvoyé peu de texte ({len(text) if text else 0} chars). Essai avec PDFPlumber.")
 
@@ -183,7 +189,7 @@ def extract_text_from_pdf(pdf_path: str) -> str:
     
     if text and len(text) >= MIN_TEXT_LENGTH_THRESHOLD:
         logger.info(f"Stratégie 2 (PDFPlumber) réussie pour {file_path.name}.")
-        return _clean_text(text)
+        return text
 
     logger.warning(f"PDFPlumber a aussi renvoyé peu de texte ({len(text) if text else 0} chars). Passage à l'OCR.")
 
@@ -192,11 +198,30 @@ def extract_text_from_pdf(pdf_path: str) -> str:
     
     if text and len(text) > 0:
         logger.info(f"Stratégie 3 (OCR) réussie pour {file_path.name}.")
-        return _clean_text(text)
+        return text
 
     logger.error(f"ÉCHEC TOTAL de l'extraction pour {file_path.name}. Aucune méthode n'a fonctionné.")
     return ""
 
+
+def extract_text_from_pdf(pdf_path: str) -> str:
+    """
+    Extrait le texte brut d'un fichier PDF en utilisant une stratégie
+    de fallback robuste (PyMuPDF -> PDFPlumber -> OCR).
+    """
+    return _clean_text(_extract_raw_text(pdf_path))
+
+
+def extract_pages_from_pdf(pdf_path: str) -> List[str]:
+    """
+    Extrait le texte d'un PDF page par page (même stratégie de fallback), nettoyé mais
+    avec ses lignes : utilisé par le découpeur RAG pour les titres et numéros de page.
+    """
+    text = _extract_raw_text(pdf_path)
+    if not text:
+        return []
+    return [_clean_text(page, keep_lines=True) for page in text.split(PAGE_BREAK)]
+
 def save_file_to_project_dir(file_storage, project_id, filename, projects_dir):
     """Sauvegarde un FileStorage dans le dossier du projet."""
     project_dir = projects_dir / project_id
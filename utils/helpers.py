@@ -4,23 +4,13 @@ import logging
 import requests
 import time
 from typing import Optional, Any
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+from utils.downloads import get_http_session
 
 logger = logging.getLogger(__name__)
 
 def http_get_with_retries(url: str, timeout: int = 30, max_retries: int = 3) -> Optional[requests.Response]:
-    """Effectue une requête GET avec retry automatique."""
-    session = requests.Session()
-    retry_strategy = Retry(
-        total=max_retries,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=["HEAD", "GET", "OPTIONS"],
-        backoff_factor=1,
-    )
-    adapter = HTTPAdapter(max_retries=retry_strategy)
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
+    """Effectue une requête GET avec retry automatique (session partagée du processus)."""
+    session = get_http_session(max_retries)
     try:
         response = session.get(url, timeout=timeout)
         response.raise_for_status()
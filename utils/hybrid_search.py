@@ -0,0 +1,210 @@
+# utils/hybrid_search.py - Recherche hybride du chat : index lexical BM25 + index vectoriel, fusion RRF
+
+import logging
+import re
+import sqlite3
+import unicodedata
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from utils.vector_store import project_store_path
+
+# Import de la configuration de manière sécurisée
+try:
+    from backend.config.config_v4 import get_config
+    config = get_config()
+except ImportError:
+    # Fallback pour un contexte où le module config n'est pas dans le path
+    class FallbackConfig:
+        RAG_TOP_K = 3
+        RAG_CANDIDATES = 20
+        RAG_RRF_K = 60
+    config = FallbackConfig()
+
+logger = logging.getLogger(__name__)
+
+LEXICAL_INDEX_FILENAME = "lexical.sqlite3"
+_SQL_BATCH = 500
+_SYNC_BATCH = 1000
+# Au-delà, une question est un collage de texte : les termes suivants n'améliorent plus le classement
+_MAX_QUERY_TERMS = 32
+# Un terme présent dans plus de cette part des segments ne discrimine rien (IDF ~ 0) mais oblige
+# BM25 à classer presque tout l'index : il est retiré de la requête
+_MAX_TERM_DOC_RATIO = 0.2
+_MIN_DOCS_FOR_PRUNING = 1000
+_TERM_RE = re.compile(r"\w[\w\-'’]*")
+_STOPWORDS = frozenset("""
+    a an and are as at be by de des du en est et for from how in is it la le les of on or ou par pour
+    qu que quel quelle quelles quels qui sur the to un une what which who why with dans avec sont ce cette
+    ces il elle ils elles se sa son ses leur leurs au aux y does do did was were has have this that these
+""".split())
+_SCHEMA = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5(
+        chunk_id UNINDEXED, text, tokenize = "unicode61 remove_diacritics 2"
+    );
+    CREATE VIRTUAL TABLE IF NOT EXISTS chunks_vocab USING fts5vocab(chunks, 'row');
+"""
+
+
+def query_terms(question: str) -> List[str]:
+    """Termes utiles de la question (minuscules, sans mots vides ni doublons)."""
+    terms: List[str] = []
+    for term in _TERM_RE.findall(question):
+        term = term.strip("-'’")
+        if len(term) < 2 or term.lower() in _STOPWORDS or term.lower() in terms:
+            continue
+        terms.append(term.lower())
+        if len(terms) >= _MAX_QUERY_TERMS:
+            break
+    return terms
+
+
+def fts_query(terms: Sequence[str]) -> Optional[str]:
+    """
+    Requête FTS5 (OR) sur les termes. Chaque terme est cité : "WAI-SR" devient la phrase
+    « wai sr », les caractères spéciaux de FTS5 sont neutralisés.
+    """
+    return " OR ".join('"{}"'.format(term.replace('"', '""')) for term in terms) or None
+
+
+def _index_tokens(term: str) -> List[str]:
+    """Jetons produits par le tokenizer unicode61 (remove_diacritics 2) pour un terme."""
+    stripped = "".join(c for c in unicodedata.normalize("NFKD", term) if not unicodedata.combining(c))
+    return re.findall(r"[^\W_]+", stripped.lower())
+
+
+class LexicalIndex:
+    """
+    Index plein texte (SQLite FTS5, classement BM25) des segments d'un projet, tenu à jour
+    par l'indexation en même temps que la collection vectorielle et sous le même verrou.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def ids(self) -> set:
+        with closing(self._connect()) as conn:
+            return {row[0] for row in conn.execute("SELECT chunk_id FROM chunks")}
+
+    def delete(self, ids: Sequence[str]):
+        with closing(self._connect()) as conn, conn:
+            for start in range(0, len(ids), _SQL_BATCH):
+                batch = list(ids[start:start + _SQL_BATCH])
+                conn.execute(f"DELETE FROM chunks WHERE chunk_id IN ({','.join('?' * len(batch))})", batch)
+
+    def upsert(self, ids: Sequence[str], documents: Sequence[str]):
+        with closing(self._connect()) as conn, conn:
+            for start in range(0, len(ids), _SQL_BATCH):
+                batch = list(ids[start:start + _SQL_BATCH])
+                conn.execute(f"DELETE FROM chunks WHERE chunk_id IN ({','.join('?' * len(batch))})", batch)
+            conn.executemany("INSERT INTO chunks (chunk_id, text) VALUES (?, ?)", zip(ids, documents))
+
+    def search(self, question: str, limit: int) -> List[str]:
+        """Identifiants des segments les mieux classés par BM25 (vide si la question n'a aucun terme utile)."""
+        terms = query_terms(question)
+        if not terms:
+            return []
+        with closing(self._connect()) as conn:
+            terms = self._selective_terms(conn, terms)
+            query = fts_query(terms)
+            if query is None:
+                return []
+            try:
+                rows = conn.execute("SELECT chunk_id FROM chunks WHERE chunks MATCH ? ORDER BY rank LIMIT ?", (query, limit))
+                return [row[0] for row in rows]
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Requête lexicale invalide ({query!r}): {e}")
+                return []
+
+    @staticmethod
+    def _selective_terms(conn: sqlite3.Connection, terms: List[str]) -> List[str]:
+        """
+        Retire les termes absents de l'index et, sur un gros index, les termes trop fréquents
+        (fréquence documentaire lue dans fts5vocab). Une phrase est au plus aussi fréquente que son jeton le plus rare.
+        """
+        tokens = {term: _index_tokens(term) for term in terms}
+        vocabulary = sorted({token for parts in tokens.values() for token in parts})
+        if not vocabulary:
+            return []
+        frequency = dict(conn.execute(
+            f"SELECT term, doc FROM chunks_vocab WHERE term IN ({','.join('?' * len(vocabulary))})", vocabulary
+        ))
+        doc_frequency = {term: min((frequency.get(t, 0) for t in parts), default=0) for term, parts in tokens.items()}
+        # Un terme absent de l'index ne peut rien apporter
+        present = [term for term in terms if doc_frequency[term] > 0]
+        total = conn.execute("SELECT count(*) FROM chunks_docsize").fetchone()[0]
+        if total < _MIN_DOCS_FOR_PRUNING:
+            return present  # petit index : le classement complet reste instantané
+        # Sans terme sélectif, BM25 n'apporte rien à la recherche vectorielle : elle reste seule
+        return [term for term in present if doc_frequency[term] <= _MAX_TERM_DOC_RATIO * total]
+
+    def sync_from(self, collection) -> int:
+        """
+        Aligne l'index lexical sur la collection vectorielle (projets indexés avant son
+        introduction, écriture interrompue) en relisant les textes déjà stockés : rien n'est réencodé.
+        """
+        expected = set(collection.get(include=[]).get('ids') or [])
+        present = self.ids()
+        extra = list(present - expected)
+        if extra:
+            self.delete(extra)
+        missing = sorted(expected - present)
+        for start in range(0, len(missing), _SYNC_BATCH):
+            existing = collection.get(ids=missing[start:start + _SYNC_BATCH], include=['documents'])
+            self.upsert(existing['ids'], existing['documents'])
+        return len(missing) + len(extra)
+
+
+def get_lexical_index(project_id: str, create: bool = False) -> Optional[LexicalIndex]:
+    """Index lexical du projet, à côté de son index vectoriel (None s'il n'existe pas et que `create` est faux)."""
+    path = project_store_path(project_id) / LEXICAL_INDEX_FILENAME
+    if not create and not path.exists():
+        return None
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return LexicalIndex(path)
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[str]], k: int = config.RAG_RRF_K) -> List[str]:
+    """Fusion de classements (RRF) : score(d) = somme des 1 / (k + rang), sans calibrage des scores."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda item: -scores[item])
+
+
+def hybrid_retrieve(collection, lexical: Optional[LexicalIndex], question: str, query_embedding,
+                    top_k: int = config.RAG_TOP_K, candidates: int = config.RAG_CANDIDATES) -> Tuple[List[str], List[dict]]:
+    """
+    Passages du contexte du chat : les `candidates` meilleurs segments de la recherche vectorielle
+    et de BM25 sont fusionnés par RRF, les `top_k` premiers sont renvoyés (documents, métadonnées).
+    Les sigles et noms d'instruments (WAI-SR, DiGA) mal captés par les embeddings sont retrouvés par BM25.
+    """
+    dense = collection.query(query_embeddings=query_embedding, n_results=candidates, include=['documents', 'metadatas'])
+    passages: Dict[str, Tuple[str, dict]] = {}
+    dense_ids = (dense.get('ids') or [[]])[0]
+    documents = (dense.get('documents') or [[]])[0]
+    metadatas = (dense.get('metadatas') or [None])[0] or [None] * len(documents)
+    for seg_id, document, metadata in zip(dense_ids, documents, metadatas):
+        if document:  # les marqueurs de PDF sans texte (utils.rag_index) n'ont pas de document
+            passages[seg_id] = (document, metadata)
+    dense_ids = [seg_id for seg_id in dense_ids if seg_id in passages]
+
+    lexical_ids = lexical.search(question, candidates) if lexical is not None else []
+    selected = reciprocal_rank_fusion([dense_ids, lexical_ids])[:top_k]
+
+    missing = [seg_id for seg_id in selected if seg_id not in passages]
+    if missing:
+        fetched = collection.get(ids=missing, include=['documents', 'metadatas'])
+        for seg_id, document, metadata in zip(fetched['ids'], fetched['documents'], fetched.get('metadatas') or [None] * len(missing)):
+            passages[seg_id] = (document, metadata)
+
+    selected = [seg_id for seg_id in selected if seg_id in passages]
+    return [passages[seg_id][0] for seg_id in selected], [passages[seg_id][1] for seg_id in selected]
@@ -6,11 +6,109 @@ import hashlib
 import logging
 import pandas as pd
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Iterator
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Taille des lots pour l'import en streaming (extraction + dédup + insertion)
+ZOTERO_IMPORT_BATCH_SIZE = 500
+_JSON_READ_CHUNK = 1 << 16
+_JSON_WHITESPACE = " \t\n\r"
+
+
+class _JsonStreamReader:
+    """Lecteur incrémental : décode des valeurs JSON successives depuis un fichier lu par blocs."""
+
+    def __init__(self, fp, chunk_size: int = _JSON_READ_CHUNK):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.fp.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # On libère la partie déjà consommée pour garder un buffer de taille bornée
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Retourne le prochain caractère non blanc sans le consommer ('' en fin de fichier)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _JSON_WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"'{char}' attendu", self.buffer, self.pos)
+        self.pos += 1
+
+    def value(self):
+        """Décode la prochaine valeur JSON complète, en relisant des blocs tant qu'elle est tronquée."""
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # Un nombre en fin de buffer peut être tronqué : on s'assure qu'il est terminé
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+
+def iter_zotero_json_items(json_path: str | Path, chunk_size: int = _JSON_READ_CHUNK) -> Iterator[dict]:
+    """
+    Itère sur les items d'un export JSON Zotero sans charger le fichier en mémoire.
+    Accepte un objet `{"items": [...]}` (les autres clés sont ignorées) ou une liste racine.
+    """
+    with open(json_path, 'r', encoding='utf-8') as fp:
+        reader = _JsonStreamReader(fp, chunk_size)
+        first = reader.peek()
+        if first == '{':
+            reader.expect('{')
+            while reader.peek() not in ('}', ''):
+                key = reader.value()
+                reader.expect(':')
+                if key == "items" and reader.peek() == '[':
+                    break
+                reader.value()  # valeur ignorée
+                if reader.peek() == ',':
+                    reader.expect(',')
+            else:
+                return
+        elif first != '[':
+            if first:
+                raise json.JSONDecodeError("Objet ou liste JSON attendu", reader.buffer, reader.pos)
+            return
+
+        reader.expect('[')
+        if reader.peek() == ']':
+            return
+        while True:
+            yield reader.value()
+            nxt = reader.peek()
+            if nxt == ',':
+                reader.expect(',')
+            elif nxt == ']':
+                return
+            else:
+                raise json.JSONDecodeError("',' ou ']' attendu dans la liste d'items", reader.buffer, reader.pos)
+
 class ZoteroAbstractExtractor:
     def __init__(self, json_path: str):
         self.json_path = Path(json_path)
@@ -127,6 +225,36 @@ class ZoteroAbstractExtractor:
         logger.info(f"Traitement terminé. {len(unique_records)} uniques trouvés.")
         return unique_records
 
+    def iter_record_batches(self, batch_size: int = ZOTERO_IMPORT_BATCH_SIZE) -> Iterator[list[dict]]:
+        """
+        Version streaming de `process()` : lit les items de manière incrémentale et produit
+        des lots de références dédupliquées. Seuls les hashes de déduplication sont conservés
+        d'un lot à l'autre, la mémoire reste donc stable quelle que soit la taille de la bibliothèque.
+        """
+        if not self.json_path.exists():
+            raise FileNotFoundError(f"Le fichier {self.json_path} est introuvable.")
+        seen_hashes = set()
+        batch = []
+        for item in iter_zotero_json_items(self.json_path):
+            self.stats["total"] += 1
+            if not item:
+                continue
+            rec = self.extract_reference_data(item)
+            if not rec:
+                continue
+            h = rec.pop("__hash", None)
+            if h and h not in seen_hashes:
+                seen_hashes.add(h)
+                batch.append(rec)
+            else:
+                self.stats["duplicates"] += 1
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+        logger.info(f"Traitement streaming terminé. {self.stats['total']} références lues, {self.stats['duplicates']} doublons ignorés.")
+
 # --- NOUVELLES FONCTIONS POUR L'EXTENSION CHROME (AJOUTEZ CECI A LA FIN) ---
 
 def _clean_html_for_extension(text: str) -> str:
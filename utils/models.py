@@ -1,9 +1,10 @@
 import os
 from sqlalchemy import (
     Column, String, Integer, Float, Boolean, Text,
-    ForeignKey, DateTime, UniqueConstraint, Numeric
+    ForeignKey, DateTime, UniqueConstraint, Numeric, Index, text, func, event
 )
 from sqlalchemy.orm import relationship, declarative_base
+from sqlalchemy.types import TypeDecorator
 from datetime import datetime
 import uuid
 import json
@@ -13,6 +14,41 @@ from sqlalchemy.dialects.postgresql import JSONB
 
 SCHEMA = "analylit_schema"
 
+
+def _decode_json_string(value):
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return value
+
+
+class JSONDocument(TypeDecorator):
+    """
+    Colonne JSONB qui accepte aussi les chaînes JSON produites par json.dumps() (code et
+    données hérités de l'époque où ces colonnes étaient en Text). Sur un modèle, la chaîne
+    est décodée dès l'affectation de l'attribut (voir _decode_json_document_on_set) ;
+    dans une requête Core, elle l'est au moment du bind.
+    """
+    impl = JSONB
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return _decode_json_string(value)
+
+
+@event.listens_for(Base, 'attribute_instrument')
+def _decode_json_document_on_set(cls, key, inst):
+    """Sur chaque colonne JSONDocument, `obj.col = json.dumps(...)` stocke l'objet décodé."""
+    columns = getattr(inst.property, 'columns', None)
+    if not columns or not isinstance(columns[0].type, JSONDocument):
+        return
+
+    @event.listens_for(inst, 'set', retval=True)
+    def _decode(target, value, oldvalue, initiator):
+        return _decode_json_string(value)
+
 def _uuid():
     return str(uuid.uuid4())
 
@@ -27,12 +63,12 @@ class Project(Base):
     job_id = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    synthesis_result = Column(Text)
+    synthesis_result = Column(JSONDocument)
     discussion_draft = Column(Text)
-    knowledge_graph = Column(Text)
+    knowledge_graph = Column(JSONDocument)
     prisma_flow_path = Column(String)
     analysis_mode = Column(String, default='screening')
-    analysis_result = Column(Text)
+    analysis_result = Column(JSONDocument)
     analysis_plot_path = Column(String)
     pmids_count = Column(Integer, default=0)
     processed_count = Column(Integer, default=0)
@@ -40,7 +76,7 @@ class Project(Base):
     indexed_at = Column(DateTime)
     search_query = Column(Text)
     databases_used = Column(Text)
-    inter_rater_reliability = Column(Text)
+    inter_rater_reliability = Column(JSONDocument)
     prisma_checklist = Column(Text)
 
     # --- Relations ---
@@ -52,6 +88,7 @@ class Project(Base):
     processing_logs = relationship("ProcessingLog", backref="project", cascade="all, delete-orphan")
     stakeholders = relationship("Stakeholder", backref="project", cascade="all, delete-orphan")
     articles = relationship("Article", backref="project", cascade="all, delete-orphan")
+    stats = relationship("ProjectStats", backref="project", uselist=False, cascade="all, delete-orphan")
 
     def to_dict(self):
         data = {}
@@ -65,6 +102,58 @@ class Project(Base):
                 data[c.name] = v
         return data
 
+class ProjectStats(Base):
+    """
+    Statistiques agrégées d'un projet, tenues à jour par le pipeline (utils.project_stats).
+    Une ligne par projet : les tableaux de bord la lisent sans parcourir search_results / extractions.
+    """
+    __tablename__ = 'project_stats'
+
+    project_id = Column(String, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    # Section search_results
+    total_results = Column(Integer, nullable=False, server_default='0')
+    unique_results = Column(Integer, nullable=False, server_default='0')
+    duplicate_results = Column(Integer, nullable=False, server_default='0')
+    results_by_source = Column(JSONDocument, nullable=False, server_default=text("'{}'::jsonb"))
+    # Section extractions
+    screened_count = Column(Integer, nullable=False, server_default='0')
+    decisions = Column(JSONDocument, nullable=False, server_default=text("'{}'::jsonb"))
+    score_count = Column(Integer, nullable=False, server_default='0')
+    score_sum = Column(Float, nullable=False, server_default='0')
+    score_sq_sum = Column(Float, nullable=False, server_default='0')
+    score_min = Column(Float)
+    score_max = Column(Float)
+    score_median = Column(Float)
+    score_histogram = Column(JSONDocument, nullable=False, server_default=text("'{}'::jsonb"))
+    # Section PDF
+    pdf_count = Column(Integer, nullable=False, server_default='0')
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        n = self.score_count or 0
+        mean = self.score_sum / n if n else None
+        variance = max(self.score_sq_sum / n - mean * mean, 0.0) if n else None
+        return {
+            "project_id": self.project_id,
+            "total_results": self.total_results,
+            "unique_results": self.unique_results,
+            "duplicate_results": self.duplicate_results,
+            "results_by_source": self.results_by_source or {},
+            "screened_count": self.screened_count,
+            "decisions": self.decisions or {},
+            "scores": {
+                "count": n,
+                "mean": mean,
+                "std_dev": variance ** 0.5 if variance is not None else None,
+                "median": self.score_median,
+                "min": self.score_min,
+                "max": self.score_max,
+                "histogram": self.score_histogram or {},
+            },
+            "pdf_count": self.pdf_count,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
 class Article(Base):
     __tablename__ = 'articles'
     
@@ -88,6 +177,9 @@ class SearchResult(Base):
     __tablename__ = 'search_results'
     __table_args__ = (
         UniqueConstraint('project_id', 'article_id', name='uq_project_article'),
+        # File de criblage : articles non doublons d'un projet, par ordre d'arrivée
+        Index('ix_search_results_project_created_unique', 'project_id', 'created_at',
+              postgresql_where=text('duplicate_of IS NULL')),
     )
 
     id = Column(String, primary_key=True, default=_uuid)
@@ -101,14 +193,35 @@ class SearchResult(Base):
     doi = Column(String)
     url = Column(String)
     database_source = Column(String)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # NOT NULL : clé de la pagination par curseur, une comparaison de ligne avec NULL écarterait l'article
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, server_default=func.now())
     query = Column(String, nullable=True)
+    # article_id du représentant canonique si cet enregistrement est un doublon inter-sources
+    duplicate_of = Column(String, nullable=True)
 
     def to_dict(self):
         return {c.name: getattr(self, c.name) for c in self.__table__.columns}
 
+# Clés de tri autorisées pour la pagination par curseur (keyset) des résultats de recherche.
+# Chaque clé est départagée par `id` et servie par un index (project_id, clé, id).
+SEARCH_RESULT_SORT_KEYS = {
+    'created_at': SearchResult.created_at,
+    'publication_date': func.coalesce(SearchResult.publication_date, ''),
+    'title': func.left(func.coalesce(SearchResult.title, ''), 200),
+    'article_id': SearchResult.article_id,
+}
+Index('ix_search_results_keyset_created_at', SearchResult.project_id, SEARCH_RESULT_SORT_KEYS['created_at'], SearchResult.id)
+Index('ix_search_results_keyset_publication_date', SearchResult.project_id, SEARCH_RESULT_SORT_KEYS['publication_date'], SearchResult.id)
+Index('ix_search_results_keyset_title', SearchResult.project_id, SEARCH_RESULT_SORT_KEYS['title'], SearchResult.id)
+
 class Extraction(Base):
     __tablename__ = 'extractions'
+    __table_args__ = (
+        # Cible des ON CONFLICT (project_id, pmid) et de la jointure avec search_results
+        UniqueConstraint('project_id', 'pmid', name='uq_extractions_project_id_pmid'),
+        # Les agrégats par champ de grille (extracted_data->>...) sont calculés par projet : cet index suffit
+        Index('ix_extractions_project_relevance', 'project_id', 'relevance_score'),
+    )
 
     id = Column(String, primary_key=True, default=_uuid)
     project_id = Column(String, ForeignKey("projects.id"))
@@ -116,12 +229,12 @@ class Extraction(Base):
     title = Column(Text)
     validation_score = Column(Float)
     created_at = Column(DateTime, default=datetime.utcnow)
-    extracted_data = Column(Text)
+    extracted_data = Column(JSONDocument)
     relevance_score = Column(Float, default=0)
     relevance_justification = Column(Text)
     user_validation_status = Column(String)
     analysis_source = Column(String)
-    validations = Column(Text)
+    validations = Column(JSONDocument)
     user_notes = Column(Text, nullable=True)
     stakeholder_perspective = Column(String)
     ai_type = Column(String)
@@ -143,8 +256,8 @@ class Extraction(Base):
             "title": self.title,
             "relevance_score": self.relevance_score,
             "user_validation_status": self.user_validation_status,
-            "validations": json.loads(self.validations) if self.validations else {},
-            "extracted_data": json.loads(self.extracted_data) if self.extracted_data else {}
+            "validations": self.validations or {},
+            "extracted_data": self.extracted_data or {}
         }
 
 
@@ -198,7 +311,7 @@ class Analysis(Base):
     id = Column(String, primary_key=True, default=_uuid)
     project_id = Column(String, ForeignKey("projects.id"), nullable=False)
     analysis_type = Column(String)
-    results = Column(Text)
+    results = Column(JSONDocument)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     def to_dict(self):
@@ -350,6 +463,9 @@ class GreyLiterature(Base):
 
 class ProcessingLog(Base):
     __tablename__ = 'processing_log'
+    __table_args__ = (
+        Index('ix_processing_log_project_timestamp', 'project_id', 'timestamp'),
+    )
 
     id = Column(String, primary_key=True, default=_uuid)
     pmid = Column(String, nullable=True)
@@ -5,7 +5,9 @@ import logging
 import json
 import sys
 import os
-from typing import Dict, Any, Optional
+import re
+import threading
+from typing import Dict, Any, Optional, Tuple
 from datetime import datetime
 from redis import Redis
 
@@ -19,9 +21,19 @@ except ImportError:
     # Fallback pour Alembic qui n'a pas accès au module backend
     class MockConfig:
         REDIS_URL = "redis://localhost:6379/0"
+        NOTIFICATION_RATE_LIMITS = {
+            'article_processed': 0.5, 'task_progress': 0.5, 'import_progress': 0.5, 'search_progress': 0.5,
+        }
+        NOTIFICATION_STREAM_MAXLEN = 1000
     config = MockConfig()
 
 REDIS_CHANNEL = "analylit_notifications"
+# Notifications en attente de publication (fusionnées), conservées au plus ce délai (s)
+PENDING_TTL = 60
+# Journal des notifications (Redis Streams) : un flux par projet, plus un flux global
+NOTIFICATION_STREAM_TTL = 7 * 24 * 3600  # les flux des projets inactifs disparaissent d'eux-mêmes
+NOTIFICATION_READ_LIMIT = 500
+_STREAM_ID_RE = re.compile(r"^\d+(-\d+)?$")
 
 # Connexion "lazy" : initialisée à None
 _redis_conn = None
@@ -45,19 +57,189 @@ def get_redis_connection():
             _redis_conn = None 
     return _redis_conn
 
+def notification_stream_key(project_id: Optional[str] = None) -> str:
+    return f"analylit:notifications:{project_id}" if project_id else "analylit:notifications:global"
+
+
 def _publish_notification(payload: dict):
-    """Publie une notification sur le canal Redis."""
+    """
+    Publie une notification sur le canal Redis, après l'avoir ajoutée au journal (flux borné)
+    de son projet. L'identifiant d'entrée du flux est transmis dans "event_id" : un client qui
+    se reconnecte reprend la lecture à partir du dernier identifiant reçu.
+    """
     # Récupère la connexion (ou tente de la créer)
     conn = get_redis_connection() # import
     
     if conn: # Vérifie si la connexion a réussi
+        try:
+            stream_key = notification_stream_key(payload.get("project_id"))
+            pipe = conn.pipeline(transaction=False)
+            pipe.xadd(stream_key, {"payload": json.dumps(payload)}, maxlen=config.NOTIFICATION_STREAM_MAXLEN, approximate=True)
+            pipe.expire(stream_key, NOTIFICATION_STREAM_TTL)
+            event_id = pipe.execute()[0]
+            payload = {**payload, "event_id": event_id.decode() if isinstance(event_id, bytes) else event_id}
+        except Exception as e:
+            logger.error(f"Erreur lors de l'ajout de la notification au journal Redis: {e}")
         try:
             conn.publish(REDIS_CHANNEL, json.dumps(payload))
         except Exception as e:
             logger.error(f"Erreur lors de la publication de la notification sur Redis: {e}")
 
+
+def read_notifications(project_id: Optional[str], after: Optional[str] = None,
+                       limit: int = NOTIFICATION_READ_LIMIT) -> Dict[str, Any]:
+    """
+    Notifications du journal d'un projet postérieures à l'identifiant `after` (toutes si None),
+    dans l'ordre, au plus `limit`. "truncated" signale que des notifications postérieures à
+    `after` ont été purgées du flux borné : le client doit alors recharger l'état complet.
+    Lève ValueError si `after` n'est pas un identifiant de flux.
+    """
+    if after is not None and not _STREAM_ID_RE.match(after):
+        raise ValueError(f"Identifiant de notification invalide: {after}")
+    limit = max(1, min(int(limit), NOTIFICATION_READ_LIMIT))
+    result = {"notifications": [], "last_id": after, "has_more": False, "truncated": False}
+    conn = get_redis_connection()
+    if not conn:
+        return result
+
+    stream_key = notification_stream_key(project_id)
+    entries = conn.xrange(stream_key, min=f"({after}" if after else "-", max="+", count=limit + 1)
+    if after and entries:
+        # Le flux est purgé par le début : si plus aucune entrée n'est antérieure ou égale à
+        # `after`, celles qui le suivaient immédiatement ont pu disparaître
+        result["truncated"] = not conn.xrange(stream_key, min="-", max=after, count=1)
+
+    result["has_more"] = len(entries) > limit
+    for entry_id, fields in entries[:limit]:
+        entry_id = entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+        raw = fields.get(b"payload", fields.get("payload"))
+        result["notifications"].append({**json.loads(raw), "event_id": entry_id})
+        result["last_id"] = entry_id
+    return result
+
+# ----------------------------------------------------------------------
+# Fusion des notifications de progression
+# ----------------------------------------------------------------------
+# Les types listés dans NOTIFICATION_RATE_LIMITS sont publiés au plus une fois par fenêtre
+# (en secondes) et par projet, tous workers confondus (verrou Redis SET NX PX). Une notification
+# arrivée pendant la fenêtre remplace la précédente en attente ; la dernière est publiée à la fin
+# de la fenêtre, juste avant la notification finale du projet, ou à la fin de la tâche qui l'a
+# émise (flush_pending_notifications). Le champ "coalesced" indique
+# combien de notifications ont été fusionnées dans celle publiée. Les autres types partent immédiatement.
+
+def _gate_key(project_id: str, notification_type: str) -> str:
+    return f"analylit:notify:{project_id}:{notification_type}:gate"
+
+
+def _pending_key(project_id: str) -> str:
+    return f"analylit:notify:{project_id}:pending"
+
+
+def _suppressed_key(project_id: str) -> str:
+    return f"analylit:notify:{project_id}:suppressed"
+
+
+_trailing_timers: Dict[Tuple[str, str], threading.Timer] = {}
+_trailing_lock = threading.Lock()
+
+
+def _take_pending(conn, project_id: str, notification_type: Optional[str] = None) -> list:
+    """Retire (atomiquement) les notifications en attente d'un projet, d'un type ou de tous."""
+    pipe = conn.pipeline(transaction=True)
+    if notification_type is None:
+        pipe.hgetall(_pending_key(project_id))
+        pipe.hgetall(_suppressed_key(project_id))
+        pipe.delete(_pending_key(project_id), _suppressed_key(project_id))
+        pending, suppressed, _ = pipe.execute()
+    else:
+        pipe.hget(_pending_key(project_id), notification_type)
+        pipe.hget(_suppressed_key(project_id), notification_type)
+        pipe.hdel(_pending_key(project_id), notification_type)
+        pipe.hdel(_suppressed_key(project_id), notification_type)
+        payload, count, _, _ = pipe.execute()
+        pending = {notification_type: payload} if payload else {}
+        suppressed = {notification_type: count} if count else {}
+
+    notifications = []
+    counts = {(k.decode() if isinstance(k, bytes) else k): int(v) for k, v in suppressed.items()}
+    for ntype, raw in pending.items():
+        ntype = ntype.decode() if isinstance(ntype, bytes) else ntype
+        payload = json.loads(raw)
+        # La notification en attente compte parmi les supprimées : elle absorbe les autres
+        if counts.get(ntype, 1) > 1:
+            payload["coalesced"] = counts[ntype] - 1
+        notifications.append(payload)
+    return notifications
+
+
+def _flush_trailing(project_id: str, notification_type: str, window: float):
+    """Fin de fenêtre : publie la dernière notification retenue pour ce type, s'il en reste une."""
+    with _trailing_lock:
+        _trailing_timers.pop((project_id, notification_type), None)
+    conn = get_redis_connection()
+    if not conn:
+        return
+    try:
+        for payload in _take_pending(conn, project_id, notification_type):
+            _publish_notification(payload)
+            # Nouvelle fenêtre : la notification suivante sera à son tour retenue
+            conn.set(_gate_key(project_id, notification_type), 1, px=int(window * 1000))
+    except Exception as e:
+        logger.error(f"Erreur lors de la publication différée d'une notification: {e}")
+
+
+def _schedule_trailing(project_id: str, notification_type: str, window: float):
+    with _trailing_lock:
+        if (project_id, notification_type) in _trailing_timers:
+            return
+        timer = threading.Timer(window, _flush_trailing, args=(project_id, notification_type, window))
+        timer.daemon = True
+        _trailing_timers[(project_id, notification_type)] = timer
+    timer.start()
+
+
+def flush_pending_notifications():
+    """
+    Publie sans attendre les notifications retenues par ce processus (fenêtres en cours).
+    À appeler en fin de tâche RQ : le work-horse se termine avec la tâche, et ses minuteries
+    (threads daemon) avec lui ; la dernière progression ne serait jamais publiée.
+    """
+    with _trailing_lock:
+        timers = list(_trailing_timers.values())
+        _trailing_timers.clear()
+    for timer in timers:
+        timer.cancel()
+        _flush_trailing(*timer.args)
+
+
+def _coalesce(conn, payload: dict, window: float) -> bool:
+    """True si la notification doit être publiée maintenant, False si elle est mise en attente."""
+    project_id, notification_type = payload["project_id"], payload["type"]
+    if conn.set(_gate_key(project_id, notification_type), 1, nx=True, px=int(window * 1000)):
+        pipe = conn.pipeline(transaction=True)
+        pipe.hget(_suppressed_key(project_id), notification_type)
+        pipe.hdel(_suppressed_key(project_id), notification_type)
+        pipe.hdel(_pending_key(project_id), notification_type)
+        suppressed = int(pipe.execute()[0] or 0)
+        if suppressed:
+            payload["coalesced"] = suppressed
+        return True
+
+    pipe = conn.pipeline(transaction=True)
+    pipe.hset(_pending_key(project_id), notification_type, json.dumps(payload))
+    pipe.hincrby(_suppressed_key(project_id), notification_type, 1)
+    pipe.expire(_pending_key(project_id), PENDING_TTL)
+    pipe.expire(_suppressed_key(project_id), PENDING_TTL)
+    pipe.execute()
+    _schedule_trailing(project_id, notification_type, window)
+    return False
+
+
 def send_project_notification(project_id: str, notification_type: str, message: str, data: Optional[Dict[str, Any]] = None):
-    """Envoie une notification pour un projet via WebSocket."""
+    """
+    Envoie une notification pour un projet via WebSocket. Les notifications de progression
+    sont fusionnées par fenêtre (NOTIFICATION_RATE_LIMITS), les autres partent immédiatement.
+    """
     notification_data = {
         "type": notification_type,
         "project_id": project_id,
@@ -67,9 +249,26 @@ def send_project_notification(project_id: str, notification_type: str, message:
     }
     if data:
         notification_data.update(data)
-    
+
+    window = config.NOTIFICATION_RATE_LIMITS.get(notification_type)
+    conn = get_redis_connection()
+    if conn:
+        try:
+            if window:
+                if not _coalesce(conn, notification_data, window):
+                    return
+            else:
+                # Notification finale : la progression retenue part d'abord, pour que l'ordre soit conservé
+                for payload in _take_pending(conn, project_id):
+                    _publish_notification(payload)
+        except Exception as e:
+            logger.error(f"Erreur lors de la fusion des notifications, publication directe: {e}")
+
     _publish_notification(notification_data)
-    logger.info(f"Notification publiée pour projet {project_id}: {notification_type}")
+    if window:
+        logger.debug(f"Notification publiée pour projet {project_id}: {notification_type}")
+    else:
+        logger.info(f"Notification publiée pour projet {project_id}: {notification_type}")
 
 def send_global_notification(notification_type: str, message: str, data: Optional[Dict[str, Any]] = None):
     """Envoie une notification globale à tous les clients connectés."""
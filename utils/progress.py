@@ -0,0 +1,231 @@
+# utils/progress.py - Compteurs de progression par projet/run tenus dans Redis
+
+import logging
+import time
+import uuid
+from typing import Dict, Optional
+
+from redis.exceptions import LockError
+from sqlalchemy import text
+
+import utils.app_globals as app_globals
+from utils.extensions import db
+
+# Import de la configuration de manière sécurisée
+try:
+    from backend.config.config_v4 import get_config
+    config = get_config()
+except ImportError:
+    # Fallback pour un contexte où le module config n'est pas dans le path
+    class FallbackConfig:
+        PROGRESS_FLUSH_INTERVAL = 5
+    config = FallbackConfig()
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_TTL = 7 * 24 * 3600  # les runs abandonnés disparaissent d'eux-mêmes
+DEFAULT_RUN = "default"
+FLUSH_LOCK_TIMEOUT = 30
+FLUSH_LOCK_WAIT = 1.0
+PENDING_FLUSH_BATCH = 100
+
+
+def _current_run_key(project_id: str) -> str:
+    return f"analylit:progress:{project_id}:current_run"
+
+
+def _run_key(project_id: str, run_id: str) -> str:
+    return f"analylit:progress:{project_id}:run:{run_id}"
+
+
+def _flush_interval_key(project_id: str) -> str:
+    return f"analylit:progress:{project_id}:flush_interval"
+
+
+def _flush_mutex_key(project_id: str) -> str:
+    return f"analylit:progress:{project_id}:flush_mutex"
+
+
+def _pending_flush_key(project_id: str) -> str:
+    return f"analylit:progress:{project_id}:pending_flush"
+
+
+def _current_run(project_id: str) -> str:
+    run_id = app_globals.redis_conn.get(_current_run_key(project_id))
+    if run_id is None:
+        return DEFAULT_RUN
+    return run_id.decode() if isinstance(run_id, bytes) else run_id
+
+
+def _decode_hash(raw: dict) -> Dict[str, float]:
+    return {(k.decode() if isinstance(k, bytes) else k): float(v) for k, v in raw.items()}
+
+
+def start_progress_run(project_id: str, total: int) -> Optional[str]:
+    """
+    Ouvre un nouveau run de traitement (une vague d'articles mise en file) et le rend courant.
+    Les compteurs du run précédent sont d'abord reportés en base. L'identifiant renvoyé est à
+    transmettre aux tâches de la vague, qui le repassent à record_article_processed.
+    """
+    try:
+        flush_progress(project_id, force=True)
+        run_id = uuid.uuid4().hex
+        pipe = app_globals.redis_conn.pipeline()
+        pipe.hset(_run_key(project_id, run_id), mapping={"total": int(total), "started_at": time.time()})
+        pipe.expire(_run_key(project_id, run_id), PROGRESS_TTL)
+        pipe.set(_current_run_key(project_id), run_id, ex=PROGRESS_TTL)
+        pipe.execute()
+        return run_id
+    except Exception as e:
+        logger.warning(f"Impossible d'ouvrir un run de progression pour {project_id}: {e}")
+        return None
+
+
+def record_article_processed(project_id: str, duration: Optional[float] = None, error: bool = False,
+                             run_id: Optional[str] = None) -> bool:
+    """
+    Comptabilise un article traité (INCR / HINCRBYFLOAT) sans toucher à la ligne projects.
+    Le report en base est fait au plus une fois par PROGRESS_FLUSH_INTERVAL, ou en fin de run.
+    `run_id` est le run de la vague qui a mis l'article en file : une vague lancée entre-temps
+    ne reçoit pas ses articles. Sans run_id (tâche mise en file sans run), le run courant est utilisé.
+    Retourne True si ce appel a effectué le report.
+    """
+    try:
+        run_id = run_id or _current_run(project_id)
+        key = _run_key(project_id, run_id)
+        pipe = app_globals.redis_conn.pipeline()
+        pipe.hincrby(key, "processed", 1)
+        if error:
+            pipe.hincrby(key, "errors", 1)
+        if duration:
+            pipe.hincrbyfloat(key, "processing_time", float(duration))
+        pipe.expire(key, PROGRESS_TTL)
+        pipe.hget(key, "total")
+        results = pipe.execute()
+        processed, total = int(results[0]), results[-1]
+    except Exception as e:
+        # Redis indisponible : on retombe sur la mise à jour directe de la ligne projects
+        logger.warning(f"Compteurs Redis indisponibles pour {project_id}, écriture directe en base: {e}")
+        _apply_to_project(project_id, 1, float(duration or 0))
+        return False
+
+    finished = total is not None and processed >= int(total)
+    try:
+        return flush_progress(project_id, run_id=run_id, force=finished)
+    except Exception as e:
+        # Les compteurs restent dans Redis et seront reportés au prochain flush
+        logger.warning(f"Flush de la progression échoué pour {project_id}: {e}")
+        return False
+
+
+def flush_progress(project_id: str, run_id: Optional[str] = None, force: bool = False) -> bool:
+    """
+    Reporte dans projects.processed_count / total_processing_time la part des compteurs Redis
+    qui n'a pas encore été écrite. Hors `force`, au plus un flush par PROGRESS_FLUSH_INTERVAL
+    et par projet, tous workers confondus. Un flush forcé qui ne peut pas prendre le verrou
+    est inscrit dans pending_flush : le détenteur du verrou l'exécute avant de rendre la main.
+    """
+    redis_conn = app_globals.redis_conn
+    if not force and not redis_conn.set(_flush_interval_key(project_id), 1, nx=True, ex=config.PROGRESS_FLUSH_INTERVAL):
+        return False
+
+    # Le verrou (jeton vérifié à la libération) évite que deux workers reportent le même delta
+    lock = redis_conn.lock(_flush_mutex_key(project_id), timeout=FLUSH_LOCK_TIMEOUT)
+    run_id = run_id or _current_run(project_id)
+    if not lock.acquire(blocking=force, blocking_timeout=FLUSH_LOCK_WAIT):
+        if not force:
+            return False
+        # Flush de fin de run : le détenteur du verrou le fera à sa libération
+        pipe = redis_conn.pipeline()
+        pipe.sadd(_pending_flush_key(project_id), run_id)
+        pipe.expire(_pending_flush_key(project_id), PROGRESS_TTL)
+        pipe.execute()
+        if not lock.acquire(blocking=False):
+            return False
+
+    pending_key = _pending_flush_key(project_id)
+    flushed = False
+    while True:
+        # Une demande inscrite avant ce SPOP voit ses compteurs repris par le flush qui suit
+        runs = {r.decode() if isinstance(r, bytes) else r for r in redis_conn.spop(pending_key, PENDING_FLUSH_BATCH) or []}
+        runs = sorted(runs | {run_id})
+        try:
+            while runs:
+                flushed = _flush_run(project_id, _run_key(project_id, runs[0])) or flushed
+                runs.pop(0)
+        finally:
+            if runs:
+                redis_conn.sadd(pending_key, *runs)  # échec (base indisponible) : repris au prochain flush
+            try:
+                lock.release()
+            except LockError as e:
+                logger.warning(f"Verrou de flush de la progression {project_id} expiré avant la fin: {e}")
+        # Demande arrivée pendant le flush : la reprendre, sauf si un autre worker a pris le relais
+        if not redis_conn.scard(pending_key) or not lock.acquire(blocking=False):
+            return flushed
+        run_id = _current_run(project_id)
+
+
+def _flush_run(project_id: str, key: str) -> bool:
+    redis_conn = app_globals.redis_conn
+    counters = _decode_hash(redis_conn.hgetall(key))
+    processed_delta = int(counters.get("processed", 0) - counters.get("flushed_processed", 0))
+    time_delta = counters.get("processing_time", 0) - counters.get("flushed_processing_time", 0)
+    if processed_delta <= 0 and time_delta <= 0:
+        return False
+
+    if not _apply_to_project(project_id, processed_delta, time_delta):
+        return False
+    pipe = redis_conn.pipeline()
+    pipe.hincrby(key, "flushed_processed", processed_delta)
+    pipe.hincrbyfloat(key, "flushed_processing_time", time_delta)
+    pipe.execute()
+    return True
+
+
+def _apply_to_project(project_id: str, processed: int, duration: float) -> bool:
+    """UPDATE unique de la ligne projects, dans sa propre transaction (indépendante de la tâche en cours)."""
+    with db.engine.begin() as conn:
+        result = conn.execute(text("""
+            UPDATE projects
+            SET processed_count = COALESCE(processed_count, 0) + :n,
+                total_processing_time = COALESCE(total_processing_time, 0) + :d
+            WHERE id = :id
+        """), {"n": processed, "d": duration, "id": project_id})
+    return result.rowcount == 1
+
+
+def get_progress(project_id: str) -> Optional[dict]:
+    """Progression du run courant, lue uniquement dans Redis (None si aucun compteur)."""
+    try:
+        run_id = _current_run(project_id)
+        counters = _decode_hash(app_globals.redis_conn.hgetall(_run_key(project_id, run_id)))
+    except Exception as e:
+        logger.debug(f"Progression indisponible pour {project_id}: {e}")
+        return None
+    if not counters:
+        return None
+
+    total = int(counters.get("total", 0))
+    processed = int(counters.get("processed", 0))
+    return {
+        "run_id": run_id,
+        "total": total,
+        "processed": processed,
+        "errors": int(counters.get("errors", 0)),
+        "processing_time": round(counters.get("processing_time", 0), 3),
+        "unflushed_processed": processed - int(counters.get("flushed_processed", 0)),
+        "unflushed_processing_time": counters.get("processing_time", 0) - counters.get("flushed_processing_time", 0),
+        "progress_percentage": round(100 * processed / total, 1) if total else None,
+    }
+
+
+def with_live_progress(project_data: dict) -> dict:
+    """Complète le to_dict() d'un projet avec les compteurs Redis non encore reportés en base."""
+    progress = get_progress(project_data["id"])
+    if not progress:
+        return project_data
+    project_data["processed_count"] = (project_data.get("processed_count") or 0) + progress.pop("unflushed_processed")
+    project_data["total_processing_time"] = (project_data.get("total_processing_time") or 0) + progress.pop("unflushed_processing_time")
+    project_data["progress"] = progress
+    return project_data
@@ -0,0 +1,138 @@
+# utils/project_stats.py - Maintenance de la table project_stats (statistiques agrégées par projet)
+
+import logging
+import os
+from pathlib import Path
+from typing import Iterable, Optional
+
+from sqlalchemy import text
+
+from utils.app_globals import PROJECTS_DIR
+from utils.extensions import db
+
+logger = logging.getLogger(__name__)
+
+SEARCH_RESULTS = "search_results"
+EXTRACTIONS = "extractions"
+PDFS = "pdfs"
+ALL_SECTIONS = (SEARCH_RESULTS, EXTRACTIONS, PDFS)
+
+# Chaque section ne réécrit que ses propres colonnes : un import ne touche pas aux
+# statistiques de criblage et inversement.
+_SEARCH_RESULTS_SQL = text("""
+    INSERT INTO project_stats (project_id, total_results, unique_results, duplicate_results, results_by_source, updated_at)
+    SELECT :pid, COALESCE(SUM(n), 0), COALESCE(SUM(n_unique), 0), COALESCE(SUM(n - n_unique), 0),
+           COALESCE(jsonb_object_agg(source, n), '{}'::jsonb), NOW()
+    FROM (
+        SELECT COALESCE(database_source, 'inconnu') AS source, COUNT(*) AS n,
+               COUNT(*) FILTER (WHERE duplicate_of IS NULL) AS n_unique
+        FROM search_results WHERE project_id = :pid
+        GROUP BY 1
+    ) by_source
+    ON CONFLICT (project_id) DO UPDATE SET
+        total_results = EXCLUDED.total_results,
+        unique_results = EXCLUDED.unique_results,
+        duplicate_results = EXCLUDED.duplicate_results,
+        results_by_source = EXCLUDED.results_by_source,
+        updated_at = EXCLUDED.updated_at
+""")
+
+_EXTRACTIONS_SQL = text("""
+    WITH e AS (
+        SELECT relevance_score, COALESCE(user_validation_status, 'pending') AS decision
+        FROM extractions WHERE project_id = :pid
+    ),
+    totals AS (
+        SELECT COUNT(*) AS screened, COUNT(relevance_score) AS n,
+               COALESCE(SUM(relevance_score), 0) AS s, COALESCE(SUM(relevance_score * relevance_score), 0) AS sq,
+               MIN(relevance_score) AS mn, MAX(relevance_score) AS mx,
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY relevance_score) AS median
+        FROM e
+    ),
+    decisions AS (
+        SELECT jsonb_object_agg(decision, n) AS value
+        FROM (SELECT decision, COUNT(*) AS n FROM e GROUP BY decision) d
+    ),
+    histogram AS (
+        SELECT jsonb_object_agg(bucket, n) AS value
+        FROM (SELECT FLOOR(relevance_score)::int::text AS bucket, COUNT(*) AS n
+              FROM e WHERE relevance_score IS NOT NULL GROUP BY 1) h
+    )
+    INSERT INTO project_stats (project_id, screened_count, decisions, score_count, score_sum, score_sq_sum,
+                               score_min, score_max, score_median, score_histogram, updated_at)
+    SELECT :pid, totals.screened, COALESCE(decisions.value, '{}'::jsonb), totals.n, totals.s, totals.sq,
+           totals.mn, totals.mx, totals.median, COALESCE(histogram.value, '{}'::jsonb), NOW()
+    FROM totals, decisions, histogram
+    ON CONFLICT (project_id) DO UPDATE SET
+        screened_count = EXCLUDED.screened_count,
+        decisions = EXCLUDED.decisions,
+        score_count = EXCLUDED.score_count,
+        score_sum = EXCLUDED.score_sum,
+        score_sq_sum = EXCLUDED.score_sq_sum,
+        score_min = EXCLUDED.score_min,
+        score_max = EXCLUDED.score_max,
+        score_median = EXCLUDED.score_median,
+        score_histogram = EXCLUDED.score_histogram,
+        updated_at = EXCLUDED.updated_at
+""")
+
+_PDFS_SQL = text("""
+    INSERT INTO project_stats (project_id, pdf_count, updated_at) VALUES (:pid, :n, NOW())
+    ON CONFLICT (project_id) DO UPDATE SET pdf_count = EXCLUDED.pdf_count, updated_at = EXCLUDED.updated_at
+""")
+
+
+def count_project_pdfs(project_id: str) -> int:
+    """Nombre de PDF présents dans le répertoire du projet."""
+    project_dir = Path(PROJECTS_DIR) / project_id
+    try:
+        with os.scandir(project_dir) as entries:
+            return sum(1 for entry in entries if entry.is_file() and entry.name.lower().endswith('.pdf'))
+    except FileNotFoundError:
+        return 0
+
+
+def refresh_project_stats(project_id: str, sections: Iterable[str] = ALL_SECTIONS, bind=None):
+    """
+    Recalcule les sections demandées de project_stats pour un projet.
+
+    Appelée par le pipeline après chaque écriture (import, criblage, téléchargement de PDF) :
+    chaque section est une seule agrégation servie par les index (project_id, ...), et les
+    lectures (API, tableaux de bord) n'ont plus qu'à lire une ligne. Aucun commit n'est
+    effectué si `bind` est la session de la tâche.
+    """
+    bind = bind if bind is not None else db.session
+    params = {"pid": project_id}
+    for section in sections:
+        if section == SEARCH_RESULTS:
+            bind.execute(_SEARCH_RESULTS_SQL, params)
+        elif section == EXTRACTIONS:
+            bind.execute(_EXTRACTIONS_SQL, params)
+        elif section == PDFS:
+            bind.execute(_PDFS_SQL, {**params, "n": count_project_pdfs(project_id)})
+        else:
+            raise ValueError(f"Section de statistiques inconnue: {section}")
+
+
+def get_project_stats(project_id: str, bind=None) -> Optional[dict]:
+    """Lit la ligne project_stats (lecture par clé primaire) ; la calcule une fois si elle n'existe pas."""
+    from utils.models import Project, ProjectStats
+
+    session = bind if bind is not None else db.session
+    stats = session.get(ProjectStats, project_id)
+    if stats is None:
+        if session.get(Project, project_id) is None:
+            return None
+        refresh_project_stats(project_id, bind=session)
+        session.commit()
+        stats = session.get(ProjectStats, project_id)
+
+    data = stats.to_dict()
+    project = stats.project
+    processed = project.processed_count or 0
+    data["timing"] = {
+        "processed_count": processed,
+        "total_processing_time": project.total_processing_time or 0,
+        "mean_processing_time": (project.total_processing_time or 0) / processed if processed else None,
+    }
+    return data
@@ -0,0 +1,251 @@
+# utils/rag_index.py - Indexation RAG incrémentale des PDFs d'un projet
+
+import hashlib
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from utils.chunker import Chunk, chunk_pages, get_token_counter
+
+# Import de la configuration de manière sécurisée
+try:
+    from backend.config.config_v4 import get_config
+    config = get_config()
+except ImportError:
+    # Fallback pour un contexte où le module config n'est pas dans le path
+    class FallbackConfig:
+        RAG_EMBEDDING_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
+        RAG_CHUNK_TOKENS = 254
+        RAG_MIN_CHUNK_TOKENS = 32
+        RAG_EMBED_BATCH = 32
+        RAG_INDEX_BATCH = 256
+        RAG_EXTRACT_WORKERS = 2
+    config = FallbackConfig()
+
+logger = logging.getLogger(__name__)
+
+CHUNK_TOKENS = config.RAG_CHUNK_TOKENS
+MIN_CHUNK_TOKENS = config.RAG_MIN_CHUNK_TOKENS
+EMBED_BATCH = config.RAG_EMBED_BATCH
+INDEX_BATCH = config.RAG_INDEX_BATCH
+EXTRACT_WORKERS = config.RAG_EXTRACT_WORKERS
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+# À incrémenter quand le découpage change : les fichiers indexés avec une autre version sont refaits
+CHUNKER_VERSION = 2
+
+
+def file_content_hash(path) -> str:
+    """Empreinte SHA-256 du contenu d'un fichier, lue par blocs."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(filename: str, content_hash: str, index: int) -> str:
+    """
+    Identifiant stable d'un segment : dérivé du nom de fichier et de l'empreinte du contenu,
+    il ne peut pas entrer en collision avec les segments d'une version antérieure du fichier.
+    """
+    file_key = hashlib.sha1(filename.encode('utf-8')).hexdigest()[:12]
+    return f"{file_key}_{content_hash[:12]}_{index}"
+
+
+def empty_file_id(filename: str, content_hash: str) -> str:
+    """Identifiant du marqueur d'un PDF indexé sans aucun segment (scan sans texte, PDF vide)."""
+    return chunk_id(filename, content_hash, 0).rsplit('_', 1)[0] + "_empty"
+
+
+def is_empty_file_marker(metadata: Optional[Dict[str, Any]]) -> bool:
+    """Vrai pour le marqueur d'un PDF sans segment : il n'a pas de texte et ne doit pas servir de contexte."""
+    return bool(metadata and metadata.get('empty_file'))
+
+
+def indexed_files(collection) -> Dict[str, Dict[str, object]]:
+    """
+    État de l'index, lu dans les métadonnées de la collection elle-même :
+    {filename: {"hash": empreinte, "ids": [ids des segments]}}. Les segments sans
+    empreinte ou découpés par une autre version du découpeur ont hash=None (à refaire).
+    Un PDF sans segment est représenté par son seul marqueur (chunk_count = 0).
+    """
+    state: Dict[str, Dict[str, object]] = {}
+    expected: Dict[str, Any] = {}
+    chunks: Dict[str, int] = {}
+    existing = collection.get(include=['metadatas'])
+    for seg_id, metadata in zip(existing.get('ids') or [], existing.get('metadatas') or []):
+        metadata = metadata or {}
+        filename = metadata.get('filename') or ''
+        content_hash = metadata.get('content_hash') if metadata.get('chunker_version') == CHUNKER_VERSION else None
+        entry = state.setdefault(filename, {"hash": content_hash, "ids": []})
+        if entry["hash"] != content_hash:
+            entry["hash"] = None  # segments de plusieurs versions : on réindexe le fichier
+        entry["ids"].append(seg_id)
+        chunks[filename] = chunks.get(filename, 0) + (not is_empty_file_marker(metadata))
+        expected[filename] = metadata.get('chunk_count')
+
+    # Un fichier dont l'indexation a été interrompue n'a pas tous ses segments : il est à refaire
+    for filename, entry in state.items():
+        if expected[filename] is not None and chunks[filename] != expected[filename]:
+            entry["hash"] = None
+    return state
+
+
+@dataclass
+class IndexPlan:
+    """Travail à faire pour remettre l'index en phase avec le répertoire du projet."""
+    to_index: List[Tuple[Path, str]] = field(default_factory=list)
+    obsolete_ids: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    removed: int = 0
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.to_index and not self.obsolete_ids
+
+
+def plan_incremental_index(pdf_files: Iterable[Path], state: Dict[str, Dict[str, object]]) -> IndexPlan:
+    """
+    Compare les PDFs présents à l'état de l'index : seuls les fichiers nouveaux ou modifiés
+    sont à extraire et encoder ; les segments des fichiers modifiés ou supprimés sont obsolètes.
+    """
+    plan = IndexPlan()
+    seen = set()
+    for pdf_path in pdf_files:
+        seen.add(pdf_path.name)
+        content_hash = file_content_hash(pdf_path)
+        entry = state.get(pdf_path.name)
+        if entry and entry["hash"] == content_hash:
+            plan.unchanged += 1
+            continue
+        if entry:
+            plan.obsolete_ids.extend(entry["ids"])
+        plan.to_index.append((pdf_path, content_hash))
+
+    for filename, entry in state.items():
+        if filename not in seen:
+            plan.obsolete_ids.extend(entry["ids"])
+            plan.removed += 1
+    return plan
+
+
+# ----------------------------------------------------------------------
+# Pipeline d'indexation en flux : extraction -> segments -> lots d'encodage
+# ----------------------------------------------------------------------
+
+@dataclass
+class ChunkRecord:
+    """Segment prêt à être encodé et inséré dans la collection."""
+    id: str
+    document: str
+    metadata: Dict[str, Any]
+
+
+def extract_chunks(extract: Callable[[str], Union[str, Sequence[str]]], pdf_path: str) -> List[Chunk]:
+    """
+    Extraction et découpage d'un PDF ; exécutée dans un processus du pool (fonction de premier niveau).
+    `extract` renvoie une chaîne par page (ou le texte entier, traité comme une seule page).
+    """
+    pages = extract(pdf_path)
+    if isinstance(pages, str):
+        pages = [pages]
+    if not pages or not any(page.strip() for page in pages):
+        return []
+    # Segments dimensionnés avec le tokenizer du modèle d'embedding (chargé une fois par processus)
+    return chunk_pages(pages, max_tokens=CHUNK_TOKENS, min_tokens=MIN_CHUNK_TOKENS,
+                       count_tokens=get_token_counter(config.RAG_EMBEDDING_MODEL))
+
+
+def _threads_patched_by_gevent() -> bool:
+    """Vrai si gevent a remplacé threading (import de `backend`) : le pool de processus n'y fonctionne pas."""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('threading')
+
+
+def iter_extracted_files(to_index: Iterable[Tuple[Path, str]], extract: Callable[[str], Union[str, Sequence[str]]],
+                         workers: int = EXTRACT_WORKERS) -> Iterator[Tuple[Path, str, List[Chunk]]]:
+    """
+    Extrait les PDFs en parallèle dans un pool de processus. Au plus 2 x workers fichiers sont
+    en cours ou en attente de consommation : si l'encodage prend du retard, l'extraction
+    attend (file bornée), et la mémoire ne dépend pas du nombre de PDFs du projet.
+    Dans un processus patché par gevent, le thread de gestion de ProcessPoolExecutor échoue
+    (LoopExit) : l'extraction se fait alors en série.
+    """
+    if workers > 1 and _threads_patched_by_gevent():
+        logger.info("threading patché par gevent : extraction des PDFs sans pool de processus")
+        workers = 1
+    if workers <= 1:
+        for pdf_path, content_hash in to_index:
+            yield pdf_path, content_hash, extract_chunks(extract, str(pdf_path))
+        return
+
+    pending = deque()
+    items = iter(to_index)
+    # 'spawn' : le worker RQ a déjà chargé le modèle d'embedding et des connexions, on ne les duplique pas
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        for pdf_path, content_hash in items:
+            pending.append((pdf_path, content_hash, pool.submit(extract_chunks, extract, str(pdf_path))))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            pdf_path, content_hash, future = pending.popleft()
+            next_item = next(items, None)
+            if next_item is not None:
+                pending.append((*next_item, pool.submit(extract_chunks, extract, str(next_item[0]))))
+            try:
+                chunks = future.result()
+            except Exception as e:
+                # None (et non []) : le fichier n'est pas marqué vide, il sera retenté au prochain passage
+                logger.error(f"Extraction impossible pour {pdf_path.name}: {e}")
+                chunks = None
+            yield pdf_path, content_hash, chunks
+
+
+def _file_records(pdf_path: Path, content_hash: str, chunks: Optional[List[Chunk]]) -> List[ChunkRecord]:
+    """Segments d'un fichier ; un fichier extrait sans aucun segment est représenté par un marqueur."""
+    if chunks is None:
+        return []  # extraction en échec : rien n'est enregistré
+    if not chunks:
+        return [ChunkRecord(
+            id=empty_file_id(pdf_path.name, content_hash),
+            document="",
+            metadata={"source_id": pdf_path.stem, "filename": pdf_path.name, "chunk": 0, "chunk_count": 0,
+                      "content_hash": content_hash, "chunker_version": CHUNKER_VERSION, "empty_file": True},
+        )]
+    return [ChunkRecord(
+        id=chunk_id(pdf_path.name, content_hash, n),
+        document=chunk.text,
+        metadata={"source_id": pdf_path.stem, "filename": pdf_path.name, "chunk": n,
+                  "chunk_count": len(chunks), "content_hash": content_hash,
+                  "page_start": chunk.page_start, "page_end": chunk.page_end,
+                  "section": chunk.section or "", "chunker_version": CHUNKER_VERSION},
+    ) for n, chunk in enumerate(chunks)]
+
+
+def iter_chunk_batches(extracted: Iterable[Tuple[Path, str, Optional[List[Chunk]]]],
+                       batch_size: int = INDEX_BATCH) -> Iterator[Tuple[List[ChunkRecord], int]]:
+    """
+    Regroupe les segments en lots de `batch_size` (un fichier peut être réparti sur deux lots).
+    Produit (lot, nombre de fichiers entièrement émis) pour les notifications de progression.
+    Un PDF sans texte donne un marqueur (voir empty_file_id) pour ne pas être réextrait à chaque passage.
+    """
+    batch: List[ChunkRecord] = []
+    files_done = 0
+    for pdf_path, content_hash, chunks in extracted:
+        records = _file_records(pdf_path, content_hash, chunks)
+        for n, record in enumerate(records):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield batch, files_done + (n == len(records) - 1)
+                batch = []
+        files_done += 1
+    if batch:
+        yield batch, files_done
@@ -0,0 +1,122 @@
+# utils/vector_store.py - Index vectoriel persistant par projet (collections RAG)
+
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Tuple
+
+import utils.app_globals as app_globals
+
+try:
+    import chromadb
+    from chromadb.api.client import SharedSystemClient
+    from chromadb.config import Settings as ChromaSettings
+except ImportError:
+    chromadb = None
+
+logger = logging.getLogger(__name__)
+
+VECTOR_STORE_DIRNAME = "vector_store"
+GENERATION_FILENAME = "GENERATION"
+WRITER_LOCK_TIMEOUT = 3600  # une indexation complète d'un gros projet tient dans ce délai
+
+# Un client Chroma par projet et par processus, accompagné de la génération de l'index lue à l'ouverture
+_clients: Dict[str, Tuple[object, int]] = {}
+_clients_lock = threading.Lock()
+
+
+def project_store_path(project_id: str) -> Path:
+    """Répertoire de l'index vectoriel d'un projet (SQLite + segments HNSW de Chroma)."""
+    return Path(app_globals.PROJECTS_DIR) / project_id / VECTOR_STORE_DIRNAME
+
+
+def collection_name(project_id: str) -> str:
+    return f"project_{project_id}"
+
+
+def _read_generation(path: Path) -> int:
+    try:
+        return int((path / GENERATION_FILENAME).read_text().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def _bump_generation(path: Path) -> int:
+    """Publie une nouvelle génération (écriture atomique) : les lecteurs des autres processus rouvriront l'index."""
+    generation = _read_generation(path) + 1
+    tmp_path = path / f".{GENERATION_FILENAME}.{os.getpid()}"
+    tmp_path.write_text(str(generation))
+    tmp_path.replace(path / GENERATION_FILENAME)
+    return generation
+
+
+def index_generation(project_id: str) -> int:
+    """Version courante de l'index du projet (incrémentée à chaque écriture)."""
+    return _read_generation(project_store_path(project_id))
+
+
+def _open_client(project_id: str, path: Path):
+    """
+    Retourne le client persistant du projet, rouvert si un autre processus a modifié l'index
+    depuis l'ouverture (segments HNSW chargés en mémoire par Chroma).
+    """
+    generation = _read_generation(path)
+    with _clients_lock:
+        cached = _clients.get(project_id)
+        if cached is not None and cached[1] == generation:
+            return cached[0]
+        if cached is not None:
+            # Chroma partage un système par répertoire : seul celui de ce projet est oublié pour relire
+            # l'état sur disque. Les clients des autres projets, et les lectures en cours sur l'ancien
+            # client (qui garde sa propre référence au système), ne sont pas touchés.
+            SharedSystemClient._identifer_to_system.pop(cached[0]._identifier, None)
+        client = chromadb.PersistentClient(path=str(path), settings=ChromaSettings(anonymized_telemetry=False))
+        _clients[project_id] = (client, generation)
+        return client
+
+
+def get_project_collection(project_id: str, create: bool = False):
+    """
+    Collection RAG persistante du projet. Sans `create`, retourne None si le projet n'a
+    jamais été indexé : le chat ne crée pas d'index vide.
+    """
+    if chromadb is None:
+        raise RuntimeError("chromadb n'est pas installé : index vectoriel indisponible.")
+    path = project_store_path(project_id)
+    if not create and not path.exists():
+        return None
+    path.mkdir(parents=True, exist_ok=True)
+    client = _open_client(project_id, path)
+    if create:
+        return client.get_or_create_collection(name=collection_name(project_id), metadata={"hnsw:space": "cosine"})
+    try:
+        return client.get_collection(name=collection_name(project_id))
+    except ValueError:
+        return None
+
+
+@contextmanager
+def project_store_writer(project_id: str):
+    """
+    Accès en écriture à la collection du projet : un seul écrivain à la fois (verrou Redis
+    partagé par tous les workers), génération publiée à la sortie pour les lecteurs.
+    """
+    lock = app_globals.redis_conn.lock(f"analylit:vector_store:{project_id}:writer", timeout=WRITER_LOCK_TIMEOUT)
+    if not lock.acquire(blocking=True, blocking_timeout=WRITER_LOCK_TIMEOUT):
+        raise RuntimeError(f"Index vectoriel du projet {project_id} verrouillé par une autre indexation.")
+    try:
+        collection = get_project_collection(project_id, create=True)
+        try:
+            yield collection
+        finally:
+            generation = _bump_generation(project_store_path(project_id))
+            with _clients_lock:
+                if project_id in _clients:
+                    _clients[project_id] = (_clients[project_id][0], generation)
+    finally:
+        try:
+            lock.release()
+        except Exception as e:
+            logger.warning(f"Verrou de l'index vectoriel {project_id} déjà expiré: {e}")
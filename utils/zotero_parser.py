@@ -1,6 +1,7 @@
 # Fichier : utils/zotero_parser.py
 
 import logging
+import time
 from pathlib import Path
 import hashlib
 from bs4 import BeautifulSoup
@@ -26,6 +27,18 @@ def extract_year_robust(date_string):
     
     return None
 
+def build_rdf_about_index(soup: BeautifulSoup) -> dict:
+    """
+    Construit en une seule passe l'index `rdf:about` -> élément du document.
+    Remplace les `soup.find(..., {'rdf:about': ...})` répétés pour chaque item,
+    qui rendaient le parsing quadratique sur les gros exports.
+    """
+    index = {}
+    for element in soup.find_all(attrs={'rdf:about': True}):
+        # Comme soup.find(), on conserve la première occurrence
+        index.setdefault(element['rdf:about'], element)
+    return index
+
 def parse_zotero_rdf(rdf_path: str, storage_path: str) -> list:
     """
     Parse un fichier Zotero RDF en utilisant BeautifulSoup pour une robustesse maximale.
@@ -43,7 +56,9 @@ def parse_zotero_rdf(rdf_path: str, storage_path: str) -> list:
         logger.error(f"Échec critique lors de la lecture du fichier RDF : {e}")
         return []
 
+    start_time = time.perf_counter()
     soup = BeautifulSoup(xml_content, 'xml')
+    about_index = build_rdf_about_index(soup)
     articles = []
 
     # Cible tous les types de documents pertinents
@@ -92,8 +107,8 @@ def parse_zotero_rdf(rdf_path: str, storage_path: str) -> list:
             journal_tag = item.find('dcterms:isPartOf')
             journal_title = ""
             if journal_tag and journal_tag.has_attr('rdf:resource'):
-                 # Le titre du journal est dans un autre élément rdf:Description
-                 journal_resource = soup.find('rdf:Description', {'rdf:about': journal_tag['rdf:resource']})
+                 # Le titre du journal est dans un autre élément (rdf:Description, bib:Journal...)
+                 journal_resource = about_index.get(journal_tag['rdf:resource'])
                  if journal_resource and journal_resource.find('dc:title'):
                      journal_title = journal_resource.find('dc:title').string.strip()
 
@@ -108,7 +123,7 @@ def parse_zotero_rdf(rdf_path: str, storage_path: str) -> list:
             pdf_path = None
             attachment_tag = item.find('z:attachment')
             if attachment_tag and attachment_tag.has_attr('rdf:resource'):
-                attachment_resource = soup.find('rdf:Description', {'rdf:about': attachment_tag['rdf:resource']})
+                attachment_resource = about_index.get(attachment_tag['rdf:resource'])
                 if attachment_resource:
                     local_path_tag = attachment_resource.find('z:localPath')
                     if local_path_tag and local_path_tag.string and local_path_tag.string.lower().endswith('.pdf'):
@@ -146,5 +161,8 @@ def parse_zotero_rdf(rdf_path: str, storage_path: str) -> list:
             logger.warning(f"Impossible de traiter une entrée RDF: {e}", exc_info=True)
             continue
             
-    logger.info(f"Parsing terminé. {len(articles)} articles extraits avec succès via BeautifulSoup.")
+    elapsed = time.perf_counter() - start_time
+    throughput = len(item_tags) / elapsed if elapsed > 0 else float(len(item_tags))
+    logger.info(f"Parsing terminé. {len(articles)} articles extraits avec succès via BeautifulSoup "
+                f"en {elapsed:.2f}s ({throughput:.0f} items/s).")
     return articles
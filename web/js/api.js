@@ -108,4 +108,77 @@ export async function fetchFile(endpoint, options = {}) {
         console.error(`❌ File Error for ${url}:`, error);
         throw error;
     }
-}
\ No newline at end of file
+}
+
+/**
+ * Envoie une requête JSON et lit la réponse en Server-Sent Events (text/event-stream).
+ * @param {string} endpoint - Le point d'API (ex. '/projects/1/chat/stream').
+ * @param {object} options - Options de fetch ; un body objet est converti en JSON.
+ * @param {function(string, object): void} onEvent - Appelée pour chaque événement (nom, données décodées).
+ */
+export async function streamAPI(endpoint, options = {}, onEvent = () => {}) {
+    const { CONFIG } = await import('./constants.js');
+    const url = `${CONFIG.API_BASE_URL}${endpoint}`;
+
+    const streamOptions = {
+        ...options,
+        headers: {
+            'Accept': 'text/event-stream',
+            'Content-Type': 'application/json',
+            ...options.headers,
+        },
+    };
+    if (streamOptions.body && typeof streamOptions.body === 'object') {
+        streamOptions.body = JSON.stringify(streamOptions.body);
+    }
+
+    console.log(`🔗 Stream Request: ${streamOptions.method || 'GET'} ${url}`);
+
+    try {
+        const response = await fetch(url, streamOptions);
+
+        if (!response.ok) {
+            let errorMsg = `Erreur HTTP ${response.status}: ${response.statusText}`;
+            const errorText = await response.text().catch(() => null);
+            try {
+                const errorData = errorText ? JSON.parse(errorText) : {};
+                errorMsg = errorData.error || errorData.message || errorMsg;
+            } catch (e) {
+                // Corps non JSON : le message HTTP suffit
+            }
+            throw new Error(errorMsg);
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        // Un événement se termine par une ligne vide ; un bloc peut arriver en plusieurs morceaux
+        const dispatch = (block) => {
+            let event = 'message';
+            const dataLines = [];
+            block.split('\n').forEach(line => {
+                if (line.startsWith('event:')) event = line.slice(6).trim();
+                else if (line.startsWith('data:')) dataLines.push(line.slice(5).trimStart());
+            });
+            if (dataLines.length) onEvent(event, JSON.parse(dataLines.join('\n')));
+        };
+
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true }).replace(/\r\n/g, '\n');
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                dispatch(buffer.slice(0, boundary));
+                buffer = buffer.slice(boundary + 2);
+            }
+        }
+        buffer += decoder.decode();
+        if (buffer.trim()) dispatch(buffer);
+
+    } catch (error) {
+        console.error(`❌ Stream Error for ${url}:`, error);
+        throw error;
+    }
+}
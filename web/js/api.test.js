@@ -3,7 +3,7 @@
  */
 
 // Importer la fonction à tester
-import { fetchAPI } from './api.js';
+import { fetchAPI, streamAPI } from './api.js';
 
 // Mocker les dépendances (showToast et global.fetch)
 // Note : 'ui-improved.js' est mocké car il n'est pas pertinent pour ce test unitaire.
@@ -74,4 +74,58 @@ describe('fetchAPI Utility', () => {
       .toThrow('Failed to fetch');
   });
 
-});
\ No newline at end of file
+});
+
+describe('streamAPI Utility', () => {
+
+  beforeEach(() => {
+    jest.clearAllMocks();
+    global.fetch.mockClear();
+  });
+
+  // Corps de réponse lu morceau par morceau, comme un flux text/event-stream
+  const streamBody = (chunks) => {
+    const encoder = new TextEncoder();
+    const queue = chunks.map(chunk => encoder.encode(chunk));
+    return {
+      getReader: () => ({
+        read: () => Promise.resolve(queue.length ? { done: false, value: queue.shift() } : { done: true }),
+      }),
+    };
+  };
+
+  test('devrait décoder les événements, même coupés entre deux morceaux', async () => {
+    global.fetch.mockResolvedValue({
+      ok: true,
+      body: streamBody([
+        'event: token\ndata: {"token": "Bon"}\n\nevent: tok',
+        'en\ndata: {"token": "jour"}\n\n',
+        'event: done\ndata: {"answer": "Bonjour"}\n\n',
+      ]),
+    });
+    const onEvent = jest.fn();
+
+    await streamAPI('/projects/1/chat/stream', { method: 'POST', body: { question: 'Q' } }, onEvent);
+
+    expect(global.fetch).toHaveBeenCalledWith('/api/projects/1/chat/stream', expect.objectContaining({
+      method: 'POST',
+      body: JSON.stringify({ question: 'Q' }),
+    }));
+    expect(onEvent.mock.calls).toEqual([
+      ['token', { token: 'Bon' }],
+      ['token', { token: 'jour' }],
+      ['done', { answer: 'Bonjour' }],
+    ]);
+  });
+
+  test("devrait lever le message d'erreur JSON d'une réponse en échec", async () => {
+    global.fetch.mockResolvedValue({
+      ok: false,
+      status: 400,
+      statusText: 'Bad Request',
+      text: () => Promise.resolve(JSON.stringify({ error: 'Question is required' })),
+    });
+
+    await expect(streamAPI('/projects/1/chat/stream', { method: 'POST', body: {} })).rejects.toThrow('Question is required');
+  });
+});
@@ -3,7 +3,7 @@ import { escapeHtml } from './ui-improved.js';
 import { showToast } from './ui-improved.js';
 import { appState } from './app-improved.js'; // Read from state
 import { setChatMessages } from './state.js'; // ✅ CORRECTION: Importer la fonction manquante
-import { fetchAPI } from './api.js';
+import { fetchAPI, streamAPI } from './api.js';
 import { API_ENDPOINTS, MESSAGES, SELECTORS } from './constants.js';
 
 function formatMessageContent(content) {
@@ -122,22 +122,46 @@ async function sendChatMessage() {
     // Vider l'input
     input.value = '';
 
+    // Réponse affichée au fil des jetons reçus du flux SSE
+    const aiMessage = {
+        sender: 'ai',
+        content: '',
+        timestamp: new Date().toISOString()
+    };
+    appState.chatMessages.push(aiMessage);
+    renderChatInterface(appState.chatMessages);
+
+    const contentElements = document.querySelectorAll('.chat-message--ai .chat-message__content');
+    const aiContent = contentElements[contentElements.length - 1];
+    const messagesContainer = document.getElementById('chatMessages');
+
     try {
-        // Envoyer la question à l'API
-        const response = await fetchAPI(API_ENDPOINTS.projectChat(appState.currentProject.id), {
+        await streamAPI(API_ENDPOINTS.projectChatStream(appState.currentProject.id), {
             method: 'POST',
             body: { question: question }
+        }, (event, data) => {
+            if (event === 'token') {
+                // Seul le message en cours est mis à jour : la saisie suivante n'est pas effacée
+                aiMessage.content += data.token;
+                if (aiContent) aiContent.innerHTML = formatMessageContent(aiMessage.content);
+                if (messagesContainer) messagesContainer.scrollTop = messagesContainer.scrollHeight;
+            } else if (event === 'error') {
+                showToast(`${MESSAGES.errorGeneratingAnswer}: ${data.error}`, 'error');
+            } else if (event === 'done') {
+                aiMessage.content = data.answer;
+                if (aiContent) aiContent.innerHTML = formatMessageContent(aiMessage.content);
+            }
         });
 
-        showToast(MESSAGES.questionSent, 'info');
-        
     } catch (error) {
         console.error('Erreur lors de l\'envoi de la question:', error);
         showToast(MESSAGES.errorSendingQuestion, 'error');
         
-        // Retirer le message utilisateur en cas d'erreur
-        appState.chatMessages.pop(); // Direct modification, but then re-rendered
-        renderChatInterface(appState.chatMessages);
+        // Retirer la question si aucune réponse n'a été reçue (une réponse partielle est enregistrée côté serveur)
+        if (!aiMessage.content) {
+            appState.chatMessages.splice(appState.chatMessages.indexOf(userMessage), 2);
+            renderChatInterface(appState.chatMessages);
+        }
     }
 }
 
@@ -58,26 +58,43 @@ describe('Module Chat', () => {
   });
 
   describe('sendChatMessage', () => {
-    it('devrait envoyer un message et mettre à jour l\'interface', async () => {
-      api.fetchAPI.mockResolvedValue({});
+    it('devrait afficher la réponse au fil du flux SSE', async () => {
+      api.streamAPI.mockImplementation(async (endpoint, options, onEvent) => {
+        // La question est affichée avant la fin du flux
+        expect(document.querySelector('.chat-message--user')).not.toBeNull();
+        onEvent('token', { token: 'Bonne ' });
+        expect(document.querySelector('.chat-message--ai').innerHTML).toContain('Bonne');
+        onEvent('token', { token: 'réponse' });
+        onEvent('done', { answer: 'Bonne réponse' });
+      });
       document.getElementById('chatInput').value = 'Ma question';
 
       await chat.sendChatMessage();
 
-      // Vérifie que le message de l'utilisateur est affiché immédiatement
-      expect(document.querySelector('.chat-message--user')).not.toBeNull();
       expect(document.body.innerHTML).toContain('Ma question');
+      expect(api.streamAPI).toHaveBeenCalledWith('/projects/proj-1/chat/stream', expect.objectContaining({
+        method: 'POST',
+        body: { question: 'Ma question' },
+      }), expect.any(Function));
+      expect(appState.chatMessages.map(msg => msg.content)).toEqual(['Ma question', 'Bonne réponse']);
+      expect(document.querySelector('.chat-message--ai').innerHTML).toContain('Bonne réponse');
+    });
+
+    it("devrait retirer la question si le flux échoue avant toute réponse", async () => {
+      api.streamAPI.mockRejectedValue(new Error('Too Many Requests'));
+      document.getElementById('chatInput').value = 'Ma question';
+
+      await chat.sendChatMessage();
 
-      // Vérifie que l'API a été appelée
-      expect(api.fetchAPI).toHaveBeenCalledWith('/projects/proj-1/chat', expect.any(Object));
-      expect(ui.showToast).toHaveBeenCalledWith('Question envoyée. Réponse en cours...', 'info');
+      expect(appState.chatMessages).toEqual([]);
+      expect(ui.showToast).toHaveBeenCalledWith("Erreur lors de l'envoi de la question", 'error');
     });
 
     it("ne devrait rien faire si la question est vide", async () => {
       document.getElementById('chatInput').value = '   '; // Espace vide
       await chat.sendChatMessage();
 
-      expect(api.fetchAPI).not.toHaveBeenCalled();
+      expect(api.streamAPI).not.toHaveBeenCalled();
       expect(ui.showToast).toHaveBeenCalledWith('Veuillez saisir une question', 'warning');
     });
   });
@@ -96,6 +96,7 @@ export const API_ENDPOINTS = {
     // Chat
     projectChatHistory: (id) => `/projects/${id}/chat-history`,
     projectChat: (id) => `/projects/${id}/chat`,
+    projectChatStream: (id) => `/projects/${id}/chat/stream`,
 
     // Settings
     analysisProfiles: '/analysis-profiles',
@@ -267,6 +268,7 @@ export const MESSAGES = {
     searchingFreePdfs: 'Recherche des PDFs gratuits...', 
     pdfSearchStarted: 'Recherche de PDFs lancée en arrière-plan.',
     generatingThesisExport: "Génération de l'export thèse...",
+    thesisExportStarted: "Export thèse lancé : le téléchargement démarrera dès que l'archive sera prête.",
     startingIndexing: "Lancement de l'indexation...",
     indexingInProgress: 'Indexation en cours...', 
     indexingStarted: 'Indexation lancée en arrière-plan.',
@@ -309,6 +311,7 @@ export const MESSAGES = {
     enterQuestion: 'Veuillez saisir une question',
     questionSent: 'Question envoyée. Réponse en cours...', 
     errorSendingQuestion: "Erreur lors de l'envoi de la question",
+    errorGeneratingAnswer: 'Réponse interrompue',
     selectProjectForIndexing: "Veuillez sélectionner un projet pour lancer l'indexation.",
     errorStartingIndexing: "Erreur lors du lancement de l'indexation",
 
@@ -366,6 +366,10 @@ export async function initializeWebSocket() {
         appState.socket.on('notification', (data) => {
             console.log(MESSAGES.notificationReceived, data);
             handleWebSocketNotification(data);
+
+            if (data.type === 'export_completed' && data.download_url) {
+                window.location.href = data.download_url;
+            }
             
             // Logique de rafraîchissement basée sur le type de notification
             if (data.type === 'task_progress' && data.task_id) {
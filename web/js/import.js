@@ -117,10 +117,15 @@ export async function exportForThesis() {
         return;
     }
     showLoadingOverlay(true, MESSAGES.generatingThesisExport);
-    const { getApiUrl } = await import('./api.js');
-    const exportUrl = API_ENDPOINTS.projectExportThesis(appState.currentProject.id);
-    window.location.href = await getApiUrl(exportUrl);
-    showLoadingOverlay(false);
+    try {
+        // L'archive est générée par une tâche de fond ; la notification 'export_completed' déclenche le téléchargement
+        await fetchAPI(API_ENDPOINTS.projectExportThesis(appState.currentProject.id), { method: 'POST' });
+        showToast(MESSAGES.thesisExportStarted, 'info');
+    } catch (e) {
+        showToast(e.message, 'error');
+    } finally {
+        showLoadingOverlay(false);
+    }
 }
 
 export async function handleIndexPdfs() {